@@ -0,0 +1,304 @@
+import numpy as np
+
+from Instruction import Op
+
+
+# Configuração padrão (mesmos nomes e valores da API web)
+DEFAULT_CONFIG = {
+    'rs_add': 3, 'rs_store': 2, 'rs_mult': 2, 'rs_branch': 1,
+    'latency_add': 2, 'latency_mul': 10, 'latency_div': 40,
+    'latency_load': 2, 'latency_store': 2, 'latency_branch': 1,
+}
+
+# Classes de RS na ordem global do simulador (também é a prioridade no CDB)
+RS_CLASSES = ('rs_add', 'rs_store', 'rs_mult', 'rs_branch')
+
+OP_CLASS = {
+    Op.ADD: 0, Op.SUB: 0,
+    Op.LD: 1, Op.ST: 1,
+    Op.MUL: 2, Op.DIV: 2,
+    Op.BEQ: 3, Op.BNE: 3,
+}
+
+OP_LATENCY_KEY = {
+    Op.ADD: 'latency_add', Op.SUB: 'latency_add',
+    Op.MUL: 'latency_mul', Op.DIV: 'latency_div',
+    Op.LD: 'latency_load', Op.ST: 'latency_store',
+    Op.BEQ: 'latency_branch', Op.BNE: 'latency_branch',
+}
+
+
+class BatchSimulator:
+    """Simula o mesmo programa para muitas configurações ao mesmo tempo.
+
+    Todas as configurações avançam juntas, ciclo a ciclo, sobre arrays NumPy
+    com um eixo de configuração: timestamps das instruções (C x N), ocupação
+    das RSs (C x R) e Register Alias Table (C x registradores). O modelo de
+    tempo é o mesmo do TOMASSULLLERoriSimulator no modo padrão (issue, commit
+    e CDB simples, ROB do tamanho do total de RSs). Como os branches são
+    sempre tomados, os valores dos operandos não afetam o tempo e não são
+    simulados, só as dependências (tags Qj/Qk).
+    """
+
+    def __init__(self, instructions, configs, max_cycles=100000):
+        self.instructions = list(instructions)
+        self.configs = [dict(DEFAULT_CONFIG, **config) for config in configs]
+        self.max_cycles = max_cycles
+        self.results = None
+        self._decode_program()
+        self._build_stations()
+
+    def _decode_program(self):
+        """Pré-decodifica o programa em arrays (classe, registradores, alvo dos branches)"""
+        instructions = self.instructions
+        n = len(instructions)
+
+        # Mesma regra do Register File: R0-R31 mais todo destino escrito pelo programa.
+        # Fontes que não são registradores são imediatos (sem dependência).
+        register_names = [f"R{i}" for i in range(32)]
+        for instr in instructions:
+            dest = instr.get_dest()
+            if dest is not None and dest != "0" and dest not in register_names:
+                register_names.append(dest)
+        register_index = {name: i for i, name in enumerate(register_names)}
+        self.register_count = len(register_names)
+
+        def operand_index(name):
+            if name is None or name == "0":
+                return -1
+            return register_index.get(name, -1)
+
+        first_index_by_id = {}
+        for i, instr in enumerate(instructions):
+            first_index_by_id.setdefault(instr.get_id(), i)
+
+        self.op_class = np.array([OP_CLASS[instr.get_op()] for instr in instructions], dtype=np.int32)
+        self.is_branch = self.op_class == OP_CLASS[Op.BEQ]
+        self.dest_reg = np.array([operand_index(instr.get_dest()) for instr in instructions], dtype=np.int32)
+        self.src1_reg = np.array([operand_index(instr.get_src1()) for instr in instructions], dtype=np.int32)
+        self.src2_reg = np.array([operand_index(instr.get_src2()) for instr in instructions], dtype=np.int32)
+        self.target_index = np.array(
+            [first_index_by_id.get(instr.get_branch_target_id(), -1) if self.is_branch[i] else -1
+             for i, instr in enumerate(instructions)],
+            dtype=np.int32,
+        )
+        # Latência de cada instrução em cada configuração (C x N)
+        self.latency = np.array(
+            [[config[OP_LATENCY_KEY[instr.get_op()]] for instr in instructions] for config in self.configs],
+            dtype=np.int32,
+        ).reshape(len(self.configs), n)
+
+    def _build_stations(self):
+        """Layout das RSs: blocos por classe com o maior número de RSs entre as configurações"""
+        counts = np.array([[config[key] for key in RS_CLASSES] for config in self.configs],
+                          dtype=np.int32).reshape(len(self.configs), len(RS_CLASSES))
+        block_size = counts.max(axis=0) if len(self.configs) else np.zeros(len(RS_CLASSES), dtype=np.int32)
+        self.station_class = np.repeat(np.arange(len(RS_CLASSES), dtype=np.int32), block_size)
+        block_start = np.concatenate(([0], np.cumsum(block_size)[:-1]))
+        position_in_block = np.arange(len(self.station_class)) - block_start[self.station_class]
+        # RSs que existem em cada configuração (C x R)
+        self.station_valid = position_in_block[None, :] < counts[:, self.station_class]
+
+    def run(self):
+        """Executa todas as configurações até o fim (ou max_cycles) e retorna as métricas"""
+        config_count = len(self.configs)
+        n = len(self.instructions)
+        station_count = len(self.station_class)
+        rows = np.arange(config_count)
+        instr_idx = np.arange(n)
+
+        issue = np.full((config_count, n), -1, dtype=np.int32)
+        start = np.full((config_count, n), -1, dtype=np.int32)
+        end = np.full((config_count, n), -1, dtype=np.int32)
+        write = np.full((config_count, n), -1, dtype=np.int32)
+        commit = np.full((config_count, n), -1, dtype=np.int32)
+        squashed = np.zeros((config_count, n), dtype=bool)
+
+        rs_busy = np.zeros((config_count, station_count), dtype=bool)
+        rs_instr = np.full((config_count, station_count), -1, dtype=np.int32)
+        rs_qj = np.full((config_count, station_count), -1, dtype=np.int32)
+        rs_qk = np.full((config_count, station_count), -1, dtype=np.int32)
+        rat = np.full((config_count, self.register_count), -1, dtype=np.int32)
+
+        clock = np.zeros(config_count, dtype=np.int32)
+        program_counter = np.zeros(config_count, dtype=np.int32)
+        commit_head = np.zeros(config_count, dtype=np.int32)
+        live = np.full(config_count, n, dtype=np.int32)
+        bubbles = np.zeros(config_count, dtype=np.int32)
+        squashed_total = np.zeros(config_count, dtype=np.int32)
+
+        # Configurações travadas (ex.: RS esperando a tag de um produtor descartado):
+        # param de ser simuladas e o resto até max_cycles é extrapolado no final.
+        stuck_since = np.zeros(config_count, dtype=np.int32)
+        stuck_bubble = np.zeros(config_count, dtype=bool)
+        stuck = np.zeros(config_count, dtype=bool)
+
+        def free_stations(mask):
+            rs_busy[mask] = False
+            rs_instr[mask] = -1
+            rs_qj[mask] = -1
+            rs_qk[mask] = -1
+
+        t = 0
+        while t < self.max_cycles:
+            active = (live > 0) & ~stuck
+            if not active.any():
+                break
+            t += 1
+            clock[active] = t
+            progressed = np.zeros(config_count, dtype=bool)
+
+            # ---------- COMMIT (cabeça do ROB) ----------
+            head = np.minimum(commit_head, max(n - 1, 0))
+            can_commit = active & (commit_head < n)
+            can_commit[can_commit] &= write[rows[can_commit], head[can_commit]] != -1
+            committing = rows[can_commit]
+            progressed[committing] = True
+            if committing.size:
+                heads = head[committing]
+                commit[committing, heads] = t
+                live[committing] -= 1
+                free_stations(rs_busy & (rs_instr == np.where(can_commit, head, -2)[:, None]))
+
+                # Branch comitado (sempre tomado): descarta entre branch e alvo e salta o PC
+                taken = committing[self.is_branch[heads] & (self.target_index[heads] != -1)]
+                if taken.size:
+                    branch_pos = head[taken]
+                    target = self.target_index[branch_pos]
+                    in_range = ((instr_idx[None, :] > branch_pos[:, None]) &
+                                (instr_idx[None, :] < target[:, None]))
+                    to_squash = in_range & (commit[taken] == -1) & ~squashed[taken]
+                    squashed[taken] |= to_squash
+                    squash_counts = to_squash.sum(axis=1).astype(np.int32)
+                    squashed_total[taken] += squash_counts
+                    live[taken] -= squash_counts
+                    held = np.take_along_axis(to_squash, np.maximum(rs_instr[taken], 0), axis=1)
+                    squash_mask = np.zeros_like(rs_busy)
+                    squash_mask[taken] = held & rs_busy[taken]
+                    free_stations(squash_mask)
+                    program_counter[taken] = target
+
+                # Avança a cabeça sobre as comitadas/descartadas
+                commit_head[committing] += 1
+                advancing = committing
+                while advancing.size:
+                    advancing = advancing[commit_head[advancing] < n]
+                    if not advancing.size:
+                        break
+                    positions = commit_head[advancing]
+                    retired = squashed[advancing, positions] | (commit[advancing, positions] != -1)
+                    advancing = advancing[retired]
+                    commit_head[advancing] += 1
+
+            # ---------- WRITE RESULT (um CDB, menor posição global de RS primeiro) ----------
+            held_instr = np.maximum(rs_instr, 0)
+            finished = (rs_busy & active[:, None] &
+                        (np.take_along_axis(end, held_instr, axis=1) != -1) &
+                        (np.take_along_axis(write, held_instr, axis=1) == -1))
+            writers = rows[finished.any(axis=1)]
+            progressed[writers] = True
+            if writers.size:
+                slots = finished[writers].argmax(axis=1).astype(np.int32)
+                produced = rs_instr[writers, slots]
+                write[writers, produced] = t
+                tag = np.full(config_count, -2, dtype=np.int32)
+                tag[writers] = slots
+                rs_qj[rs_qj == tag[:, None]] = -1
+                rs_qk[rs_qk == tag[:, None]] = -1
+                dest = self.dest_reg[produced]
+                has_dest = dest != -1
+                w_rows, w_dest, w_slots = writers[has_dest], dest[has_dest], slots[has_dest]
+                clear = rat[w_rows, w_dest] == w_slots
+                rat[w_rows[clear], w_dest[clear]] = -1
+
+            # ---------- EXECUTE ----------
+            held_instr = np.maximum(rs_instr, 0)
+            started = np.take_along_axis(start, held_instr, axis=1)
+            ended = np.take_along_axis(end, held_instr, axis=1)
+            latency = np.take_along_axis(self.latency, held_instr, axis=1)
+            busy = rs_busy & active[:, None]
+            starting = busy & (started == -1) & (rs_qj == -1) & (rs_qk == -1)
+            ending = busy & (started != -1) & (ended == -1) & (latency > 0) & (started + latency == t)
+            s_rows, s_slots = np.nonzero(starting)
+            start[s_rows, rs_instr[s_rows, s_slots]] = t
+            e_rows, e_slots = np.nonzero(ending)
+            end[e_rows, rs_instr[e_rows, e_slots]] = t
+            progressed[s_rows] = True
+            progressed[e_rows] = True
+            # Ainda há execução em andamento: o término é um evento futuro
+            progressed |= (busy & ((started != -1) | starting) & (ended == -1) & ~ending &
+                           (latency > 0)).any(axis=1)
+
+            # ---------- ISSUE ----------
+            pc = np.minimum(program_counter, max(n - 1, 0))
+            can_issue = active & (program_counter < n)
+            skip = can_issue.copy()
+            skip[can_issue] = (squashed[rows[can_issue], pc[can_issue]] |
+                               (issue[rows[can_issue], pc[can_issue]] != -1))
+            program_counter[skip] += 1
+            progressed |= skip
+
+            trying = rows[can_issue & ~skip]
+            if trying.size:
+                position = pc[trying]
+                free = (~rs_busy[trying] & self.station_valid[trying] &
+                        (self.station_class[None, :] == self.op_class[position][:, None]))
+                got = free.any(axis=1)
+                bubbles[trying[~got]] += 1
+                progressed[trying[got]] = True
+
+                issued, position = trying[got], position[got]
+                if issued.size:
+                    slots = free[got].argmax(axis=1).astype(np.int32)
+                    src1, src2 = self.src1_reg[position], self.src2_reg[position]
+                    qj = np.where(src1 != -1, rat[issued, np.maximum(src1, 0)], -1)
+                    qk = np.where(src2 != -1, rat[issued, np.maximum(src2, 0)], -1)
+                    rs_busy[issued, slots] = True
+                    rs_instr[issued, slots] = position
+                    rs_qj[issued, slots] = qj
+                    rs_qk[issued, slots] = qk
+                    issue[issued, position] = t
+                    dest = self.dest_reg[position]
+                    has_dest = dest != -1
+                    rat[issued[has_dest], dest[has_dest]] = slots[has_dest]
+                    program_counter[issued] += 1
+
+            # Ciclo sem nenhum evento e nada executando: o estado não muda mais
+            newly_stuck = active & ~progressed
+            stuck |= newly_stuck
+            stuck_since[newly_stuck] = t
+            stuck_bubble[newly_stuck] = program_counter[newly_stuck] < n
+
+        # Extrapola as travadas até max_cycles (mesmo resultado de simular ciclo a ciclo)
+        if stuck.any():
+            remaining = self.max_cycles - stuck_since[stuck]
+            clock[stuck] = self.max_cycles
+            bubbles[stuck] += remaining * stuck_bubble[stuck]
+
+        committed = ((commit != -1) & ~squashed).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ipc = np.where(clock > 0, committed / np.maximum(clock, 1), 0.0)
+
+        self.results = {
+            'ipc': ipc,
+            'total_cycles': clock,
+            'bubble_cycles': bubbles,
+            'total_squashed': squashed_total,
+            'committed_instructions': committed,
+            'finished': live == 0,
+        }
+        return self.results
+
+    def get_metrics(self):
+        """Métricas por configuração, uma lista de dicts (configuração + resultados)"""
+        if self.results is None:
+            self.run()
+        metrics = []
+        for i, config in enumerate(self.configs):
+            entry = dict(config)
+            entry['ipc'] = float(self.results['ipc'][i])
+            for key in ('total_cycles', 'bubble_cycles', 'total_squashed', 'committed_instructions'):
+                entry[key] = int(self.results[key][i])
+            entry['finished'] = bool(self.results['finished'][i])
+            metrics.append(entry)
+        return metrics
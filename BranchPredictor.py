@@ -0,0 +1,208 @@
+DEFAULT_TABLE_SIZE = 1024  # Entradas das tabelas de predição
+DEFAULT_HISTORY_BITS = 8  # Bits do histórico global (gshare e torneio)
+
+
+class BranchPredictor:
+    """Interface dos preditores de desvio usados no issue.
+
+    predict(pc, target) diz se o branch do índice pc (alvo no índice target,
+    -1 se não existe) deve ser tomado; update(pc, taken, journal) treina o
+    preditor com o resultado real, no commit. As tabelas são listas e toda
+    alteração passa pelo journal (Step Back); capture_state/restore_state
+    copiam as tabelas para os checkpoints.
+    """
+
+    name = None
+
+    def reset(self):
+        """Volta as tabelas ao estado inicial"""
+
+    def predict(self, pc, target):
+        raise NotImplementedError
+
+    def update(self, pc, taken, journal):
+        """Treina com o resultado real do branch (sem efeito nos preditores estáticos)"""
+
+    def capture_state(self):
+        return ()
+
+    def restore_state(self, state):
+        pass
+
+    def get_name(self):
+        return self.name
+
+
+class StaticPredictor(BranchPredictor):
+    """Sempre a mesma direção (tomado ou não tomado)"""
+
+    def __init__(self, taken=True):
+        self.taken = taken
+        self.name = 'static' if taken else 'static_not_taken'
+
+    def predict(self, pc, target):
+        return self.taken
+
+
+class CounterTable:
+    """Tabela de contadores saturados indexada por (índice % tamanho)"""
+
+    def __init__(self, size, bits, initial):
+        if size < 1:
+            raise ValueError("A tabela do preditor precisa de pelo menos 1 entrada")
+        self.size = size
+        self.maximum = (1 << bits) - 1
+        self.initial = initial
+        self.counters = [initial] * size
+
+    def reset(self):
+        self.counters[:] = [self.initial] * self.size
+
+    def is_taken(self, index):
+        """Metade superior dos valores do contador = tomado"""
+        return self.counters[index % self.size] > self.maximum // 2
+
+    def train(self, index, taken, journal):
+        slot = index % self.size
+        value = self.counters[slot]
+        value = min(value + 1, self.maximum) if taken else max(value - 1, 0)
+        if value != self.counters[slot]:
+            journal.record_index(self.counters, slot)
+            self.counters[slot] = value
+
+
+class OneBitPredictor(BranchPredictor):
+    """Um bit por entrada: repete a última direção do branch"""
+
+    name = 'one_bit'
+
+    def __init__(self, table_size=DEFAULT_TABLE_SIZE):
+        self.table = CounterTable(table_size, 1, 0)
+
+    def reset(self):
+        self.table.reset()
+
+    def predict(self, pc, target):
+        return self.table.is_taken(pc)
+
+    def update(self, pc, taken, journal):
+        self.table.train(pc, taken, journal)
+
+    def capture_state(self):
+        return self.table.counters[:]
+
+    def restore_state(self, state):
+        self.table.counters[:] = state
+
+
+class TwoBitPredictor(OneBitPredictor):
+    """Contador saturado de 2 bits por entrada (começa fracamente não tomado)"""
+
+    name = 'two_bit'
+
+    def __init__(self, table_size=DEFAULT_TABLE_SIZE):
+        self.table = CounterTable(table_size, 2, 1)
+
+
+class GsharePredictor(BranchPredictor):
+    """Contadores de 2 bits indexados por pc XOR histórico global.
+
+    O histórico é atualizado no commit (não especulativo), então a predição
+    de um branch emitido antes de o anterior comitar usa o histórico atrasado.
+    """
+
+    name = 'gshare'
+
+    def __init__(self, table_size=DEFAULT_TABLE_SIZE, history_bits=DEFAULT_HISTORY_BITS):
+        if history_bits < 1:
+            raise ValueError("O histórico global precisa de pelo menos 1 bit")
+        self.table = CounterTable(table_size, 2, 1)
+        self.history_mask = (1 << history_bits) - 1
+        self.history = 0
+
+    def reset(self):
+        self.table.reset()
+        self.history = 0
+
+    def index(self, pc):
+        return pc ^ self.history
+
+    def predict(self, pc, target):
+        return self.table.is_taken(self.index(pc))
+
+    def update(self, pc, taken, journal):
+        self.table.train(self.index(pc), taken, journal)
+        journal.record(self, 'history')
+        self.history = ((self.history << 1) | int(taken)) & self.history_mask
+
+    def capture_state(self):
+        return self.table.counters[:], self.history
+
+    def restore_state(self, state):
+        counters, self.history = state
+        self.table.counters[:] = counters
+
+
+class TournamentPredictor(BranchPredictor):
+    """Torneio entre um preditor local (2 bits por pc) e um gshare.
+
+    Um seletor de 2 bits por pc escolhe qual dos dois usar e é treinado
+    só quando eles discordam (tomado = confiar no gshare).
+    """
+
+    name = 'tournament'
+
+    def __init__(self, table_size=DEFAULT_TABLE_SIZE, history_bits=DEFAULT_HISTORY_BITS):
+        self.local = TwoBitPredictor(table_size)
+        self.gshare = GsharePredictor(table_size, history_bits)
+        self.chooser = CounterTable(table_size, 2, 1)
+
+    def reset(self):
+        self.local.reset()
+        self.gshare.reset()
+        self.chooser.reset()
+
+    def predict(self, pc, target):
+        if self.chooser.is_taken(pc):
+            return self.gshare.predict(pc, target)
+        return self.local.predict(pc, target)
+
+    def update(self, pc, taken, journal):
+        local_correct = self.local.predict(pc, -1) == taken
+        gshare_correct = self.gshare.predict(pc, -1) == taken
+        if local_correct != gshare_correct:
+            self.chooser.train(pc, gshare_correct, journal)
+        self.local.update(pc, taken, journal)
+        self.gshare.update(pc, taken, journal)
+
+    def capture_state(self):
+        return self.local.capture_state(), self.gshare.capture_state(), self.chooser.counters[:]
+
+    def restore_state(self, state):
+        local, gshare, chooser = state
+        self.local.restore_state(local)
+        self.gshare.restore_state(gshare)
+        self.chooser.counters[:] = chooser
+
+
+# Nomes aceitos na configuração ('none' = modo original: sem predição, branches sempre tomados)
+PREDICTORS = ('none', 'static', 'static_not_taken', 'one_bit', 'two_bit', 'gshare', 'tournament')
+
+
+def create_predictor(name, table_size=DEFAULT_TABLE_SIZE, history_bits=DEFAULT_HISTORY_BITS):
+    """Preditor pelo nome da configuração (None para 'none')"""
+    if name in (None, 'none'):
+        return None
+    if name == 'static':
+        return StaticPredictor(True)
+    if name == 'static_not_taken':
+        return StaticPredictor(False)
+    if name == 'one_bit':
+        return OneBitPredictor(table_size)
+    if name == 'two_bit':
+        return TwoBitPredictor(table_size)
+    if name == 'gshare':
+        return GsharePredictor(table_size, history_bits)
+    if name == 'tournament':
+        return TournamentPredictor(table_size, history_bits)
+    raise ValueError(f"Preditor de desvio inválido: {name}")
@@ -0,0 +1,62 @@
+import math
+from array import array
+
+
+PAGE_SIZE = 4096  # Palavras por página
+
+
+def word_address(value):
+    """Endereço de palavra de um valor calculado (base + deslocamento).
+
+    Cada endereço inteiro guarda uma palavra (um float). Valores não
+    finitos (overflow de MUL/DIV) vão para o endereço 0.
+    """
+    return int(value) if math.isfinite(value) else 0
+
+
+class DataMemory:
+    """Memória de dados esparsa, alocada em páginas de PAGE_SIZE palavras.
+
+    Só as páginas escritas existem (dict número da página -> array de
+    floats); ler uma posição de página não alocada retorna 0.0 sem alocar.
+    As escritas (commit dos stores) passam pelo journal de Step Back.
+    """
+
+    def __init__(self):
+        self.pages = {}
+
+    def reset(self):
+        self.pages.clear()
+
+    def read(self, address):
+        page = self.pages.get(address // PAGE_SIZE)
+        if page is None:
+            return 0.0
+        return page[address % PAGE_SIZE]
+
+    def write(self, address, value, journal):
+        number = address // PAGE_SIZE
+        page = self.pages.get(number)
+        if page is None:
+            journal.record_item(self.pages, number)
+            page = self.pages[number] = array('d', bytes(8 * PAGE_SIZE))
+        journal.record_index(page, address % PAGE_SIZE)
+        page[address % PAGE_SIZE] = value
+
+    def capture_state(self):
+        """Cópia das páginas (para checkpoints)"""
+        return {number: page[:] for number, page in self.pages.items()}
+
+    def restore_state(self, state):
+        self.pages.clear()
+        self.pages.update((number, page[:]) for number, page in state.items())
+
+    # Getters
+    def get_page_count(self):
+        return len(self.pages)
+
+    def get_words(self):
+        """Posições não nulas (endereço -> valor), em ordem de endereço"""
+        return {number * PAGE_SIZE + offset: value
+                for number in sorted(self.pages)
+                for offset, value in enumerate(self.pages[number]) if value != 0.0}
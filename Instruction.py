@@ -13,6 +13,20 @@ class Op(Enum):
 
 
 class Instruction:
+    # __slots__: sem __dict__ por instância (menos memória e acesso mais rápido
+    # aos atributos em traces com muitas instruções)
+    __slots__ = ('id', 'op', 'dest', 'src1', 'src2', 'original_latency', 'current_latency',
+                 'issue_cycle', 'start_exec_cycle', 'end_exec_cycle', 'write_result_cycle',
+                 'commit_cycle', 'branch_target_id', 'branch_taken', 'branch_resolved',
+                 'squashed', 'is_speculative', 'speculative_branch_id', 'predicted_taken',
+                 'forwarded_from', 'replay', 'dest_index', 'src1_index', 'src1_value', 'src2_index', 'src2_value', 'static_index')
+
+    # Campos que mudam durante a simulação (usados pelo Step Back e pelos checkpoints)
+    STATE_FIELDS = ('current_latency', 'issue_cycle', 'start_exec_cycle', 'end_exec_cycle',
+                    'write_result_cycle', 'commit_cycle', 'branch_taken', 'branch_resolved',
+                    'squashed', 'is_speculative', 'speculative_branch_id', 'predicted_taken',
+                    'forwarded_from', 'replay')
+
     def __init__(self, id, op, dest, src1, src2, latency):
         self.id = id
         self.op = op
@@ -21,6 +35,9 @@ class Instruction:
         self.src2 = src2
         self.original_latency = latency
         self.current_latency = latency
+        # Índice da instrução no programa estático (nas instâncias dinâmicas do
+        # ProgramStream o ID é a posição no fluxo e este índice é a origem)
+        self.static_index = id
 
         self.issue_cycle = -1
         self.start_exec_cycle = -1
@@ -33,11 +50,24 @@ class Instruction:
         self.branch_taken = False
         self.branch_resolved = False
         self.squashed = False
+        self.predicted_taken = False  # Direção prevista no issue (BranchPredictor)
+
+        # Campos para Loads (modelo de memória)
+        self.forwarded_from = -1  # Posição do store que encaminhou o valor (-1 = lido da memória)
+        self.replay = False  # Leu um valor antigo: refeito no commit (desambiguação especulativa)
 
         # Campos para Especulação
         self.is_speculative = False
         self.speculative_branch_id = -1
 
+        # Operandos pré-decodificados (ProgramParser.decode_operands): índice no
+        # Register File (-1 = não é registrador) e valor imediato de cada fonte
+        self.dest_index = None
+        self.src1_index = None
+        self.src1_value = None
+        self.src2_index = None
+        self.src2_value = None
+
     # Getters
     def get_id(self):
         return self.id
@@ -84,12 +114,24 @@ class Instruction:
     def is_branch_resolved(self):
         return self.branch_resolved
 
+    def is_predicted_taken(self):
+        return self.predicted_taken
+
     def is_squashed(self):
         return self.squashed
 
     def get_speculative_branch_id(self):
         return self.speculative_branch_id
 
+    def get_static_index(self):
+        return self.static_index
+
+    def get_forwarded_from(self):
+        return self.forwarded_from
+
+    def is_replay(self):
+        return self.replay
+
     # Setters
     def set_current_latency(self, current_latency):
         self.current_latency = current_latency
@@ -118,9 +160,29 @@ class Instruction:
     def set_branch_resolved(self, branch_resolved):
         self.branch_resolved = branch_resolved
 
+    def set_predicted_taken(self, predicted_taken):
+        self.predicted_taken = predicted_taken
+
     def set_squashed(self, squashed):
         self.squashed = squashed
 
+    def set_static_index(self, static_index):
+        self.static_index = static_index
+
+    def set_forwarded_from(self, forwarded_from):
+        self.forwarded_from = forwarded_from
+
+    def set_replay(self, replay):
+        self.replay = replay
+
+    def set_operands(self, dest_index, src1_index, src1_value, src2_index, src2_value):
+        """Grava os operandos pré-decodificados"""
+        self.dest_index = dest_index
+        self.src1_index = src1_index
+        self.src1_value = src1_value
+        self.src2_index = src2_index
+        self.src2_value = src2_value
+
     def set_speculative(self, branch_id):
         """Marca instrução como especulativa"""
         self.is_speculative = True
@@ -131,6 +193,22 @@ class Instruction:
         self.is_speculative = False
         self.speculative_branch_id = -1
 
+    def reset(self):
+        """Volta a instrução ao estado inicial (antes do issue)"""
+        self.current_latency = self.original_latency
+        self.issue_cycle = -1
+        self.start_exec_cycle = -1
+        self.end_exec_cycle = -1
+        self.write_result_cycle = -1
+        self.commit_cycle = -1
+        self.branch_taken = False
+        self.branch_resolved = False
+        self.squashed = False
+        self.predicted_taken = False
+        self.forwarded_from = -1
+        self.replay = False
+        self.clear_speculative()
+
     def __str__(self):
         base_string = (f"Instr {self.id}: {self.op.value} {self.dest}, {self.src1}, {self.src2} | "
                       f"Issue: {self.issue_cycle if self.issue_cycle != -1 else 'N/A'}, "
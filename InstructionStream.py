@@ -0,0 +1,251 @@
+import mmap
+from collections import deque
+
+from Instruction import Instruction
+from ProgramParser import BRANCH_OPS, DEFAULT_LATENCIES, parse_line
+
+
+DEFAULT_FETCH_WINDOW = 64  # Instruções lidas do arquivo por vez
+
+
+class InstructionStream:
+    """Lê as instruções de um arquivo sob demanda, via mmap.
+
+    Para traces dinâmicos grandes demais para virar uma lista: o simulador
+    pede as instruções pelo índice e só mantém em memória a janela entre a
+    mais antiga ainda não retirada (cabeça do ROB) e a última lida. As
+    instruções abaixo da janela (comitadas ou descartadas) são liberadas por
+    evict_until. As linhas seguem as regras do ProgramParser (modo tolerante)
+    e os IDs são as posições no programa.
+    """
+
+    def __init__(self, path, latencies=None, fetch_window=DEFAULT_FETCH_WINDOW):
+        if fetch_window < 1:
+            raise ValueError("A janela de fetch precisa de pelo menos 1 instrução")
+        self.latencies = dict(DEFAULT_LATENCIES)
+        self.latencies.update(latencies or {})
+        self.fetch_window = fetch_window
+
+        self.file = open(path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.buffer = b''  # Arquivo vazio não pode ser mapeado
+        self.rewind()
+
+    def rewind(self):
+        """Volta ao início do arquivo (reset da simulação)"""
+        self.offset = 0  # Próximo byte a ler
+        self.base = 0  # Índice da instrução mais antiga ainda em memória
+        self.resident = deque()
+        self.positions = {}  # Instrução -> índice no programa (só as da janela)
+        self.exhausted = False
+        self.max_resident = 0
+
+    def close(self):
+        self.resident.clear()
+        self.positions.clear()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def read_next(self):
+        """Lê a próxima instrução válida do arquivo (None no fim)"""
+        buffer = self.buffer
+        size = len(buffer)
+        while self.offset < size:
+            end = buffer.find(b'\n', self.offset)
+            if end == -1:
+                end = size
+            line = buffer[self.offset:end].decode('utf-8', errors='replace')
+            self.offset = end + 1
+            instr = parse_line(line, self.get_fetched_count(), self.latencies)
+            if instr is not None:
+                return instr
+        self.exhausted = True
+        return None
+
+    def fetch_until(self, index):
+        """Lê do arquivo até a instrução index estar na janela; retorna quantas foram lidas"""
+        fetched = 0
+        while self.get_fetched_count() <= index and not self.exhausted:
+            for _ in range(self.fetch_window):
+                instr = self.read_next()
+                if instr is None:
+                    break
+                self.positions[instr] = self.get_fetched_count()
+                self.resident.append(instr)
+                fetched += 1
+        self.max_resident = max(self.max_resident, len(self.resident))
+        return fetched
+
+    def evict_until(self, index):
+        """Libera as instruções abaixo de index que já foram comitadas ou descartadas"""
+        resident = self.resident
+        while self.base < index and resident:
+            instr = resident[0]
+            if instr.get_commit_cycle() == -1 and not instr.is_squashed():
+                break
+            resident.popleft()
+            del self.positions[instr]
+            self.base += 1
+
+    def __getitem__(self, index):
+        if index < self.base:
+            raise IndexError(f"Instrução {index} já saiu da janela do stream")
+        return self.resident[index - self.base]
+
+    def __iter__(self):
+        return iter(self.resident)
+
+    def copy(self):
+        """Instruções da janela atual (como list.copy() no modo lista)"""
+        return list(self.resident)
+
+    # Getters
+    def get_base(self):
+        return self.base
+
+    def get_fetched_count(self):
+        """Instruções lidas do arquivo até agora (índice da próxima)"""
+        return self.base + len(self.resident)
+
+    def get_resident_count(self):
+        return len(self.resident)
+
+    def get_max_resident(self):
+        return self.max_resident
+
+    def is_exhausted(self):
+        return self.exhausted
+
+
+class ProgramStream:
+    """Fluxo dinâmico de instâncias de um programa estático (laços).
+
+    O Program (ProgramParser) fica intacto; cada vez que o fetch passa por
+    uma instrução é criada uma instância nova (Instruction com os tempos
+    zerados), com ID igual à posição no fluxo e static_index apontando para
+    a instrução de origem. O fetch segue fetch_pc, que o simulador desvia
+    com redirect (predição no issue, recuperação no commit), então um branch
+    para trás executa o corpo do laço de novo. Como no InstructionStream, só
+    a janela entre a cabeça do ROB e o fetch fica em memória: um laço de
+    milhões de iterações ocupa o mesmo espaço que uma.
+    """
+
+    def __init__(self, program, latencies=None):
+        self.program = program
+        self.register_names = program.register_names
+        self.latencies = dict(DEFAULT_LATENCIES)
+        self.latencies.update(latencies or {})
+        self.rewind()
+
+    def rewind(self):
+        """Volta ao início do programa (reset da simulação)"""
+        self.fetch_pc = 0  # Índice no programa da próxima instância
+        self.base = 0  # Índice (no fluxo) da instância mais antiga ainda em memória
+        self.resident = deque()
+        self.positions = {}  # Instância -> índice no fluxo (só as da janela)
+        self.max_resident = 0
+
+    def close(self):
+        self.resident.clear()
+        self.positions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def find_target(self, target_id):
+        """Índice no programa do alvo de um branch (-1 se não existe; os IDs são as posições)"""
+        return target_id if 0 <= target_id < len(self.program) else -1
+
+    def fetch_next(self):
+        """Cria a instância da instrução em fetch_pc e avança o fetch em sequência"""
+        op, dest, src1, src2, target_id, operands = self.program.records[self.fetch_pc]
+        instr = Instruction(self.get_fetched_count(), op, dest, src1, src2, self.latencies[op])
+        if op in BRANCH_OPS:
+            instr.set_branch_target_id(target_id)
+        instr.set_operands(*operands)
+        instr.set_static_index(self.fetch_pc)
+        self.fetch_pc += 1
+        self.positions[instr] = self.get_fetched_count()
+        self.resident.append(instr)
+        return instr
+
+    def fetch_until(self, index):
+        """Busca instâncias até a de índice index existir; retorna quantas foram criadas.
+
+        Sem leitura antecipada: o caminho depois de um branch só é conhecido
+        quando ele é emitido (redirect).
+        """
+        fetched = 0
+        while self.get_fetched_count() <= index and not self.is_exhausted():
+            self.fetch_next()
+            fetched += 1
+        self.max_resident = max(self.max_resident, len(self.resident))
+        return fetched
+
+    def redirect(self, index, pc):
+        """Descarta as instâncias depois de index e continua o fetch em pc; retorna quantas saíram"""
+        dropped = 0
+        while self.get_fetched_count() > index + 1 and self.resident:
+            del self.positions[self.resident.pop()]
+            dropped += 1
+        self.fetch_pc = pc
+        return dropped
+
+    def evict_until(self, index):
+        """Libera as instâncias abaixo de index que já foram comitadas ou descartadas"""
+        resident = self.resident
+        while self.base < index and resident:
+            instr = resident[0]
+            if instr.get_commit_cycle() == -1 and not instr.is_squashed():
+                break
+            resident.popleft()
+            del self.positions[instr]
+            self.base += 1
+
+    def __getitem__(self, index):
+        if index < self.base:
+            raise IndexError(f"Instância {index} já saiu da janela do fluxo")
+        return self.resident[index - self.base]
+
+    def __iter__(self):
+        return iter(self.resident)
+
+    def copy(self):
+        """Instâncias da janela atual (como list.copy() no modo lista)"""
+        return list(self.resident)
+
+    # Getters
+    def get_program(self):
+        return self.program
+
+    def get_fetch_pc(self):
+        return self.fetch_pc
+
+    def get_base(self):
+        return self.base
+
+    def get_fetched_count(self):
+        """Instâncias criadas até agora (índice da próxima)"""
+        return self.base + len(self.resident)
+
+    def get_resident_count(self):
+        return len(self.resident)
+
+    def get_max_resident(self):
+        return self.max_resident
+
+    def is_exhausted(self):
+        """O fetch saiu do fim do programa (um redirect pode trazê-lo de volta)"""
+        return not 0 <= self.fetch_pc < len(self.program)
@@ -0,0 +1,61 @@
+from collections import deque
+
+from Instruction import Op
+
+
+class LoadStoreQueue:
+    """Fila de loads/stores em voo, em ordem de programa.
+
+    Cada LD/ST entra no issue e sai no commit (ou quando é descartado e
+    chega à frente). O endereço e o dado de cada operação ficam na RS
+    (campo A e Vk/Qk dos stores), então a fila só guarda a ordem e é
+    reconstruída a partir do ROB depois de Step Back/seek.
+    """
+
+    def __init__(self):
+        self.entries = deque()
+
+    def clear(self):
+        self.entries.clear()
+
+    def append(self, instruction):
+        self.entries.append(instruction)
+
+    def retire(self):
+        """Remove da frente as operações comitadas ou descartadas"""
+        entries = self.entries
+        while entries and (entries[0].get_commit_cycle() != -1 or entries[0].is_squashed()):
+            entries.popleft()
+
+    def remove(self, instructions):
+        """Tira da fila as operações desfeitas (recuperação de desvio ou replay)"""
+        self.entries = deque(instr for instr in self.entries if instr not in instructions)
+
+    def older_stores(self, load):
+        """Stores não descartados mais antigos que o load, do mais novo para o mais antigo"""
+        stores = []
+        for instr in self.entries:
+            if instr is load:
+                break
+            if instr.get_op() == Op.ST and not instr.is_squashed():
+                stores.append(instr)
+        stores.reverse()
+        return stores
+
+    def younger_loads(self, store):
+        """Loads não descartados mais novos que o store, em ordem de programa"""
+        loads = []
+        found = False
+        for instr in self.entries:
+            if found:
+                if instr.get_op() == Op.LD and not instr.is_squashed():
+                    loads.append(instr)
+            elif instr is store:
+                found = True
+        return loads
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,213 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from Instruction import Instruction, Op
+
+
+# Latências padrão (as da versão web, que não usa as latências da configuração)
+DEFAULT_LATENCIES = {
+    Op.ADD: 2, Op.SUB: 2, Op.MUL: 10, Op.DIV: 40,
+    Op.LD: 2, Op.ST: 2, Op.BEQ: 1, Op.BNE: 1,
+}
+BRANCH_OPS = (Op.BEQ, Op.BNE)
+PARSE_CACHE_SIZE = 64  # Programas parseados guardados (por hash do texto)
+ARCHITECTURAL_REGISTERS = 32  # R0-R31 ocupam os primeiros índices do RegisterFile
+
+# Formato: OP DEST SRC1 SRC2 (BEQ/BNE: OP ALVO SRC1 SRC2). '#' inicia comentário
+# e campos depois do quarto são ignorados.
+_FIELD = r'([^\s#]+)'
+_SPACE = r'[^\S\n]+'
+LINE_PATTERN = re.compile(r'[^\S\n]*' + _SPACE.join([_FIELD] * 4))
+PROGRAM_PATTERN = re.compile(r'^' + LINE_PATTERN.pattern, re.MULTILINE)
+
+
+class RegisterNames:
+    """Tabela nome -> índice com a mesma numeração do RegisterFile.
+
+    Usada na decodificação do programa, que não depende do RegisterFile
+    (a versão desktop tem o seu próprio). decode_source/decode_register_operands
+    aceitam esta tabela ou um RegisterFile.
+    """
+
+    def __init__(self):
+        self.names = [f"R{i}" for i in range(ARCHITECTURAL_REGISTERS)]
+        self.indices = {name: i for i, name in enumerate(self.names)}
+
+    def add_register(self, name):
+        index = self.indices.get(name)
+        if index is None:
+            index = self.indices[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def get_index(self, register_name):
+        return self.indices.get(register_name)
+
+    def get_names(self):
+        return self.names
+
+
+class ParseError(ValueError):
+    """Linha inválida no modo estrito (versão desktop)"""
+
+    def __init__(self, line_number, message):
+        super().__init__(f"Linha {line_number}: {message}")
+        self.line_number = line_number
+        self.message = message
+
+
+def decode_fields(op_str, first, src1, src2, uppercase=False):
+    """(op, dest, src1, src2, alvo) de uma linha já separada em campos.
+
+    Levanta KeyError (operação inválida) ou ValueError (alvo do branch não numérico).
+    """
+    op = Op[op_str.upper()]
+    if uppercase:
+        first, src1, src2 = first.upper(), src1.upper(), src2.upper()
+    if op in BRANCH_OPS:
+        return op, None, src1, src2, int(first)
+    return op, first, src1, src2, -1
+
+
+def decode_source(name, register_file):
+    """(índice no Register File ou -1, valor imediato) de um operando fonte.
+
+    O valor imediato é o que o issue usa enquanto o registrador não existe:
+    o próprio número, ou 0.0. Um nome numérico só ganha índice se já foi
+    destino de alguma instrução anterior (o issue é em ordem de programa).
+    """
+    if name is None or name == '0':
+        return -1, 0.0
+    try:
+        value = float(name)
+    except ValueError:
+        value = None
+    index = register_file.get_index(name)
+    if index is None:
+        if value is not None:
+            return -1, value
+        index = register_file.add_register(name)
+    return index, value if value is not None else 0.0
+
+
+def decode_register_operands(dest, src1, src2, register_file):
+    """(índice do destino, índice e imediato de src1, índice e imediato de src2)"""
+    src1_operand = decode_source(src1, register_file)
+    src2_operand = decode_source(src2, register_file)
+    dest_index = register_file.add_register(dest) if dest is not None and dest != '0' else -1
+    return (dest_index,) + src1_operand + src2_operand
+
+
+def decode_operands(instr, register_file):
+    """Classifica os operandos da instrução (registrador ou imediato) uma única vez, no carregamento"""
+    instr.set_operands(*decode_register_operands(instr.get_dest(), instr.get_src1(), instr.get_src2(),
+                                                 register_file))
+
+
+def parse_line(line, instr_id, latencies=None):
+    """Instrução de uma linha do programa, ou None se a linha não é uma instrução válida"""
+    match = LINE_PATTERN.match(line)
+    if match is None:
+        return None
+    try:
+        op, dest, src1, src2, target_id = decode_fields(*match.groups())
+    except (KeyError, ValueError):
+        return None
+    instr = Instruction(instr_id, op, dest, src1, src2, (latencies or DEFAULT_LATENCIES)[op])
+    if op in BRANCH_OPS:
+        instr.set_branch_target_id(target_id)
+    return instr
+
+
+class Program:
+    """Programa parseado e pré-decodificado (imutável, pode ser reutilizado pelo cache).
+
+    Cada registro é (op, dest, src1, src2, alvo, operandos decodificados);
+    register_names é a tabela de registradores que os índices usam.
+    """
+
+    def __init__(self, records, register_names):
+        self.records = records
+        self.register_names = register_names
+
+    def __len__(self):
+        return len(self.records)
+
+    def build_instructions(self, latencies=None):
+        """Instruções novas (estado inicial) com os operandos já decodificados"""
+        latencies = latencies or DEFAULT_LATENCIES
+        instructions = []
+        for instr_id, (op, dest, src1, src2, target_id, operands) in enumerate(self.records):
+            instr = Instruction(instr_id, op, dest, src1, src2, latencies[op])
+            if op in BRANCH_OPS:
+                instr.set_branch_target_id(target_id)
+            instr.set_operands(*operands)
+            instructions.append(instr)
+        return instructions
+
+
+def compile_program(text, strict=False, uppercase=False):
+    """Parse + decodificação de operandos (sem cache).
+
+    Modo tolerante (web): linhas inválidas são ignoradas. Modo estrito
+    (desktop): a primeira linha inválida levanta ParseError.
+    """
+    if strict:
+        fields = []
+        for line_number, line in enumerate(text.strip().split('\n'), 1):
+            code = line.split('#', 1)[0]
+            if not code.strip():
+                continue
+            match = LINE_PATTERN.match(code)
+            if match is None:
+                raise ParseError(line_number, f"'{line.strip()}'\nFormato inválido. Use: OP DEST SRC1 SRC2")
+            try:
+                fields.append(decode_fields(*match.groups(), uppercase=uppercase))
+            except KeyError:
+                raise ParseError(line_number, f"Operação '{match.group(1).upper()}' inválida.\n"
+                                              f"Operações válidas: ADD, SUB, MUL, DIV, LD, ST, BEQ, BNE")
+            except ValueError:
+                raise ParseError(line_number, "ID do alvo do branch deve ser um número.")
+    else:
+        fields = []
+        for match in PROGRAM_PATTERN.finditer(text):
+            try:
+                fields.append(decode_fields(*match.groups(), uppercase=uppercase))
+            except (KeyError, ValueError):
+                continue
+
+    # Decodifica os operandos na ordem do programa, como o carregamento no simulador
+    register_names = RegisterNames()
+    records = []
+    for op, dest, src1, src2, target_id in fields:
+        operands = decode_register_operands(dest, src1, src2, register_names)
+        records.append((op, dest, src1, src2, target_id, operands))
+    return Program(tuple(records), tuple(register_names.get_names()))
+
+
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def parse_program(text, strict=False, uppercase=False):
+    """Programa parseado, reaproveitado do cache quando o mesmo texto já foi visto"""
+    key = (hashlib.sha1(text.encode('utf-8', errors='surrogatepass')).digest(), strict, uppercase)
+    with _parse_cache_lock:
+        program = _parse_cache.get(key)
+        if program is not None:
+            _parse_cache.move_to_end(key)
+            return program
+
+    program = compile_program(text, strict, uppercase)
+    with _parse_cache_lock:
+        _parse_cache[key] = program
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return program
+
+
+def parse_instructions(text, latencies=None, strict=False, uppercase=False):
+    """Lista de instruções do texto do programa (atalho para parse_program + build_instructions)"""
+    return parse_program(text, strict, uppercase).build_instructions(latencies)
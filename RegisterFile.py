@@ -17,25 +17,96 @@ class RegisterStatus:
 
 
 class RegisterFile:
-    def __init__(self):
-        self.registers = {}
+    """Register File + RAT em arrays planos indexados pelo número do registrador.
+
+    Cada registrador tem um índice fixo: values[i] e producers[i] guardam o
+    valor e a tag da RS produtora. R0-R31 existem desde o início; outros nomes
+    (F0, ...) recebem um índice quando o programa é carregado, mas só passam a
+    existir (defined) quando alguma instrução escreve neles. 'order' lista os
+    registradores existentes na ordem em que foram criados. committed_values
+    guarda o último valor comitado (estado arquitetural), usado para desfazer
+    as escritas do caminho errado quando há preditor de desvio.
+    """
+
+    ARCHITECTURAL_REGISTERS = 32
+
+    def __init__(self, names=None):
+        self.names = []
+        self.indices = {}  # Nome -> índice
+        self.values = []
+        self.producers = []
+        self.defined = []
+        self.committed_values = []
         # Inicializa 32 registradores (R0-R31) - Padrão MIPS
         # R0 é sempre zero (convenção MIPS), mas por simplicidade permitimos escrita aqui
-        for i in range(32):
-            self.registers[f"R{i}"] = RegisterStatus(0.0, None)  # Valor 0.0, sem produtor
+        for i in range(self.ARCHITECTURAL_REGISTERS):
+            self.add_register(f"R{i}")
+        for name in names or ():
+            self.add_register(name)
+        self.reset()
+
+    def reset(self):
+        """Volta ao estado inicial: R0-R31 com valor 0.0 e sem produtor, os demais inexistentes"""
+        count = len(self.names)
+        architectural = min(count, self.ARCHITECTURAL_REGISTERS)
+        self.values[:] = [0.0] * count
+        self.producers[:] = [None] * count
+        self.committed_values[:] = [0.0] * count
+        self.defined[:] = [i < architectural for i in range(count)]
+        self.order = list(range(architectural))
+
+    def add_register(self, name):
+        """Índice do registrador (reserva um novo, ainda inexistente, se o nome é novo)"""
+        index = self.indices.get(name)
+        if index is None:
+            index = len(self.names)
+            self.indices[name] = index
+            self.names.append(name)
+            self.values.append(0.0)
+            self.producers.append(None)
+            self.committed_values.append(0.0)
+            self.defined.append(False)
+        return index
+
+    def get_index(self, register_name):
+        """Índice do registrador, ou None se o nome não tem índice"""
+        return self.indices.get(register_name)
+
+    def set_register(self, index, value, producer_tag):
+        """Atualiza valor e produtor (cria o registrador se ele ainda não existe)"""
+        if not self.defined[index]:
+            self.defined[index] = True
+            self.order = self.order + [index]  # Lista nova: o journal guarda a anterior
+        self.values[index] = value
+        self.producers[index] = producer_tag
+
+    def capture_state(self):
+        """Cópia do estado (para checkpoints): só cópias de arrays"""
+        return self.values[:], self.producers[:], self.defined[:], self.order[:], self.committed_values[:]
+
+    def restore_state(self, state):
+        """Restaura um estado de capture_state (os arrays são atualizados no lugar)"""
+        values, producers, defined, order, committed_values = state
+        self.values[:] = values
+        self.committed_values[:] = committed_values
+        self.producers[:] = producers
+        self.defined[:] = defined
+        self.order = list(order)
 
     def get_register_status(self, register_name):
-        return self.registers.get(register_name)
+        """Cópia do estado do registrador (RegisterStatus), ou None se ele não existe"""
+        index = self.indices.get(register_name)
+        if index is None or not self.defined[index]:
+            return None
+        return RegisterStatus(self.values[index], self.producers[index])
 
     def update_register_status(self, register_name, value, producer_tag):
-        if register_name not in self.registers:
-            # Adiciona se não existe (útil se você usar outros registradores)
-            self.registers[register_name] = RegisterStatus(value, producer_tag)
-        else:
-            status = self.registers[register_name]
-            status.set_value(value)
-            status.set_producer_tag(producer_tag)
+        # Adiciona se não existe (útil se você usar outros registradores)
+        self.set_register(self.add_register(register_name), value, producer_tag)
+
+    def get_names(self):
+        return self.names
 
     def get_registers(self):
-        """Getter para a GUI acessar os dados do Register File"""
-        return self.registers.copy()  # Retorna uma cópia
+        """Getter para a GUI acessar os dados do Register File (cópias, na ordem de criação)"""
+        return {self.names[i]: RegisterStatus(self.values[i], self.producers[i]) for i in self.order}
@@ -0,0 +1,67 @@
+class ReorderBuffer:
+    """Reorder Buffer (ROB) circular com número fixo de entradas.
+
+    Cada entrada guarda o índice (no programa) de uma instrução emitida.
+    As instruções entram no issue (cauda) em ordem de programa e saem no
+    commit (cabeça). Instruções descartadas continuam ocupando a entrada
+    até chegarem à cabeça, onde são removidas sem commit.
+    """
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("O ROB precisa de pelo menos 1 entrada")
+        self.size = size
+        self.entries = [None] * size
+        self.head = 0
+        self.count = 0
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.head = 0
+        self.count = 0
+
+    def is_full(self):
+        return self.count == self.size
+
+    def is_empty(self):
+        return self.count == 0
+
+    def push(self, instruction_index):
+        """Insere na cauda; retorna o índice da entrada ocupada"""
+        if self.is_full():
+            raise IndexError("ROB cheio")
+        slot = (self.head + self.count) % self.size
+        self.entries[slot] = instruction_index
+        self.count += 1
+        return slot
+
+    def truncate(self, count):
+        """Remove entradas da cauda até sobrarem count (recuperação de desvio mal previsto)"""
+        while self.count > count:
+            self.entries[(self.head + self.count - 1) % self.size] = None
+            self.count -= 1
+
+    def peek(self):
+        """Índice da instrução na cabeça (a mais antiga), ou None se vazio"""
+        if self.count == 0:
+            return None
+        return self.entries[self.head]
+
+    def pop(self):
+        """Remove e retorna o índice da instrução da cabeça"""
+        instruction_index = self.entries[self.head]
+        self.entries[self.head] = None
+        self.head = (self.head + 1) % self.size
+        self.count -= 1
+        return instruction_index
+
+    # Getters para a GUI
+    def get_size(self):
+        return self.size
+
+    def get_count(self):
+        return self.count
+
+    def get_entries(self):
+        """Índices das instruções no ROB, da cabeça para a cauda"""
+        return [self.entries[(self.head + i) % self.size] for i in range(self.count)]
@@ -1,4 +1,9 @@
 class ReservationStation:
+    __slots__ = ('name', 'busy', 'instruction', 'op', 'Qj', 'Vj', 'Qk', 'Vk', 'result', 'A')
+
+    # Campos que mudam durante a simulação (usados pelo journal de Step Back)
+    STATE_FIELDS = ('busy', 'instruction', 'op', 'Qj', 'Vj', 'Qk', 'Vk', 'result', 'A')
+
     def __init__(self, name):
         self.name = name
         self.busy = False
@@ -14,6 +19,7 @@ class ReservationStation:
         self.Qk = Qk
         self.Vk = Vk
         self.result = None  # Limpa o resultado anterior
+        self.A = None
 
     def free(self):
         """Libera esta Reservation Station"""
@@ -25,6 +31,7 @@ class ReservationStation:
         self.Qk = None
         self.Vk = None
         self.result = None
+        self.A = None  # Loads/stores: deslocamento e depois endereço efetivo (modelo de memória)
 
     def is_ready_to_execute(self):
         """Verifica se a RS está pronta para executar (operandos disponíveis)"""
@@ -59,6 +66,9 @@ class ReservationStation:
     def get_instruction(self):
         return self.instruction
 
+    def get_A(self):
+        return self.A
+
     # Setters
     def set_Vj(self, vj):
         """Valor recebido, Qj limpo"""
@@ -73,6 +83,9 @@ class ReservationStation:
     def set_result(self, result):
         self.result = result
 
+    def set_A(self, A):
+        self.A = A
+
     def set_Qj(self, Qj):
         """Usado para redefinir Qj se a instrução produtora é descartada"""
         self.Qj = Qj
@@ -0,0 +1,395 @@
+import json
+import mmap
+import struct
+import zlib
+
+import numpy as np
+
+from Instruction import Instruction, Op
+from ReservationStation import ReservationStation
+from RegisterFile import RegisterFile
+from ReorderBuffer import ReorderBuffer
+
+
+# Formato do arquivo: MAGIC, versão e tamanho do cabeçalho (uint32 little-endian),
+# cabeçalho JSON e depois as colunas, cada uma alinhada em ALIGNMENT bytes
+MAGIC = b'TOMTRACE'
+VERSION = 1
+ALIGNMENT = 64
+
+# Tipos de evento (coluna ev_kind)
+KIND_INSTRUCTION = 0
+KIND_STATION = 1
+KIND_REGISTER = 2
+REGISTER_FIELDS = ('values', 'producers', 'defined')  # Arrays do RegisterFile
+
+OPS = list(Op)
+
+# Colunas de cada tabela, com o dtype gravado no arquivo
+INSTRUCTION_COLUMNS = {
+    'id': np.int32, 'op': np.uint8, 'dest': np.int32, 'src1': np.int32, 'src2': np.int32,
+    'latency': np.int32, 'branch_target': np.int32,
+    # Tempos finais de cada instrução (-1 = não aconteceu) e flag de descarte
+    'issue': np.int32, 'exec_start': np.int32, 'exec_end': np.int32,
+    'write': np.int32, 'commit': np.int32, 'squashed': np.uint8,
+}
+EVENT_COLUMNS = {
+    'ev_cycle': np.int32, 'ev_kind': np.uint8, 'ev_index': np.int32,
+    'ev_field': np.uint8, 'ev_value': np.float64, 'ev_null': np.uint8,
+}
+CYCLE_COLUMNS = {
+    'cycle_bubbles': np.int32, 'cycle_pc': np.int32, 'cycle_squashed': np.int32,
+    'cdb_offsets': np.int64, 'cdb_tag': np.int32, 'cdb_value': np.float64,
+}
+
+
+class TraceRecorder:
+    """Grava a execução de um simulador num trace binário colunar.
+
+    Em vez de copiar o estado a cada ciclo, aproveita o journal de desfazer:
+    cada campo que o ciclo alterou (instrução, RS ou registrador) vira um
+    evento (ciclo, tipo, índice, campo, valor). O journal é esvaziado a cada
+    ciclo, então o Step Back fica indisponível enquanto a gravação dura.
+    """
+
+    def __init__(self, simulator):
+        if simulator.get_current_clock() != 0:
+            raise ValueError("A gravação precisa começar no ciclo 0")
+        self.simulator = simulator
+        simulator.set_history_enabled(True)
+
+        self.instructions = simulator.get_all_instructions()
+        self.instruction_index = {instr: i for i, instr in enumerate(self.instructions)}
+        self.stations = simulator.get_all_reservation_stations()
+        self.station_index = {rs: i for i, rs in enumerate(self.stations)}
+
+        self.strings = []
+        self.string_index = {}
+
+        self.events = {name: [] for name in EVENT_COLUMNS}
+        self.cycles = {name: [] for name in CYCLE_COLUMNS}
+        self.cycles['cdb_offsets'].append(0)
+        self.record_cycle()
+
+    def intern(self, text):
+        """Índice do texto na tabela de strings (None = -1)"""
+        if text is None:
+            return -1
+        index = self.string_index.get(text)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(text)
+            self.string_index[text] = index
+        return index
+
+    def encode(self, value):
+        """(valor numérico, é None?) para a coluna ev_value"""
+        if value is None:
+            return 0.0, 1
+        if isinstance(value, Instruction):
+            return float(self.instruction_index[value]), 0
+        if isinstance(value, Op):
+            return float(OPS.index(value)), 0
+        if isinstance(value, str):
+            return float(self.intern(value)), 0
+        return float(value), 0
+
+    def add_event(self, cycle, kind, index, field, value):
+        encoded, is_null = self.encode(value)
+        events = self.events
+        events['ev_cycle'].append(cycle)
+        events['ev_kind'].append(kind)
+        events['ev_index'].append(index)
+        events['ev_field'].append(field)
+        events['ev_value'].append(encoded)
+        events['ev_null'].append(is_null)
+
+    def record_cycle(self):
+        """Registra o ciclo atual do simulador (chamar depois de cada next_cycle)"""
+        simulator = self.simulator
+        cycle = simulator.get_current_clock()
+        journal = simulator.journal
+        register_file = simulator.get_register_file()
+        register_arrays = {id(getattr(register_file, name)): field for field, name in enumerate(REGISTER_FIELDS)}
+
+        # Cada (objeto, campo) alterado gera um evento com o valor atual
+        seen = set()
+        for entry in journal.cycles:
+            for target, key, _, is_item in entry:
+                if (id(target), key) in seen:
+                    continue
+                seen.add((id(target), key))
+                if is_item:
+                    # Posição de um array do Register File (key = índice do registrador)
+                    field = register_arrays.get(id(target))
+                    if field is not None:
+                        self.add_event(cycle, KIND_REGISTER, key, field, target[key])
+                elif isinstance(target, Instruction):
+                    self.add_event(cycle, KIND_INSTRUCTION, self.instruction_index[target],
+                                   Instruction.STATE_FIELDS.index(key), getattr(target, key))
+                elif isinstance(target, ReservationStation):
+                    self.add_event(cycle, KIND_STATION, self.station_index[target],
+                                   ReservationStation.STATE_FIELDS.index(key), getattr(target, key))
+        journal.clear()
+
+        cycles = self.cycles
+        cycles['cycle_bubbles'].append(simulator.get_bubble_cycles())
+        cycles['cycle_pc'].append(simulator.program_counter)
+        cycles['cycle_squashed'].append(simulator.get_total_squashed())
+        for tag, value in simulator.get_cdb_buses():
+            cycles['cdb_tag'].append(self.intern(tag))
+            cycles['cdb_value'].append(float(value) if value is not None else float('nan'))
+        cycles['cdb_offsets'].append(len(cycles['cdb_tag']))
+
+    def run(self, max_cycles=None):
+        """Simula até o fim (ou max_cycles) gravando cada ciclo"""
+        simulator = self.simulator
+        while not simulator.is_simulation_finished():
+            if max_cycles is not None and simulator.get_current_clock() >= max_cycles:
+                break
+            simulator.next_cycle()
+            self.record_cycle()
+        return self
+
+    def save(self, path, compress=False):
+        """Grava o trace; compress=True comprime cada coluna (zlib, sem mmap na leitura)"""
+        instructions = self.instructions
+        columns = {
+            'id': [instr.get_id() for instr in instructions],
+            'op': [OPS.index(instr.get_op()) for instr in instructions],
+            'dest': [self.intern(instr.get_dest()) for instr in instructions],
+            'src1': [self.intern(instr.get_src1()) for instr in instructions],
+            'src2': [self.intern(instr.get_src2()) for instr in instructions],
+            'latency': [instr.get_original_latency() for instr in instructions],
+            'branch_target': [instr.get_branch_target_id() for instr in instructions],
+            'issue': [instr.get_issue_cycle() for instr in instructions],
+            'exec_start': [instr.get_start_exec_cycle() for instr in instructions],
+            'exec_end': [instr.get_end_exec_cycle() for instr in instructions],
+            'write': [instr.get_write_result_cycle() for instr in instructions],
+            'commit': [instr.get_commit_cycle() for instr in instructions],
+            'squashed': [instr.is_squashed() for instr in instructions],
+        }
+        columns.update(self.events)
+        columns.update(self.cycles)
+        dtypes = dict(INSTRUCTION_COLUMNS, **EVENT_COLUMNS, **CYCLE_COLUMNS)
+
+        blobs = []
+        layout = {}
+        offset = 0
+        for name, values in columns.items():
+            data = np.asarray(values, dtype=dtypes[name]).tobytes()
+            stored = zlib.compress(data) if compress else data
+            layout[name] = {'dtype': np.dtype(dtypes[name]).str, 'offset': offset,
+                            'size': len(stored), 'count': len(values)}
+            padding = -len(stored) % ALIGNMENT
+            blobs.append(stored + b'\0' * padding)
+            offset += len(stored) + padding
+
+        simulator = self.simulator
+        header = json.dumps({
+            'version': VERSION,
+            'compression': 'zlib' if compress else None,
+            'cycles': len(self.cycles['cycle_pc']),
+            'strings': self.strings,
+            'stations': [rs.get_name() for rs in self.stations],
+            'station_groups': [len(simulator.get_rs_add()), len(simulator.get_rs_store()),
+                               len(simulator.get_rs_mult()), len(simulator.get_rs_branch())],
+            'rob_size': simulator.get_reorder_buffer().get_size(),
+            'registers': list(simulator.get_register_file().get_names()),
+            'columns': layout,
+        }).encode()
+        prefix_size = len(MAGIC) + 8 + len(header)
+        header += b' ' * (-prefix_size % ALIGNMENT)  # Colunas começam alinhadas
+
+        with open(path, 'wb') as trace_file:
+            trace_file.write(MAGIC + struct.pack('<II', VERSION, len(header)) + header)
+            for blob in blobs:
+                trace_file.write(blob)
+
+
+class TraceReader:
+    """Lê um trace de TraceRecorder e reconstrói o estado de qualquer ciclo.
+
+    Sem compressão as colunas são views NumPy sobre o arquivo mapeado em
+    memória (nada é copiado até ser usado).
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError("Arquivo não é um trace do simulador")
+        version, header_size = struct.unpack_from('<II', self.buffer, len(MAGIC))
+        if version != VERSION:
+            raise ValueError(f"Versão de trace não suportada: {version}")
+        data_start = len(MAGIC) + 8 + header_size
+        self.header = json.loads(bytes(self.buffer[len(MAGIC) + 8:data_start]))
+        self.strings = self.header['strings']
+
+        compressed = self.header['compression'] == 'zlib'
+        self.columns = {}
+        for name, info in self.header['columns'].items():
+            start = data_start + info['offset']
+            if compressed:
+                data = zlib.decompress(self.buffer[start:start + info['size']])
+                self.columns[name] = np.frombuffer(data, dtype=info['dtype'])
+            else:
+                self.columns[name] = np.frombuffer(self.buffer, dtype=info['dtype'],
+                                                   count=info['count'], offset=start)
+
+    def close(self):
+        self.columns = {}
+        self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_cycle_count(self):
+        """Número de ciclos gravados (inclui o ciclo 0)"""
+        return self.header['cycles']
+
+    def get_column(self, name):
+        """Coluna como array NumPy (ex.: 'issue', 'commit', 'squashed', 'ev_cycle')"""
+        return self.columns[name]
+
+    def string(self, index):
+        return self.strings[index] if index >= 0 else None
+
+    def last_values(self, kind, cycle):
+        """Último valor de cada (índice, campo) do tipo até o ciclo: [(índice, campo, valor, nulo)]"""
+        columns = self.columns
+        end = np.searchsorted(columns['ev_cycle'], cycle, side='right')
+        mask = columns['ev_kind'][:end] == kind
+        index = columns['ev_index'][:end][mask]
+        field = columns['ev_field'][:end][mask]
+        if len(index) == 0:
+            return []
+        # Eventos estão em ordem: o último de cada chave é o primeiro da lista invertida
+        keys = index.astype(np.int64) * 256 + field
+        _, first = np.unique(keys[::-1], return_index=True)
+        positions = np.sort(len(keys) - 1 - first)
+        values = columns['ev_value'][:end][mask][positions]
+        nulls = columns['ev_null'][:end][mask][positions]
+        return list(zip(index[positions].tolist(), field[positions].tolist(),
+                        values.tolist(), nulls.tolist()))
+
+    def get_cycle(self, cycle):
+        """Estado do ciclo como TraceCycleView (mesma interface de leitura do simulador)"""
+        cycle = max(0, min(cycle, self.get_cycle_count() - 1))
+        columns = self.columns
+
+        instructions = []
+        for i in range(len(columns['id'])):
+            instr = Instruction(int(columns['id'][i]), OPS[columns['op'][i]],
+                                self.string(int(columns['dest'][i])), self.string(int(columns['src1'][i])),
+                                self.string(int(columns['src2'][i])), int(columns['latency'][i]))
+            instr.set_branch_target_id(int(columns['branch_target'][i]))
+            instructions.append(instr)
+        for index, field, value, is_null in self.last_values(KIND_INSTRUCTION, cycle):
+            name = Instruction.STATE_FIELDS[field]
+            current = getattr(instructions[index], name)
+            setattr(instructions[index], name, None if is_null else type(current)(value))
+
+        stations = [ReservationStation(name) for name in self.header['stations']]
+        for index, field, value, is_null in self.last_values(KIND_STATION, cycle):
+            name = ReservationStation.STATE_FIELDS[field]
+            if is_null:
+                value = None
+            elif name == 'busy':
+                value = bool(value)
+            elif name == 'instruction':
+                value = instructions[int(value)]
+            elif name == 'op':
+                value = OPS[int(value)]
+            elif name in ('Qj', 'Qk'):
+                value = self.strings[int(value)]
+            setattr(stations[index], name, value)
+
+        register_file = RegisterFile(self.header['registers'])
+        for index, field, value, is_null in self.last_values(KIND_REGISTER, cycle):
+            if field == 0:
+                register_file.values[index] = None if is_null else value
+            elif field == 1:
+                register_file.producers[index] = None if is_null else self.strings[int(value)]
+            elif not register_file.defined[index]:
+                # Eventos em ordem: os registradores entram em 'order' na ordem de criação
+                register_file.defined[index] = True
+                register_file.order.append(index)
+
+        start, end = columns['cdb_offsets'][cycle], columns['cdb_offsets'][cycle + 1]
+        cdb_buses = [(self.string(int(tag)), None if np.isnan(value) else float(value))
+                     for tag, value in zip(columns['cdb_tag'][start:end], columns['cdb_value'][start:end])]
+
+        return TraceCycleView(cycle, instructions, stations, self.header['station_groups'], register_file,
+                              int(columns['cycle_bubbles'][cycle]), int(columns['cycle_pc'][cycle]),
+                              int(columns['cycle_squashed'][cycle]), cdb_buses, self.header['rob_size'])
+
+
+class TraceCycleView:
+    """Estado reconstruído de um ciclo, com os mesmos getters de leitura do simulador"""
+
+    def __init__(self, clock, instructions, stations, station_groups, register_file,
+                 bubble_cycles, program_counter, total_squashed, cdb_buses, rob_size):
+        self.current_clock = clock
+        self.all_instructions = instructions
+        self.all_stations = stations
+        add_count, store_count, mult_count, _ = station_groups
+        self.rs_add = stations[:add_count]
+        self.rs_store = stations[add_count:add_count + store_count]
+        self.rs_mult = stations[add_count + store_count:add_count + store_count + mult_count]
+        self.rs_branch = stations[add_count + store_count + mult_count:]
+        self.register_file = register_file
+        self.bubble_cycles = bubble_cycles
+        self.program_counter = program_counter
+        self.total_squashed_count = total_squashed
+        self.cdb_buses = cdb_buses
+
+        # ROB: instruções emitidas, não comitadas e não descartadas, em ordem
+        self.reorder_buffer = ReorderBuffer(rob_size)
+        for index, instr in enumerate(instructions):
+            if instr.get_issue_cycle() != -1 and instr.get_commit_cycle() == -1 and not instr.is_squashed():
+                self.reorder_buffer.push(index)
+
+    def get_current_clock(self):
+        return self.current_clock
+
+    def get_bubble_cycles(self):
+        return self.bubble_cycles
+
+    def get_all_instructions(self):
+        return self.all_instructions.copy()
+
+    def get_all_reservation_stations(self):
+        return self.all_stations
+
+    def get_rs_add(self):
+        return self.rs_add
+
+    def get_rs_store(self):
+        return self.rs_store
+
+    def get_rs_mult(self):
+        return self.rs_mult
+
+    def get_rs_branch(self):
+        return self.rs_branch
+
+    def get_register_file(self):
+        return self.register_file
+
+    def get_reorder_buffer(self):
+        return self.reorder_buffer
+
+    def get_cdb_buses(self):
+        return self.cdb_buses
+
+    def get_total_squashed(self):
+        return self.total_squashed_count
+
+    def get_current_speculative_count(self):
+        return sum(1 for instr in self.all_instructions
+                   if instr.is_speculative and not instr.is_squashed() and instr.get_commit_cycle() == -1)
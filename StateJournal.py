@@ -0,0 +1,70 @@
+_MISSING = object()  # Marca chaves que não existiam antes da alteração
+
+
+class StateJournal:
+    """Journal de desfazer (undo) usado pelo Step Back.
+
+    Em vez de copiar todo o estado a cada ciclo, guarda apenas os campos
+    que cada fase altera: (objeto, atributo, valor antigo). Voltar um ciclo
+    é reaplicar esses valores antigos na ordem inversa.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.cycles = []  # Uma lista de registros de desfazer por ciclo
+
+    def is_enabled(self):
+        return self.enabled
+
+    def set_enabled(self, enabled):
+        """Liga/desliga o histórico (desligado = execução em lote, sem custo)"""
+        self.enabled = enabled
+        if not enabled:
+            self.clear()
+
+    def clear(self):
+        self.cycles = []
+
+    def begin_cycle(self):
+        """Abre uma nova entrada no journal para o ciclo que vai começar"""
+        if self.enabled:
+            self.cycles.append([])
+
+    def record(self, obj, *attrs):
+        """Guarda o valor atual dos atributos antes de serem alterados"""
+        if self.enabled and self.cycles:
+            entry = self.cycles[-1]
+            for attr in attrs:
+                entry.append((obj, attr, getattr(obj, attr), False))
+
+    def record_item(self, mapping, key):
+        """Guarda o valor atual de uma chave de dicionário (ou sua ausência)"""
+        if self.enabled and self.cycles:
+            self.cycles[-1].append((mapping, key, mapping.get(key, _MISSING), True))
+
+    def record_index(self, sequence, index):
+        """Guarda o valor atual de uma posição de lista (arrays do Register File)"""
+        if self.enabled and self.cycles:
+            self.cycles[-1].append((sequence, index, sequence[index], True))
+
+    def can_undo(self):
+        return len(self.cycles) > 0
+
+    def undo_cycle(self):
+        """Desfaz todas as alterações do último ciclo registrado"""
+        if not self.cycles:
+            return False
+
+        entry = self.cycles.pop()
+        for target, key, old_value, is_item in reversed(entry):
+            if is_item:
+                if old_value is _MISSING:
+                    target.pop(key, None)
+                else:
+                    target[key] = old_value
+            else:
+                setattr(target, key, old_value)
+        return True
+
+    def __len__(self):
+        return len(self.cycles)
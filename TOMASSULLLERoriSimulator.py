@@ -1,12 +1,42 @@
 from Instruction import Instruction, Op
 from ReservationStation import ReservationStation
 from RegisterFile import RegisterFile
-import copy
+from StateJournal import StateJournal
+from ReorderBuffer import ReorderBuffer
+from InstructionStream import ProgramStream
+from DataMemory import DataMemory, word_address
+from LoadStoreQueue import LoadStoreQueue
+from ProgramParser import BRANCH_OPS, decode_operands
+from collections import deque
+import heapq
+import itertools
 
 
 class TOMASSULLLERoriSimulator:
+    # Escalares do simulador que mudam a cada ciclo (journal e checkpoints)
+    STATE_FIELDS = ('current_clock', 'bubble_cycles', 'program_counter',
+                    'cdb_producer_tag', 'cdb_value', 'cdb_buses', 'total_squashed_count',
+                    'live_instruction_count', 'predicted_branch_count', 'mispredicted_branch_count',
+                    'mispredict_penalty_cycles', 'wasted_issue_slots', 'forwarded_load_count',
+                    'memory_replay_count', 'replay_penalty_cycles')
+
+    # Arbitragem dos CDBs: por classe de FU (ordem global das RSs) ou mais antiga primeiro
+    CDB_ARBITRATION_POLICIES = ('fu_class', 'oldest')
+
+    # Modelo de memória: 'none' (original: LD retorna o endereço e ST não escreve),
+    # 'conservative' (o load espera os endereços de todos os stores anteriores) ou
+    # 'speculative' (o load executa antes e é refeito no commit se um store anterior
+    # escreveu no mesmo endereço)
+    MEMORY_MODELS = ('none', 'conservative', 'speculative')
+
+    # Intervalo padrão dos checkpoints de seek quando o histórico está ligado
+    DEFAULT_CHECKPOINT_INTERVAL = 50
+
     def __init__(self, add_fu_count, store_fu_count, mult_fu_count, branch_fu_count,
-                 add_sub_latency, load_latency, store_latency, mult_latency, div_latency, branch_latency):
+                 add_sub_latency, load_latency, store_latency, mult_latency, div_latency, branch_latency,
+                 keep_history=True, checkpoint_interval=None, rob_size=None,
+                 issue_width=1, commit_width=1, cdb_count=1, cdb_arbitration='fu_class',
+                 branch_predictor=None, memory_model='none'):
         self.add_sub_latency = add_sub_latency
         self.load_latency = load_latency
         self.store_latency = store_latency
@@ -14,6 +44,31 @@ class TOMASSULLLERoriSimulator:
         self.div_latency = div_latency
         self.branch_latency = branch_latency
 
+        # Modo superescalar: instruções emitidas/comitadas por ciclo e número de CDBs
+        if issue_width < 1 or commit_width < 1 or cdb_count < 1:
+            raise ValueError("Larguras de issue/commit e número de CDBs devem ser pelo menos 1")
+        if cdb_arbitration not in self.CDB_ARBITRATION_POLICIES:
+            raise ValueError(f"Arbitragem de CDB inválida: {cdb_arbitration}")
+        self.issue_width = issue_width
+        self.commit_width = commit_width
+        self.cdb_count = cdb_count
+        self.cdb_arbitration = cdb_arbitration
+
+        # Preditor de desvio (BranchPredictor) usado no issue. None = modo original:
+        # o issue segue em sequência, os branches são sempre tomados e o descarte
+        # acontece no commit. Com preditor, os branches são avaliados por Vj/Vk.
+        self.branch_predictor = branch_predictor
+
+        # Memória de dados esparsa + fila de loads/stores (LD/ST em ordem de programa)
+        if memory_model not in self.MEMORY_MODELS:
+            raise ValueError(f"Modelo de memória inválido: {memory_model}")
+        self.memory_model = memory_model
+        self.data_memory_enabled = memory_model != 'none'
+        self.data_memory = DataMemory()
+        self.load_store_queue = LoadStoreQueue()
+        # Valores comitados dos registradores: necessários quando o caminho pode ser desfeito no commit
+        self.keeps_committed_values = branch_predictor is not None or memory_model == 'speculative'
+
         self.register_file = RegisterFile()
 
         self.rs_add = [ReservationStation(f"RS_ADD_{i + 1}") for i in range(add_fu_count)]
@@ -21,37 +76,141 @@ class TOMASSULLLERoriSimulator:
         self.rs_mult = [ReservationStation(f"RS_MULT_{i + 1}") for i in range(mult_fu_count)]
         self.rs_branch = [ReservationStation(f"RS_BRANCH_{i + 1}") for i in range(branch_fu_count)]
 
+        # Ordem global das RSs (também é a prioridade de escrita no CDB)
+        self.all_stations = self.rs_add + self.rs_store + self.rs_mult + self.rs_branch
+        self.station_order = {rs.get_name(): i for i, rs in enumerate(self.all_stations)}
+
+        # Escalonador por eventos: cada ciclo só toca as RSs cujo estado muda
+        self.consumers = {}  # Tag produtora (nome da RS) -> RSs esperando esse resultado no CDB
+        self.instruction_stations = {}  # Instrução em voo -> RS que ela ocupa (liberação sem varrer as RSs)
+        self.ready_stations = set()  # Operandos prontos, execução ainda não iniciada
+        self.executing_stations = []  # Heap (ciclo de término, ordem, seq, rs, instr)
+        self.finished_stations = []  # Heap (prioridade no CDB, seq, rs, instr) aguardando o CDB
+        self.schedule_seq = itertools.count()
+
         self.all_instructions = []
+        self.instruction_positions = {}  # Instrução -> índice no programa
+        self.instruction_indices = {}  # ID -> índice no programa (alvo dos branches)
+        self.instruction_stream = None  # InstructionStream (modo stream) ou None (lista)
+        self.program_stream = None  # ProgramStream (laços): o mesmo stream, com o fetch seguindo os branches
         self.cdb_producer_tag = None
         self.cdb_value = None
+        self.cdb_buses = []  # (tag, valor) publicados em cada CDB neste ciclo
 
         self.bubble_cycles = 0
         self.current_clock = 0
         self.program_counter = 0  # Índice da próxima instrução a ser emitida
 
+        # ROB circular com os índices das instruções emitidas e não comitadas.
+        # Sem tamanho explícito usa o total de RSs (cada instrução em voo ocupa uma RS até o commit).
+        self.reorder_buffer = ReorderBuffer(rob_size if rob_size is not None else len(self.all_stations))
+        # Instruções ainda vivas (nem comitadas nem descartadas)
+        self.live_instruction_count = 0
+
         # Contadores permanentes de métricas (nunca resetam durante a simulação)
         self.total_squashed_count = 0
         self.max_speculative_count = 0
-
-        # Histórico de estados para Step Back
-        self.state_history = []
+        self.predicted_branch_count = 0  # Branches comitados (com direção prevista no issue)
+        self.mispredicted_branch_count = 0
+        self.mispredict_penalty_cycles = 0  # Ciclos do issue do branch até a recuperação
+        self.wasted_issue_slots = 0  # Instruções emitidas e depois descartadas (caminho errado)
+        self.forwarded_load_count = 0  # Loads que receberam o valor de um store anterior
+        self.memory_replay_count = 0  # Loads refeitos por violação de ordem de memória
+        self.replay_penalty_cycles = 0  # Ciclos do issue do load até o replay
+
+        # Especulação incremental (derivada do estado das instruções, recalculada após Step Back/seek)
+        self.unresolved_branches = deque()  # Índices dos branches emitidos, não comitados e não descartados
+        self.squashed_branch = None  # (índice, ID) do branch descartado mais recente
+        self.speculative_dependents = {}  # ID do branch -> instruções marcadas como dependentes dele
+        self.speculative_count = 0  # Especulativas não comitadas e não descartadas
+
+        # Journal de desfazer para Step Back (keep_history=False desliga para execuções em lote)
+        self.journal = StateJournal(keep_history)
+
+        # Checkpoints compactos a cada K ciclos para seek(ciclo) (0 desliga). Sem
+        # intervalo explícito só ficam ligados junto com o histórico de Step Back
+        if checkpoint_interval is None:
+            checkpoint_interval = self.DEFAULT_CHECKPOINT_INTERVAL if keep_history else 0
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints = {}
+        self.committed_states = {}  # Instrução comitada -> estado final (fora dos checkpoints)
 
         self.reset_simulation_state()  # Garante um estado limpo
 
-    def set_instructions(self, instructions):
-        """Método para a GUI carregar as instruções"""
+    def set_instructions(self, instructions, register_names=None):
+        """Método para a GUI carregar as instruções.
+
+        register_names é a tabela de registradores de um Program já
+        decodificado (ProgramParser); sem ela os operandos são decodificados aqui.
+        """
+        self.instruction_stream = None
+        self.program_stream = None
+        self.register_file = RegisterFile(register_names)
+        if register_names is None:
+            for instr in instructions:
+                decode_operands(instr, self.register_file)
+        if self.data_memory_enabled:
+            for instr in instructions:
+                if instr.get_op() == Op.ST:
+                    self.store_address_operands(instr)  # Rejeita o programa antes de simular
         self.all_instructions = instructions
+        self.instruction_positions = {instr: i for i, instr in enumerate(instructions)}
+        self.instruction_indices = {}
+        for i, instr in enumerate(instructions):
+            self.instruction_indices.setdefault(instr.get_id(), i)  # ID repetido: vale a primeira
         self.reset_simulation_state()  # Reseta o estado quando novas instruções são carregadas
 
+    def set_instruction_stream(self, stream):
+        """Carrega as instruções de um InstructionStream (traces grandes, lidos sob demanda).
+
+        Só a janela entre a cabeça do ROB e o fetch fica em memória, por isso
+        o journal de Step Back e os checkpoints ficam desligados (seek para
+        trás re-simula desde o início).
+
+        Um ProgramStream executa um programa estático com laços: cada passagem
+        do fetch cria uma instância nova e os branches (inclusive para trás)
+        desviam o fetch. Exige preditor, já que no modo original todo branch é tomado.
+        """
+        program_stream = stream if isinstance(stream, ProgramStream) else None
+        if program_stream is not None and self.branch_predictor is None:
+            raise ValueError("Laços exigem um preditor de desvio (sem preditor todo branch é tomado)")
+        self.instruction_stream = stream
+        self.program_stream = program_stream
+        if program_stream is not None:
+            self.register_file = RegisterFile(program_stream.register_names)  # Programa já decodificado
+        else:
+            self.register_file = RegisterFile()  # Os operandos são decodificados à medida que são lidos
+        self.all_instructions = stream
+        self.instruction_positions = stream.positions
+        self.instruction_indices = {}  # No stream os IDs são as próprias posições
+        self.journal.set_enabled(False)
+        self.checkpoint_interval = 0
+        self.reset_simulation_state()
+
     def reset_simulation_state(self):
         self.current_clock = 0
         self.bubble_cycles = 0
         self.program_counter = 0
+        # No modo stream a contagem cresce à medida que as instruções são lidas
+        self.live_instruction_count = len(self.all_instructions) if self.instruction_stream is None else 0
         self.cdb_producer_tag = None
         self.cdb_value = None
-        self.state_history = []  # Limpa o histórico
+        self.cdb_buses = []
+        self.journal.clear()  # Limpa o histórico
+        self.checkpoints = {}
+        self.committed_states = {}
         self.total_squashed_count = 0  # Reseta contador de descartadas
         self.max_speculative_count = 0  # Reseta contador de especulativas
+        self.predicted_branch_count = 0
+        self.mispredicted_branch_count = 0
+        self.mispredict_penalty_cycles = 0
+        self.wasted_issue_slots = 0
+        self.forwarded_load_count = 0
+        self.memory_replay_count = 0
+        self.replay_penalty_cycles = 0
+        if self.branch_predictor is not None:
+            self.branch_predictor.reset()
+        self.data_memory.reset()
 
         # Limpa todas as RSs
         for rs in self.rs_add:
@@ -64,60 +223,256 @@ class TOMASSULLLERoriSimulator:
             rs.free()
 
         # Reseta o Register File
-        self.register_file = RegisterFile()
+        self.register_file.reset()
 
         # Reseta o estado das instruções
-        for instr in self.all_instructions:
-            instr.set_issue_cycle(-1)
-            instr.set_start_exec_cycle(-1)
-            instr.set_end_exec_cycle(-1)
-            instr.set_write_result_cycle(-1)
-            instr.set_commit_cycle(-1)
-            instr.set_current_latency(instr.get_original_latency())
-            instr.set_branch_taken(False)
-            instr.set_branch_resolved(False)
-            instr.set_squashed(False)
-            instr.clear_speculative()  # Limpa flag de especulação
+        if self.instruction_stream is not None:
+            self.instruction_stream.rewind()
+            self.instruction_positions = self.instruction_stream.positions
+        else:
+            for instr in self.all_instructions:
+                instr.reset()
+
+        self.rebuild_derived_state()
+        self.save_checkpoint()  # Checkpoint do ciclo 0
 
     def save_state(self):
-        """Salva o estado atual para permitir Step Back"""
-        state = {
-            'current_clock': self.current_clock,
-            'bubble_cycles': self.bubble_cycles,
-            'program_counter': self.program_counter,
-            'cdb_producer_tag': self.cdb_producer_tag,
-            'cdb_value': self.cdb_value,
-            'instructions': copy.deepcopy(self.all_instructions),
-            'rs_add': copy.deepcopy(self.rs_add),
-            'rs_store': copy.deepcopy(self.rs_store),
-            'rs_mult': copy.deepcopy(self.rs_mult),
-            'rs_branch': copy.deepcopy(self.rs_branch),
-            'register_file': copy.deepcopy(self.register_file)
-        }
-        self.state_history.append(state)
+        """Abre a entrada do journal do próximo ciclo (permite Step Back).
+
+        Só os escalares do simulador são salvos aqui; instruções, RSs e
+        registradores são registrados campo a campo pelas fases que os alteram.
+        """
+        self.journal.begin_cycle()
+        self.journal.record(self, *self.STATE_FIELDS)
 
     def restore_previous_state(self):
         """Restaura o estado anterior (Step Back)"""
-        if len(self.state_history) == 0:
-            return False  # Não há histórico
-
-        state = self.state_history.pop()
-        self.current_clock = state['current_clock']
-        self.bubble_cycles = state['bubble_cycles']
-        self.program_counter = state['program_counter']
-        self.cdb_producer_tag = state['cdb_producer_tag']
-        self.cdb_value = state['cdb_value']
-        self.all_instructions = state['instructions']
-        self.rs_add = state['rs_add']
-        self.rs_store = state['rs_store']
-        self.rs_mult = state['rs_mult']
-        self.rs_branch = state['rs_branch']
-        self.register_file = state['register_file']
-        return True
+        if self.journal.undo_cycle():
+            self.rebuild_derived_state()
+            return True
+        if self.checkpoints and self.current_clock > 0:
+            # Sem journal: volta pelo checkpoint mais próximo + re-simulação
+            self.seek(self.current_clock - 1)
+            return True
+        return False  # Não há histórico
 
     def can_step_back(self):
         """Verifica se é possível voltar um ciclo"""
-        return len(self.state_history) > 0
+        return self.journal.can_undo() or (bool(self.checkpoints) and self.current_clock > 0)
+
+    def capture_snapshot(self):
+        """Snapshot compacto do estado atual (tuplas só com os campos dinâmicos).
+
+        Só as instruções em voo e as descartadas são guardadas: as ainda não
+        emitidas estão no estado inicial e as comitadas não mudam mais, ficando
+        uma única vez em committed_states (o snapshot não cresce com o programa).
+        """
+        instructions = tuple(
+            (instr, tuple(getattr(instr, field) for field in Instruction.STATE_FIELDS))
+            for instr in self.all_instructions
+            if (instr.get_issue_cycle() != -1 and instr.get_commit_cycle() == -1) or instr.is_squashed()
+        )
+        stations = tuple(
+            tuple(getattr(rs, field) for field in ReservationStation.STATE_FIELDS)
+            for rs in self.get_all_reservation_stations()
+        )
+        registers = self.register_file.capture_state()
+        scalars = tuple(getattr(self, field) for field in self.STATE_FIELDS)
+        predictor = self.branch_predictor.capture_state() if self.branch_predictor is not None else None
+        memory = self.data_memory.capture_state() if self.data_memory_enabled else None
+        return scalars, instructions, stations, registers, predictor, memory
+
+    def restore_snapshot(self, snapshot):
+        """Restaura um snapshot criado por capture_snapshot"""
+        scalars, instructions, stations, registers, predictor, memory = snapshot
+
+        for field, value in zip(self.STATE_FIELDS, scalars):
+            setattr(self, field, value)
+
+        for instr in self.all_instructions:
+            instr.reset()
+        commit_field = Instruction.STATE_FIELDS.index('commit_cycle')
+        for instr, values in self.committed_states.items():
+            if values[commit_field] <= self.current_clock:  # Já comitada no ciclo do snapshot
+                for field, value in zip(Instruction.STATE_FIELDS, values):
+                    setattr(instr, field, value)
+        for instr, values in instructions:
+            for field, value in zip(Instruction.STATE_FIELDS, values):
+                setattr(instr, field, value)
+
+        for rs, values in zip(self.get_all_reservation_stations(), stations):
+            for field, value in zip(ReservationStation.STATE_FIELDS, values):
+                setattr(rs, field, value)
+
+        self.register_file.restore_state(registers)
+        if self.branch_predictor is not None:
+            self.branch_predictor.restore_state(predictor)
+        if memory is not None:
+            self.data_memory.restore_state(memory)
+
+        self.rebuild_derived_state()
+
+    def rebuild_derived_state(self):
+        """Recalcula o que é derivado do estado das instruções/RSs (após reset/Step Back/seek)"""
+        self.rebuild_scheduler()
+        self.rebuild_reorder_buffer()
+        self.rebuild_load_store_queue()
+        self.rebuild_speculation()
+
+    def rebuild_reorder_buffer(self):
+        """Reconstrói o ROB: instruções emitidas, não comitadas e não descartadas, em ordem"""
+        self.reorder_buffer.clear()
+        for index, instr in enumerate(self.all_instructions, self.get_instruction_base()):
+            if (instr.get_issue_cycle() != -1 and instr.get_commit_cycle() == -1 and
+                    not instr.is_squashed()):
+                self.reorder_buffer.push(index)
+
+    def rebuild_load_store_queue(self):
+        """Reconstrói a fila de loads/stores: LD/ST do ROB, em ordem"""
+        self.load_store_queue.clear()
+        if self.data_memory_enabled:
+            for index in self.reorder_buffer.get_entries():
+                instr = self.all_instructions[index]
+                if instr.get_op() in (Op.LD, Op.ST):
+                    self.load_store_queue.append(instr)
+
+    def rebuild_speculation(self):
+        """Reconstrói a pilha de branches pendentes, os dependentes e a contagem de especulativas"""
+        self.unresolved_branches = deque()
+        self.squashed_branch = None
+        self.speculative_dependents = {}
+        self.speculative_count = 0
+        for index, instr in enumerate(self.all_instructions, self.get_instruction_base()):
+            if instr.get_op() in BRANCH_OPS and instr.get_commit_cycle() == -1:
+                if instr.is_squashed():
+                    if self.branch_predictor is None:
+                        self.squashed_branch = (index, instr.get_id())
+                elif instr.get_issue_cycle() != -1:
+                    self.unresolved_branches.append(index)
+
+        pending_ids = {self.all_instructions[index].get_id() for index in self.unresolved_branches}
+        for instr in self.all_instructions:
+            if not instr.is_speculative:
+                continue
+            if instr.get_speculative_branch_id() in pending_ids:
+                self.speculative_dependents.setdefault(instr.get_speculative_branch_id(), []).append(instr)
+            if not instr.is_squashed() and instr.get_commit_cycle() == -1:
+                self.speculative_count += 1
+
+    def rebuild_scheduler(self):
+        """Recalcula as filas do escalonador a partir do estado das RSs (após reset/Step Back/seek)"""
+        self.consumers = {}
+        self.instruction_stations = {}
+        self.ready_stations = set()
+        self.executing_stations = []
+        self.finished_stations = []
+        for rs in self.all_stations:
+            if rs.is_busy():
+                self.instruction_stations[rs.get_instruction()] = rs
+                self.register_consumer(rs)
+                self.schedule_station(rs)
+
+    def schedule_station(self, rs):
+        """Coloca a RS na fila do escalonador correspondente ao estado da sua instrução"""
+        instr = rs.get_instruction()
+        order = self.station_order[rs.get_name()]
+        if instr.get_start_exec_cycle() == -1:
+            if self.is_station_ready(rs):
+                self.ready_stations.add(rs)
+        elif instr.get_end_exec_cycle() == -1:
+            # Latência <= 0 nunca termina (mesmo comportamento da contagem regressiva)
+            if instr.get_current_latency() > 0:
+                end_cycle = self.current_clock + instr.get_current_latency()
+                heapq.heappush(self.executing_stations,
+                               (end_cycle, order, next(self.schedule_seq), rs, instr))
+        elif instr.get_write_result_cycle() == -1:
+            if self.data_memory_enabled and rs.get_op() == Op.ST and rs.get_Qk() is not None:
+                return  # Store com o endereço pronto esperando o dado (volta quando ele chegar no CDB)
+            heapq.heappush(self.finished_stations,
+                           (self.cdb_priority(rs, instr), next(self.schedule_seq), rs, instr))
+
+    def is_station_ready(self, rs):
+        """Operandos prontos para iniciar a execução (o ST do modelo de memória só precisa da base)"""
+        if self.data_memory_enabled and rs.get_op() == Op.ST:
+            return rs.get_Qj() is None
+        return rs.is_ready_to_execute()
+
+    def wake_station(self, rs):
+        """RS recebeu um operando do CDB: entra na fila das prontas (ou, store com endereço pronto, na do CDB)"""
+        instr = rs.get_instruction()
+        if instr.get_start_exec_cycle() == -1:
+            if self.is_station_ready(rs):
+                self.ready_stations.add(rs)
+        elif instr.get_end_exec_cycle() != -1 and instr.get_write_result_cycle() == -1:
+            self.schedule_station(rs)
+
+    def cdb_priority(self, rs, instr):
+        """Chave de arbitragem do CDB (menor escreve primeiro)"""
+        if self.cdb_arbitration == 'oldest':
+            return self.instruction_positions[instr]
+        return self.station_order[rs.get_name()]
+
+    def unschedule_station(self, rs):
+        """Retira a RS das filas (as entradas dos heaps são descartadas ao serem lidas)"""
+        self.ready_stations.discard(rs)
+
+    def register_consumer(self, rs):
+        """Indexa a RS pelas tags que ela espera (Qj/Qk) para o wakeup do CDB"""
+        if rs.get_Qj() is not None:
+            self.consumers.setdefault(rs.get_Qj(), []).append(rs)
+        if rs.get_Qk() is not None and rs.get_Qk() != rs.get_Qj():
+            self.consumers.setdefault(rs.get_Qk(), []).append(rs)
+
+    def save_checkpoint(self):
+        """Guarda um checkpoint se o ciclo atual é múltiplo do intervalo K"""
+        if (self.checkpoint_interval > 0 and self.current_clock % self.checkpoint_interval == 0 and
+                self.current_clock not in self.checkpoints):
+            self.checkpoints[self.current_clock] = self.capture_snapshot()
+
+    def seek(self, cycle):
+        """Posiciona a simulação no ciclo indicado (para frente ou para trás).
+
+        Restaura o checkpoint mais próximo antes do ciclo pedido e re-simula
+        a partir dele. Retorna o ciclo alcançado (menor se a simulação terminar antes).
+        """
+        cycle = max(0, cycle)
+        nearest = max((c for c in self.checkpoints if c <= cycle), default=None)
+
+        if cycle < self.current_clock or (nearest is not None and nearest > self.current_clock):
+            if nearest is None:
+                # Checkpoints desligados: re-simula desde o início
+                self.reset_simulation_state()
+            else:
+                self.restore_snapshot(self.checkpoints[nearest])
+            self.journal.clear()  # O histórico anterior não vale mais a partir daqui
+
+        while self.current_clock < cycle and not self.is_simulation_finished():
+            self.next_cycle()
+        return self.current_clock
+
+    def set_history_enabled(self, enabled):
+        """Liga/desliga o histórico de Step Back (desligado para execuções em lote)"""
+        self.journal.set_enabled(enabled)
+
+    def update_register(self, index, value, producer_tag):
+        """Atualiza o Register File (RAT) registrando a alteração no journal"""
+        register_file = self.register_file
+        self.journal.record_index(register_file.values, index)
+        self.journal.record_index(register_file.producers, index)
+        if not register_file.defined[index]:
+            self.journal.record_index(register_file.defined, index)
+            self.journal.record(register_file, 'order')
+        register_file.set_register(index, value, producer_tag)
+
+    def read_operand(self, index, immediate):
+        """(Q, V) de um operando fonte pré-decodificado: tag produtora ou valor"""
+        register_file = self.register_file
+        if index >= 0 and register_file.defined[index]:
+            producer_tag = register_file.producers[index]
+            if producer_tag is not None:
+                return producer_tag, None
+            return None, register_file.values[index]
+        return None, immediate  # Não é (ainda) um registrador: imediato ou 0.0
 
     def next_cycle(self):
         """Método para avançar um ciclo"""
@@ -131,6 +486,7 @@ class TOMASSULLLERoriSimulator:
         self.write_result_to_cdb()
         self.execute_instructions()
         self.issue_from_instruction_queue()
+        self.save_checkpoint()
 
     def run_to_end(self):
         """Método para executar até o fim"""
@@ -139,20 +495,60 @@ class TOMASSULLLERoriSimulator:
 
     def is_simulation_finished(self):
         """Verifica se a simulação terminou"""
-        if not self.all_instructions:
-            return True  # Se não há instruções, a simulação está "pronta"
-        for instr in self.all_instructions:
-            if not instr.is_squashed() and instr.get_commit_cycle() == -1:
-                return False  # Ainda há instruções não comitadas e não descartadas
-        return True  # Todas as instruções foram comitadas ou descartadas
+        # Todas as instruções foram comitadas ou descartadas (ou não há instruções)
+        if self.live_instruction_count > 0:
+            return False
+        # Modo stream: também não pode restar instrução por ler no arquivo
+        return self.instruction_stream is None or not self.has_instruction(self.instruction_stream.get_fetched_count())
+
+    def has_instruction(self, index):
+        """Verifica se existe instrução no índice (no modo stream, lê do arquivo até ela)"""
+        if self.instruction_stream is None:
+            return index < len(self.all_instructions)
+        stream = self.instruction_stream
+        if index >= stream.get_fetched_count():
+            fetched = stream.fetch_until(index)
+            self.live_instruction_count += fetched
+            if self.program_stream is None:
+                for new_index in range(stream.get_fetched_count() - fetched, stream.get_fetched_count()):
+                    decode_operands(stream[new_index], self.register_file)
+        return index < self.instruction_stream.get_fetched_count()
+
+    def get_instruction_base(self):
+        """Índice da instrução mais antiga em memória (0 no modo lista)"""
+        if self.instruction_stream is None:
+            return 0
+        return self.instruction_stream.get_base()
+
+    def find_instruction_index(self, instr_id):
+        """Índice no programa da instrução com o ID (-1 se não existe)"""
+        if self.instruction_stream is not None:
+            # No stream os IDs são as posições no arquivo
+            return instr_id if instr_id >= 0 and self.has_instruction(instr_id) else -1
+        return self.instruction_indices.get(instr_id, -1)
 
     def issue_from_instruction_queue(self):
-        if self.program_counter < len(self.all_instructions):
+        # Até issue_width instruções por ciclo; para na primeira que não puder ser emitida
+        for _ in range(self.issue_width):
+            if not self.issue_next_instruction():
+                break
+
+    def issue_next_instruction(self):
+        """Tenta emitir a instrução do PC; retorna False se o issue parou neste ciclo"""
+        if self.has_instruction(self.program_counter):
+            if self.program_counter < self.get_instruction_base():
+                self.program_counter += 1  # Já saiu da janela do stream (comitada ou descartada)
+                return True
             instr_to_issue = self.all_instructions[self.program_counter]
 
             if instr_to_issue.is_squashed() or instr_to_issue.get_issue_cycle() != -1:
                 self.program_counter += 1  # Já squashed ou emitida, avança
-                return
+                return True
+
+            # ROB cheio: issue fica parado (bolha estrutural)
+            if self.reorder_buffer.is_full():
+                self.bubble_cycles += 1
+                return False
 
             target_rs_array = None
             if instr_to_issue.get_op() in [Op.ADD, Op.SUB]:
@@ -168,227 +564,530 @@ class TOMASSULLLERoriSimulator:
                 issued = False
                 for rs in target_rs_array:
                     if not rs.is_busy():
-                        Qj = None
-                        Vj = None
-                        Qk = None
-                        Vk = None
-
-                        # Resolve src1
-                        if instr_to_issue.get_src1() != "0":
-                            src1_status = self.register_file.get_register_status(instr_to_issue.get_src1())
-                            if src1_status is not None:
-                                if src1_status.get_producer_tag() is not None:
-                                    Qj = src1_status.get_producer_tag()
-                                else:
-                                    Vj = src1_status.get_value()
-                            else:
-                                try:
-                                    Vj = float(instr_to_issue.get_src1())
-                                except ValueError:
-                                    Vj = 0.0
-                        else:
-                            Vj = 0.0
-
-                        # Resolve src2
-                        if instr_to_issue.get_src2() != "0":
-                            src2_status = self.register_file.get_register_status(instr_to_issue.get_src2())
-                            if src2_status is not None:
-                                if src2_status.get_producer_tag() is not None:
-                                    Qk = src2_status.get_producer_tag()
-                                else:
-                                    Vk = src2_status.get_value()
-                            else:
-                                try:
-                                    Vk = float(instr_to_issue.get_src2())
-                                except ValueError:
-                                    Vk = 0.0
-                        else:
-                            Vk = 0.0
-
+                        # Resolve src1/src2 (operandos decodificados no carregamento)
+                        Qj, Vj = self.read_operand(instr_to_issue.src1_index, instr_to_issue.src1_value)
+                        Qk, Vk = self.read_operand(instr_to_issue.src2_index, instr_to_issue.src2_value)
+                        memory_op = self.data_memory_enabled and instr_to_issue.get_op() in (Op.LD, Op.ST)
+                        if memory_op and instr_to_issue.get_op() == Op.ST:
+                            # Store: Qj/Vj = base, Qk/Vk = dado (registrador do primeiro campo)
+                            base_index, base_value, offset = self.store_address_operands(instr_to_issue)
+                            Qj, Vj = self.read_operand(base_index, base_value)
+                            Qk, Vk = self.read_operand(instr_to_issue.dest_index, 0.0)
+
+                        self.journal.record(rs, *ReservationStation.STATE_FIELDS)
                         rs.assign(instr_to_issue, instr_to_issue.get_op(), Qj, Vj, Qk, Vk)
+                        if memory_op:
+                            if instr_to_issue.get_op() == Op.ST:
+                                rs.set_A(offset)  # Deslocamento (imediato)
+                            self.load_store_queue.append(instr_to_issue)
+                        self.instruction_stations[instr_to_issue] = rs
+                        self.journal.record(instr_to_issue, 'issue_cycle')
                         instr_to_issue.set_issue_cycle(self.current_clock)
+                        self.reorder_buffer.push(self.program_counter)
+                        self.register_consumer(rs)
+                        self.schedule_station(rs)
 
                         # BUG FIX #3: Marcar instruções como especulativas
-                        # Verifica se existe branch não-comitado antes desta instrução
-                        for i in range(self.program_counter - 1, -1, -1):
-                            prev_instr = self.all_instructions[i]
-                            if (prev_instr.get_op() in [Op.BEQ, Op.BNE] and
-                                prev_instr.get_commit_cycle() == -1):
-                                instr_to_issue.set_speculative(prev_instr.get_id())
-                                break
+                        self.mark_speculative(instr_to_issue)
+                        next_pc = self.program_counter + 1
+                        if instr_to_issue.get_op() in BRANCH_OPS:
+                            self.unresolved_branches.append(self.program_counter)
+                            if self.branch_predictor is not None:
+                                next_pc = self.predict_branch(self.program_counter, instr_to_issue)
 
                         # Atualizar o Register File (RAT) para o registrador de destino
-                        if instr_to_issue.get_dest() is not None and instr_to_issue.get_dest() != "0":
-                            self.register_file.update_register_status(instr_to_issue.get_dest(), None, rs.get_name())
+                        if self.destination_index(instr_to_issue) >= 0:
+                            self.update_register(instr_to_issue.dest_index, None, rs.get_name())
                         issued = True
                         break
 
                 if issued:
-                    self.program_counter += 1
-                else:
-                    self.bubble_cycles += 1
+                    self.program_counter = next_pc
+                    return True
+                self.bubble_cycles += 1
+        return False
+
+    def mark_speculative(self, instr):
+        """Marca a instrução emitida como dependente do branch não comitado mais próximo antes dela.
+
+        Todas as instruções antes do PC já foram emitidas ou descartadas, então
+        esse branch é o mais recente entre o topo da pilha de pendentes e o
+        último descartado (que nunca comita e continua valendo).
+        """
+        squashed = self.squashed_branch
+        if self.unresolved_branches and (squashed is None or self.unresolved_branches[-1] > squashed[0]):
+            branch_id = self.all_instructions[self.unresolved_branches[-1]].get_id()
+            self.speculative_dependents.setdefault(branch_id, []).append(instr)
+        elif squashed is not None:
+            branch_id = squashed[1]
+        else:
+            return
+        self.journal.record(instr, 'is_speculative', 'speculative_branch_id')
+        instr.set_speculative(branch_id)
+        self.speculative_count += 1
+
+    def predict_branch(self, index, branch):
+        """Consulta o preditor para o branch emitido; retorna o próximo PC.
+
+        Previsto tomado com alvo adiante, o issue salta direto para o alvo.
+        Alvos para trás (ou inexistentes) não mudam o caminho: cada instrução
+        executa uma única vez, então o issue segue em sequência. Com
+        ProgramStream o preditor é indexado pelo índice no programa e o fetch
+        é desviado para qualquer alvo; a próxima instância é sempre index + 1.
+        """
+        if self.program_stream is not None:
+            target_pc = self.program_stream.find_target(branch.get_branch_target_id())
+            predicted_taken = self.branch_predictor.predict(branch.get_static_index(), target_pc)
+            self.journal.record(branch, 'predicted_taken')
+            branch.set_predicted_taken(predicted_taken)
+            self.redirect_fetch(index, self.branch_successor(branch, predicted_taken))
+            return index + 1
+
+        target_index = self.find_instruction_index(branch.get_branch_target_id())
+        predicted_taken = self.branch_predictor.predict(index, target_index)
+        self.journal.record(branch, 'predicted_taken')
+        branch.set_predicted_taken(predicted_taken)
+        if predicted_taken and target_index > index + 1:
+            return target_index
+        return index + 1
 
     def execute_instructions(self):
-        # Cria lista com todas as RSs
-        all_rs = self.rs_add + self.rs_store + self.rs_mult + self.rs_branch
+        # Contagem regressiva só das RSs em execução
+        for end_cycle, order, seq, rs, instr in self.executing_stations:
+            if rs.get_instruction() is instr and instr.get_end_exec_cycle() == -1 and not instr.is_squashed():
+                self.journal.record(instr, 'current_latency')
+                instr.set_current_latency(instr.get_current_latency() - 1)
+
+        # Termina as que chegaram ao ciclo de término (heap ordenado pelo ciclo)
+        while self.executing_stations and self.executing_stations[0][0] <= self.current_clock:
+            end_cycle, order, seq, rs, instr = heapq.heappop(self.executing_stations)
+            if rs.get_instruction() is not instr or instr.get_end_exec_cycle() != -1 or instr.is_squashed():
+                continue  # Entrada obsoleta (RS liberada ou reutilizada)
+
+            self.journal.record(instr, 'end_exec_cycle')
+            instr.set_end_exec_cycle(self.current_clock)
+            self.journal.record(rs, 'result')
+            rs.set_result(self.compute_result(rs, instr))
+            self.schedule_station(rs)
+
+        # Inicia as prontas; só começam a contar no próximo ciclo
+        blocked = set()  # Loads retidos pela desambiguação: tentam de novo no próximo ciclo
+        for rs in self.ready_stations:
+            instr = rs.get_instruction()
+            if instr.is_squashed():
+                continue
+            if self.data_memory_enabled and rs.get_op() == Op.LD and not self.start_load(rs, instr):
+                blocked.add(rs)
+                continue
+            self.journal.record(instr, 'start_exec_cycle')
+            instr.set_start_exec_cycle(self.current_clock)
+            self.schedule_station(rs)
+        self.ready_stations = blocked
+        # Removido: contagem de bolhas por data hazard (comportamento normal do Tomasulo)
+
+    def compute_result(self, rs, instr):
+        """Calcula o resultado baseado na operação"""
+        res = 0.0
+        vj = rs.get_Vj() if rs.get_Vj() is not None else 0.0
+        vk = rs.get_Vk() if rs.get_Vk() is not None else 0.0
+
+        if rs.get_op() == Op.ADD:
+            res = vj + vk
+        elif rs.get_op() == Op.SUB:
+            res = vj - vk
+        elif rs.get_op() == Op.MUL:
+            res = vj * vk
+        elif rs.get_op() == Op.DIV:
+            res = vj / vk if vk != 0 else 0.0
+        elif rs.get_op() == Op.LD:
+            if self.data_memory_enabled:
+                res = self.read_memory(rs, instr)
+            else:
+                # LOAD: assume que src2 é o endereço, retorna valor simulado
+                res = vk  # Simplificação: retorna o "endereço" como valor
+        elif rs.get_op() in [Op.BEQ, Op.BNE]:
+            if not instr.is_branch_resolved():
+                if self.branch_predictor is None:
+                    taken = True  # Modo original: SEMPRE TOMA O SALTO
+                elif rs.get_op() == Op.BEQ:
+                    taken = vj == vk
+                else:
+                    taken = vj != vk
+                self.journal.record(instr, 'branch_taken', 'branch_resolved')
+                instr.set_branch_taken(taken)
+                instr.set_branch_resolved(True)
+                res = 1.0 if taken else 0.0  # Simboliza branch tomado ou não
+        elif rs.get_op() == Op.ST:
+            if self.data_memory_enabled:
+                self.resolve_store_address(rs, instr)
+            # STORE: valor a ser armazenado
+            res = vj
+        return res
+
+    def start_load(self, rs, load):
+        """Desambiguação: calcula o endereço do load (campo A) e diz se ele pode iniciar.
+
+        O store anterior mais novo com endereço conhecido igual decide: o load
+        espera o dado dele para encaminhá-lo. Stores com endereço desconhecido
+        retêm o load no modo conservador e são ignorados no especulativo.
+        """
+        vj = rs.get_Vj() if rs.get_Vj() is not None else 0.0
+        vk = rs.get_Vk() if rs.get_Vk() is not None else 0.0
+        address = word_address(vj + vk)
+        for store in self.load_store_queue.older_stores(load):
+            if store.get_end_exec_cycle() == -1:
+                if self.memory_model == 'conservative':
+                    return False
+                continue
+            store_rs = self.find_reservation_station(store)
+            if store_rs.get_A() == address:
+                if store_rs.get_Qk() is not None:
+                    return False
+                break
+        self.journal.record(rs, 'A')
+        rs.set_A(address)
+        return True
 
-        for rs in all_rs:
-            if rs.is_busy():
-                instr = rs.get_instruction()
-                if instr.is_squashed():
-                    continue
-
-                if instr.get_start_exec_cycle() == -1 and rs.is_ready_to_execute():
-                    instr.set_start_exec_cycle(self.current_clock)
-                elif instr.get_start_exec_cycle() != -1 and instr.get_end_exec_cycle() == -1:
-                    if instr.get_current_latency() > 0:
-                        instr.set_current_latency(instr.get_current_latency() - 1)
-                        if instr.get_current_latency() == 0:
-                            instr.set_end_exec_cycle(self.current_clock)
-
-                            # Calcula o resultado baseado na operação
-                            res = 0.0
-                            vj = rs.get_Vj() if rs.get_Vj() is not None else 0.0
-                            vk = rs.get_Vk() if rs.get_Vk() is not None else 0.0
-
-                            if rs.get_op() == Op.ADD:
-                                res = vj + vk
-                            elif rs.get_op() == Op.SUB:
-                                res = vj - vk
-                            elif rs.get_op() == Op.MUL:
-                                res = vj * vk
-                            elif rs.get_op() == Op.DIV:
-                                res = vj / vk if vk != 0 else 0.0
-                            elif rs.get_op() == Op.LD:
-                                # LOAD: assume que src2 é o endereço, retorna valor simulado
-                                res = vk  # Simplificação: retorna o "endereço" como valor
-                            elif rs.get_op() in [Op.BEQ, Op.BNE]:
-                                # Lógica para branches - SEMPRE TOMA O SALTO nesta simulação
-                                if not instr.is_branch_resolved():
-                                    instr.set_branch_taken(True)
-                                    instr.set_branch_resolved(True)
-                                    res = 1.0  # Simboliza branch tomado
-                            elif rs.get_op() == Op.ST:
-                                # STORE: valor a ser armazenado
-                                res = vj
-
-                            rs.set_result(res)
-                # Removido: contagem de bolhas por data hazard (comportamento normal do Tomasulo)
+    def read_memory(self, rs, load):
+        """Valor do load: encaminhado do store anterior mais novo com o mesmo endereço, ou lido da memória"""
+        address = rs.get_A()
+        for store in self.load_store_queue.older_stores(load):
+            if store.get_end_exec_cycle() == -1:
+                continue
+            store_rs = self.find_reservation_station(store)
+            if store_rs.get_A() == address:
+                if store_rs.get_Qk() is None:
+                    self.forwarded_load_count += 1
+                    self.journal.record(load, 'forwarded_from')
+                    load.set_forwarded_from(self.instruction_positions[store])
+                    return store_rs.get_Vk()
+                # Store resolvido durante a execução do load, ainda sem o dado: o valor lido é antigo
+                self.journal.record(load, 'replay')
+                load.set_replay(True)
+                break
+        return self.data_memory.read(address)
+
+    def store_address_operands(self, store):
+        """(índice, imediato) da base e deslocamento numérico de um ST.
+
+        O endereço é src1 + src2, como no LD. A RS do store guarda a base em
+        Qj/Vj, o dado em Qk/Vk e o deslocamento no campo A, então só um dos
+        dois campos de endereço pode ser registrador.
+        """
+        if store.src2_index < 0:
+            return store.src1_index, store.src1_value, store.src2_value
+        if store.src1_index < 0:
+            return store.src2_index, store.src2_value, store.src1_value
+        raise ValueError(f"ST (ID {store.get_id()}): base e deslocamento não podem ser ambos registradores")
+
+    def resolve_store_address(self, rs, store):
+        """Endereço efetivo do store (base + deslocamento no campo A).
+
+        No modo especulativo, um load mais novo que já leu o mesmo endereço
+        de uma fonte mais antiga que este store leu um valor antigo e é
+        marcado para replay.
+        """
+        vj = rs.get_Vj() if rs.get_Vj() is not None else 0.0
+        address = word_address(vj + rs.get_A())
+        self.journal.record(rs, 'A')
+        rs.set_A(address)
+        if self.memory_model != 'speculative':
+            return
+        position = self.instruction_positions[store]
+        for load in self.load_store_queue.younger_loads(store):
+            if load.get_end_exec_cycle() == -1 or load.is_replay():
+                continue  # Ainda não leu (vai ver este store) ou já será refeito
+            if self.find_reservation_station(load).get_A() == address and load.get_forwarded_from() < position:
+                self.journal.record(load, 'replay')
+                load.set_replay(True)
 
     def write_result_to_cdb(self):
         self.cdb_producer_tag = None  # Limpa o CDB no início da fase
         self.cdb_value = None
-
-        all_rs = self.rs_add + self.rs_store + self.rs_mult + self.rs_branch
-
-        # Prioridade de escrita no CDB: aqui, a primeira RS que terminou escreve.
-        for rs in all_rs:
-            if (rs.is_busy() and rs.get_instruction().get_end_exec_cycle() != -1 and
-                rs.get_instruction().get_write_result_cycle() == -1):
-                if rs.get_instruction().is_squashed():
-                    self.free_reservation_station(rs.get_instruction(), self.rs_add)
-                    self.free_reservation_station(rs.get_instruction(), self.rs_store)
-                    self.free_reservation_station(rs.get_instruction(), self.rs_mult)
-                    self.free_reservation_station(rs.get_instruction(), self.rs_branch)
-                    continue
-
-                self.cdb_producer_tag = rs.get_name()
-                self.cdb_value = rs.get_result()
-                rs.get_instruction().set_write_result_cycle(self.current_clock)
-
-                # Disparar atualizações para outras RSs e Register File
-                self.update_reservation_stations_from_cdb(self.cdb_producer_tag, self.cdb_value)
-                self.update_register_file_from_cdb(self.cdb_producer_tag, self.cdb_value,
-                                                   rs.get_instruction().get_dest())
-
-                # Uma RS por ciclo publica no CDB para simplificação
-                return
+        self.cdb_buses = []
+
+        # Prioridade de escrita no CDB definida por cdb_priority (por padrão, a ordem global das RSs).
+        # Cada um dos cdb_count barramentos publica um resultado por ciclo.
+        while self.finished_stations and len(self.cdb_buses) < self.cdb_count:
+            priority, seq, rs, instr = self.finished_stations[0]
+            if rs.get_instruction() is not instr or instr.get_write_result_cycle() != -1:
+                heapq.heappop(self.finished_stations)  # Entrada obsoleta
+                continue
+            heapq.heappop(self.finished_stations)
+
+            if instr.is_squashed():
+                self.free_reservation_station(instr)
+                continue
+            if self.data_memory_enabled and rs.get_op() == Op.ST:
+                # Store com endereço e dado prontos: completo, sem usar o CDB
+                self.journal.record(instr, 'write_result_cycle')
+                instr.set_write_result_cycle(self.current_clock)
+                continue
+
+            producer_tag = rs.get_name()
+            value = rs.get_result()
+            if not self.cdb_buses:
+                # Primeiro barramento (compatível com o modo de um único CDB)
+                self.cdb_producer_tag = producer_tag
+                self.cdb_value = value
+            self.cdb_buses.append((producer_tag, value))
+            self.journal.record(instr, 'write_result_cycle')
+            instr.set_write_result_cycle(self.current_clock)
+
+            # Disparar atualizações para outras RSs e Register File
+            self.update_reservation_stations_from_cdb(producer_tag, value)
+            self.update_register_file_from_cdb(producer_tag, value, instr.dest_index)
 
     def update_reservation_stations_from_cdb(self, producer_tag, value):
-        all_rs = self.rs_add + self.rs_store + self.rs_mult + self.rs_branch
-
-        for rs in all_rs:
-            if rs.is_busy():
-                if rs.get_Qj() is not None and rs.get_Qj() == producer_tag:
-                    rs.set_Vj(value)
-                if rs.get_Qk() is not None and rs.get_Qk() == producer_tag:
-                    rs.set_Vk(value)
-
-    def update_register_file_from_cdb(self, producer_tag, value, dest_register):
-        if dest_register is not None and dest_register != "0":
-            status = self.register_file.get_register_status(dest_register)
-            if (status is not None and status.get_producer_tag() is not None and
-                status.get_producer_tag() == producer_tag):
-                self.register_file.update_register_status(dest_register, value, None)
+        # Acorda só as dependentes desta tag (índice preenchido no issue).
+        # RSs liberadas/reutilizadas desde então não têm mais Qj/Qk == tag e são ignoradas.
+        for rs in self.consumers.pop(producer_tag, ()):
+            if not rs.is_busy():
+                continue
+            woken = False
+            if rs.get_Qj() is not None and rs.get_Qj() == producer_tag:
+                self.journal.record(rs, 'Vj', 'Qj')
+                rs.set_Vj(value)
+                woken = True
+            if rs.get_Qk() is not None and rs.get_Qk() == producer_tag:
+                self.journal.record(rs, 'Vk', 'Qk')
+                rs.set_Vk(value)
+                woken = True
+            if woken:
+                self.wake_station(rs)
+
+    def update_register_file_from_cdb(self, producer_tag, value, dest_index):
+        if dest_index >= 0:
+            register_file = self.register_file
+            if register_file.defined[dest_index] and register_file.producers[dest_index] == producer_tag:
+                self.update_register(dest_index, value, None)
 
     def commit_instructions(self):
-        instr_index_to_commit = -1
-        for i in range(len(self.all_instructions)):
-            if (not self.all_instructions[i].is_squashed() and
-                self.all_instructions[i].get_commit_cycle() == -1):
-                instr_index_to_commit = i
+        # Até commit_width instruções por ciclo, sempre pela cabeça do ROB
+        for _ in range(self.commit_width):
+            if not self.commit_head_instruction():
                 break
+        if self.instruction_stream is not None:
+            # Libera da janela o que está abaixo da cabeça do ROB (ou do PC, com o ROB vazio)
+            head = self.reorder_buffer.peek()
+            self.instruction_stream.evict_until(head if head is not None else self.program_counter)
+
+    def commit_head_instruction(self):
+        """Comita a instrução da cabeça do ROB se ela já escreveu o resultado"""
+        instr_index_to_commit = -1
+        if not self.reorder_buffer.is_empty():
+            instr_index_to_commit = self.reorder_buffer.peek()
 
         if instr_index_to_commit != -1:
             instr_to_commit = self.all_instructions[instr_index_to_commit]
 
             if instr_to_commit.get_write_result_cycle() != -1:
+                if instr_to_commit.is_replay():
+                    self.replay_load(instr_index_to_commit, instr_to_commit)
+                    return False
+
+                self.journal.record(instr_to_commit, 'commit_cycle')
                 instr_to_commit.set_commit_cycle(self.current_clock)
+                self.live_instruction_count -= 1
+                if instr_to_commit.is_speculative:
+                    self.speculative_count -= 1  # Dependia de um branch descartado
+                if self.unresolved_branches and self.unresolved_branches[0] == instr_index_to_commit:
+                    self.unresolved_branches.popleft()  # Branch mais antigo pendente é a cabeça do ROB
+
+                # Valor arquitetural do destino (desfaz o caminho errado na recuperação)
+                if self.keeps_committed_values and self.destination_index(instr_to_commit) >= 0:
+                    self.commit_register_value(instr_to_commit)
 
                 # Lógica de SQUASHING para BRANCHES
-                if (instr_to_commit.get_op() in [Op.BEQ, Op.BNE] and
-                    instr_to_commit.is_branch_taken()):
-                    target_instruction_index = -1
-                    for i in range(len(self.all_instructions)):
-                        if self.all_instructions[i].get_id() == instr_to_commit.get_branch_target_id():
-                            target_instruction_index = i
-                            break
-
-                    if target_instruction_index != -1:
-                        # BUG FIX: Descartar apenas instruções ENTRE branch e destino
-                        # ANTES: descartava todas após o branch
-                        # DEPOIS: descarta só as especulativas (entre branch+1 e destino-1)
-                        for i in range(instr_index_to_commit + 1, target_instruction_index):
-                            future_instr = self.all_instructions[i]
-                            if future_instr.get_commit_cycle() == -1 and not future_instr.is_squashed():
-                                future_instr.set_squashed(True)
-                                self.total_squashed_count += 1  # Incrementa contador permanente
-                                self.free_reservation_station(future_instr, self.rs_add)
-                                self.free_reservation_station(future_instr, self.rs_store)
-                                self.free_reservation_station(future_instr, self.rs_mult)
-                                self.free_reservation_station(future_instr, self.rs_branch)
-                        # Salta PC para o destino do branch
-                        self.program_counter = target_instruction_index
-
-                    # Limpa flag especulativa de todas instruções que dependiam deste branch
-                    for instr in self.all_instructions:
-                        if instr.get_speculative_branch_id() == instr_to_commit.get_id():
-                            instr.clear_speculative()
+                if instr_to_commit.get_op() in [Op.BEQ, Op.BNE]:
+                    self.resolve_committed_branch(instr_index_to_commit, instr_to_commit)
+
+                # Para instruções STORE, o valor é efetivamente "escrito" na memória no commit
+                if self.data_memory_enabled and instr_to_commit.get_op() == Op.ST:
+                    store_rs = self.find_reservation_station(instr_to_commit)
+                    self.data_memory.write(store_rs.get_A(), store_rs.get_Vk(), self.journal)
 
                 # Libera a RS da instrução comitada
-                self.free_reservation_station(instr_to_commit, self.rs_add)
-                self.free_reservation_station(instr_to_commit, self.rs_store)
-                self.free_reservation_station(instr_to_commit, self.rs_mult)
-                self.free_reservation_station(instr_to_commit, self.rs_branch)
+                self.free_reservation_station(instr_to_commit)
+
+                self.retire_reorder_buffer_head()
+                if self.data_memory_enabled:
+                    self.load_store_queue.retire()
+                if self.checkpoint_interval > 0:
+                    self.committed_states[instr_to_commit] = tuple(
+                        getattr(instr_to_commit, field) for field in Instruction.STATE_FIELDS)
+                return True
+        return False
+
+    def resolve_committed_branch(self, index, branch):
+        """Branch comitado: métricas de predição, treino do preditor e descarte/recuperação"""
+        taken = branch.is_branch_taken()
+        self.predicted_branch_count += 1
+        if branch.is_predicted_taken() != taken:
+            self.mispredicted_branch_count += 1
+
+        if self.branch_predictor is None:
+            # Modo original: o issue seguiu em sequência e o branch é sempre tomado
+            if taken:
+                target_instruction_index = self.find_instruction_index(branch.get_branch_target_id())
+                if target_instruction_index != -1:
+                    self.mispredict_penalty_cycles += self.current_clock - branch.get_issue_cycle()
+                    # BUG FIX: Descartar apenas instruções ENTRE branch e destino
+                    # ANTES: descartava todas após o branch
+                    # DEPOIS: descarta só as especulativas (entre branch+1 e destino-1)
+                    self.squash_instructions(index + 1, target_instruction_index)
+                    # Salta PC para o destino do branch
+                    self.program_counter = target_instruction_index
+        elif self.program_stream is not None:
+            self.branch_predictor.update(branch.get_static_index(), taken, self.journal)
+            successor = self.branch_successor(branch, taken)
+            if successor != self.branch_successor(branch, branch.is_predicted_taken()):
+                # Fetch seguiu o caminho errado: as instâncias depois do branch deixam de existir
+                self.mispredict_penalty_cycles += self.current_clock - branch.get_issue_cycle()
+                self.rewind_wrong_path()
+                self.redirect_fetch(index, successor)
+                self.program_counter = index + 1
+        else:
+            self.branch_predictor.update(index, taken, self.journal)
+            target_instruction_index = self.find_instruction_index(branch.get_branch_target_id())
+            follows_target = taken and target_instruction_index > index + 1
+            if follows_target != (branch.is_predicted_taken() and target_instruction_index > index + 1):
+                # Issue seguiu o caminho errado: tudo depois do branch volta a esperar o issue
+                self.mispredict_penalty_cycles += self.current_clock - branch.get_issue_cycle()
+                self.rewind_wrong_path()
+                self.program_counter = target_instruction_index if follows_target else index + 1
+            if follows_target:
+                # Instruções puladas entre o branch e o alvo nunca executam
+                self.squash_instructions(index + 1, target_instruction_index)
+
+        # Limpa flag especulativa de todas instruções que dependiam deste branch
+        for instr in self.speculative_dependents.pop(branch.get_id(), ()):
+            if instr.get_speculative_branch_id() == branch.get_id():
+                self.journal.record(instr, 'is_speculative', 'speculative_branch_id')
+                if not instr.is_squashed() and instr.get_commit_cycle() == -1:
+                    self.speculative_count -= 1
+                instr.clear_speculative()
+
+    def branch_successor(self, branch, taken):
+        """Índice no programa da instrução que segue o branch na direção dada (ProgramStream)"""
+        target_pc = self.program_stream.find_target(branch.get_branch_target_id())
+        if taken and target_pc != -1:
+            return target_pc
+        return branch.get_static_index() + 1
+
+    def redirect_fetch(self, index, pc):
+        """Continua o fetch do ProgramStream em pc depois da instância index"""
+        self.live_instruction_count -= self.program_stream.redirect(index, pc)
+
+    def squash_instructions(self, start, end):
+        """Descarta as instruções não comitadas nos índices [start, end)"""
+        for i in range(start, end):
+            future_instr = self.all_instructions[i]
+            if future_instr.get_commit_cycle() == -1 and not future_instr.is_squashed():
+                self.journal.record(future_instr, 'squashed')
+                future_instr.set_squashed(True)
+                self.total_squashed_count += 1  # Incrementa contador permanente
+                self.live_instruction_count -= 1
+                if future_instr.get_issue_cycle() != -1:
+                    self.wasted_issue_slots += 1
+                if future_instr.is_speculative:
+                    self.speculative_count -= 1
+                if future_instr.get_op() in BRANCH_OPS:
+                    self.discard_branch(i, future_instr)
+                self.free_reservation_station(future_instr)
+
+    def rewind_wrong_path(self, first=1):
+        """Desfaz o issue de todas as instruções depois do branch na cabeça do ROB.
+
+        Elas voltam ao estado inicial (serão emitidas de novo se estiverem no
+        caminho certo), liberam suas RSs e os registradores de destino voltam
+        ao valor comitado, sem produtor. Com o branch na cabeça, tudo o que é
+        mais antigo já comitou, então nenhum outro produtor fica pendente.
+        Com ProgramStream as instâncias desfeitas saem do fluxo em seguida (redirect).
+        first=0 desfaz também a cabeça (replay de um load).
+        """
+        register_file = self.register_file
+        rewound = set()
+        for index in reversed(self.reorder_buffer.get_entries()[first:]):
+            instr = self.all_instructions[index]
+            if instr.is_squashed():
+                continue
+            rewound.add(instr)
+            self.wasted_issue_slots += 1
+            if instr.is_speculative:
+                self.speculative_count -= 1
+            self.free_reservation_station(instr)
+            if self.destination_index(instr) >= 0:
+                self.update_register(instr.dest_index, register_file.committed_values[instr.dest_index], None)
+            self.journal.record(instr, *Instruction.STATE_FIELDS)
+            instr.reset()
+
+        self.reorder_buffer.truncate(first)
+        if self.data_memory_enabled:
+            self.load_store_queue.remove(rewound)
+        self.unresolved_branches.clear()
+        self.speculative_dependents = {}
+        # Entradas dos heaps das instruções desfeitas não podem casar com um novo issue na mesma RS
+        self.executing_stations = [entry for entry in self.executing_stations if entry[4] not in rewound]
+        heapq.heapify(self.executing_stations)
+        self.finished_stations = [entry for entry in self.finished_stations if entry[3] not in rewound]
+        heapq.heapify(self.finished_stations)
+
+    def replay_load(self, index, load):
+        """Load na cabeça do ROB leu um valor antigo: ele e tudo o que veio depois voltam a esperar o issue"""
+        self.memory_replay_count += 1
+        self.replay_penalty_cycles += self.current_clock - load.get_issue_cycle()
+        self.rewind_wrong_path(0)
+        if self.program_stream is not None:
+            self.redirect_fetch(index, load.get_static_index() + 1)
+        self.program_counter = index
+
+    def destination_index(self, instr):
+        """Registrador escrito pela instrução (-1 se nenhum; no modelo de memória o ST só lê o primeiro campo)"""
+        if self.data_memory_enabled and instr.get_op() == Op.ST:
+            return -1
+        return instr.dest_index
+
+    def commit_register_value(self, instr):
+        """Grava o resultado da instrução comitada como valor arquitetural do destino"""
+        rs = self.find_reservation_station(instr)
+        if rs is not None:
+            committed_values = self.register_file.committed_values
+            self.journal.record_index(committed_values, instr.dest_index)
+            committed_values[instr.dest_index] = rs.get_result()
+
+    def discard_branch(self, index, branch):
+        """Tira da pilha de pendentes um branch descartado (ele vira o último descartado)"""
+        if self.unresolved_branches and self.unresolved_branches[0] == index:
+            self.unresolved_branches.popleft()  # Os descartados são os mais antigos após o que comitou
+        if self.branch_predictor is None:
+            # Modo original: o branch descartado continua "não comitado" para a marcação especulativa
+            self.squashed_branch = (index, branch.get_id())
+        # Nunca vai comitar: seus dependentes continuam marcados e não precisam mais da lista
+        self.speculative_dependents.pop(branch.get_id(), None)
+
+    def retire_reorder_buffer_head(self):
+        """Remove da cabeça do ROB a instrução comitada e as descartadas que vêm logo após"""
+        while not self.reorder_buffer.is_empty():
+            head_instr = self.all_instructions[self.reorder_buffer.peek()]
+            if not head_instr.is_squashed() and head_instr.get_commit_cycle() == -1:
+                break
+            self.reorder_buffer.pop()
 
-                # Para instruções STORE, o valor é efetivamente "escrito" na memória no commit
-                if instr_to_commit.get_op() == Op.ST:
-                    store_rs = self.find_reservation_station(instr_to_commit, self.rs_store)
-                    if store_rs is not None:
-                        # Poderia simular a escrita em uma memória aqui
-                        pass
-
-    def free_reservation_station(self, committed_instruction, rs_array):
-        for rs in rs_array:
-            if rs.is_busy() and rs.get_instruction() == committed_instruction:
-                rs.free()
-                return
-
-    def find_reservation_station(self, instruction, rs_array):
-        for rs in rs_array:
-            if rs.is_busy() and rs.get_instruction() == instruction:
-                return rs
-        return None
+    def get_all_reservation_stations(self):
+        return self.all_stations
+
+    def free_reservation_station(self, instruction):
+        """Libera a RS ocupada pela instrução (comitada ou descartada), se houver"""
+        rs = self.instruction_stations.pop(instruction, None)
+        if rs is not None and rs.is_busy() and rs.get_instruction() is instruction:
+            self.journal.record(rs, *ReservationStation.STATE_FIELDS)
+            rs.free()
+            self.unschedule_station(rs)
+
+    def find_reservation_station(self, instruction):
+        """RS ocupada pela instrução (None se ela não está em nenhuma)"""
+        return self.instruction_stations.get(instruction)
 
     # Getters para a GUI
     def get_current_clock(self):
@@ -415,18 +1114,50 @@ class TOMASSULLLERoriSimulator:
     def get_register_file(self):
         return self.register_file
 
+    def get_reorder_buffer(self):
+        return self.reorder_buffer
+
+    def get_cdb_buses(self):
+        return self.cdb_buses
+
     def get_total_squashed(self):
         """Retorna total de instruções descartadas (nunca reseta)"""
         return self.total_squashed_count
 
+    def get_branch_predictor(self):
+        return self.branch_predictor
+
+    def get_branch_prediction_stats(self):
+        """Métricas de predição de desvio (branches comitados)"""
+        branches = self.predicted_branch_count
+        return {
+            'predictor': self.branch_predictor.get_name() if self.branch_predictor is not None else 'none',
+            'branches': branches,
+            'mispredictions': self.mispredicted_branch_count,
+            'accuracy': (branches - self.mispredicted_branch_count) / branches if branches else None,
+            'mispredict_penalty_cycles': self.mispredict_penalty_cycles,
+            'wasted_issue_slots': self.wasted_issue_slots,
+        }
+
+    def get_data_memory(self):
+        return self.data_memory
+
+    def get_load_store_queue(self):
+        return self.load_store_queue
+
+    def get_memory_stats(self):
+        """Métricas do modelo de memória"""
+        return {
+            'model': self.memory_model,
+            'forwarded_loads': self.forwarded_load_count,
+            'replays': self.memory_replay_count,
+            'replay_penalty_cycles': self.replay_penalty_cycles,
+            'pages': self.data_memory.get_page_count(),
+        }
+
     def get_current_speculative_count(self):
         """Retorna número ATUAL de instruções especulativas (não comitadas e não descartadas)"""
-        count = 0
-        for instr in self.all_instructions:
-            if (instr.is_speculative and
-                not instr.is_squashed() and
-                instr.get_commit_cycle() == -1):
-                count += 1
+        count = self.speculative_count
         # Atualiza o máximo se necessário
         if count > self.max_speculative_count:
             self.max_speculative_count = count
@@ -434,9 +1165,14 @@ class TOMASSULLLERoriSimulator:
 
     def calculate_ipc(self):
         committed_count = 0
-        for instr in self.all_instructions:
-            if instr.get_commit_cycle() != -1 and not instr.is_squashed():
-                committed_count += 1
+        if self.instruction_stream is not None:
+            # As comitadas já saíram da janela: conta pelo total lido
+            committed_count = (self.instruction_stream.get_fetched_count() -
+                               self.live_instruction_count - self.total_squashed_count)
+        else:
+            for instr in self.all_instructions:
+                if instr.get_commit_cycle() != -1 and not instr.is_squashed():
+                    committed_count += 1
         if self.current_clock == 0:
             return 0.0
         return committed_count / self.current_clock
@@ -38,6 +38,13 @@ class Instruction:
         self.is_speculative = False
         self.speculative_branch_id = -1
 
+        # Operandos pré-decodificados pelo ProgramParser (compartilhado com a versão web)
+        self.dest_index = None
+        self.src1_index = None
+        self.src1_value = None
+        self.src2_index = None
+        self.src2_value = None
+
     # Getters
     def get_id(self):
         return self.id
@@ -112,6 +119,14 @@ class Instruction:
     def set_branch_target_id(self, branch_target_id):
         self.branch_target_id = branch_target_id
 
+    def set_operands(self, dest_index, src1_index, src1_value, src2_index, src2_value):
+        """Grava os operandos pré-decodificados"""
+        self.dest_index = dest_index
+        self.src1_index = src1_index
+        self.src1_value = src1_value
+        self.src2_index = src2_index
+        self.src2_value = src2_value
+
     def set_branch_taken(self, branch_taken):
         self.branch_taken = branch_taken
 
@@ -1,7 +1,14 @@
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-from Instruction import Instruction, Op
+
+# Simulador e parser são os mesmos da versão web (diretório raiz do projeto):
+# journal de Step Back e checkpoints para voltar/ir a qualquer ciclo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Instruction import Op
 from TOMASSULLLERoriSimulator import TOMASSULLLERoriSimulator
+from ProgramParser import ParseError, parse_instructions
 
 
 class TOMASSULLLERoriGUI:
@@ -224,6 +231,23 @@ class TOMASSULLLERoriGUI:
         )
         self.run_to_end_button.pack(side=tk.LEFT, padx=3, expand=True, fill=tk.X)
 
+        # Ir direto para um ciclo (para frente ou para trás)
+        seek_frame = tk.Frame(control_frame, bg=self.colors['bg_panel'])
+        seek_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        tk.Label(seek_frame, text="Ir para o ciclo:",
+                font=("Arial", 9), bg=self.colors['bg_panel']).pack(side=tk.LEFT, padx=5)
+
+        self.seek_entry = tk.Entry(seek_frame, width=8, font=("Arial", 9))
+        self.seek_entry.pack(side=tk.LEFT, padx=5)
+
+        self.seek_button = tk.Button(
+            seek_frame, text="🎯 Ir",
+            bg=self.colors['btn_secondary'], fg="white",
+            font=("Arial", 9, "bold"), cursor="hand2", state=tk.DISABLED
+        )
+        self.seek_button.pack(side=tk.LEFT, padx=5)
+
         # Speed control para auto-run
         speed_frame = tk.Frame(control_frame, bg=self.colors['bg_panel'])
         speed_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
@@ -468,6 +492,7 @@ class TOMASSULLLERoriGUI:
         self.setup_simulator_button.config(command=self.setup_simulator)
         self.next_cycle_button.config(command=self.next_cycle)
         self.step_back_button.config(command=self.step_back)
+        self.seek_button.config(command=self.seek_cycle)
         self.run_to_end_button.config(command=self.run_to_end)
         self.auto_run_button.config(command=self.toggle_auto_run)
         self.load_from_paste_button.config(command=self.load_from_paste)
@@ -539,6 +564,27 @@ class TOMASSULLLERoriGUI:
             else:
                 messagebox.showwarning("⚠️ Aviso", "Não é possível voltar mais.")
 
+    def seek_cycle(self):
+        """Vai para o ciclo digitado (checkpoint mais próximo + re-simulação)"""
+        if self.simulator is None:
+            return
+        try:
+            cycle = int(self.seek_entry.get())
+        except ValueError:
+            messagebox.showerror("❌ Erro", "Digite um número de ciclo válido.")
+            return
+
+        reached = self.simulator.seek(cycle)
+        self.update_tables()
+        self.update_metrics()
+        self.step_back_button.config(state=tk.NORMAL if self.simulator.can_step_back() else tk.DISABLED)
+
+        if self.simulator.is_simulation_finished():
+            self.status_label.config(text=f"✅ Simulação concluída no ciclo {reached}")
+            self.update_ui(False)
+        else:
+            self.status_label.config(text=f"🎯 Ciclo {reached}")
+
     def toggle_auto_run(self):
         """Alterna modo de auto-execução"""
         if self.auto_run_active:
@@ -626,7 +672,7 @@ class TOMASSULLLERoriGUI:
             values = (
                 instr.get_id(),
                 instr.get_op().value,
-                instr.get_dest(),
+                instr.get_dest() if instr.get_dest() is not None else "0",  # Branches não têm destino
                 instr.get_src1(),
                 instr.get_src2(),
                 instr.get_issue_cycle() if instr.get_issue_cycle() != -1 else "-",
@@ -721,69 +767,18 @@ class TOMASSULLLERoriGUI:
         )
 
     def parse_instructions_from_text(self, text):
-        """Parse instruções do texto"""
-        lines = text.strip().split('\n')
-        instructions = []
-
-        for line_num, line in enumerate(lines):
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-
-            if '#' in line:
-                line = line.split('#')[0].strip()
-
-            tokens = line.split()
-            if len(tokens) < 4:
-                messagebox.showerror("❌ Erro de Parse",
-                    f"Linha {line_num + 1}: '{line}'\nFormato inválido. Use: OP DEST SRC1 SRC2")
-                return None
-
-            op_str = tokens[0].upper()
-            dest = tokens[1].upper()
-            src1 = tokens[2].upper()
-            src2 = tokens[3].upper()
-
-            try:
-                op = Op[op_str]
-            except KeyError:
-                messagebox.showerror("❌ Erro de Parse",
-                    f"Linha {line_num + 1}: Operação '{op_str}' inválida.\n"
-                    f"Operações válidas: ADD, SUB, MUL, DIV, LD, ST, BEQ, BNE")
-                return None
-
-            # Determina latência
-            latency = 0
-            if op in [Op.ADD, Op.SUB]:
-                latency = int(self.lat_add.get())
-            elif op == Op.LD:
-                latency = int(self.lat_load.get())
-            elif op == Op.ST:
-                latency = int(self.lat_store.get())
-            elif op == Op.MUL:
-                latency = int(self.lat_mult.get())
-            elif op == Op.DIV:
-                latency = int(self.lat_div.get())
-            elif op in [Op.BEQ, Op.BNE]:
-                latency = int(self.lat_branch.get())
-
-            instr_id = len(instructions)
-
-            if op in [Op.BEQ, Op.BNE]:
-                try:
-                    target_id = int(dest)
-                    instr = Instruction(instr_id, op, "0", src1, src2, latency)
-                    instr.set_branch_target_id(target_id)
-                except ValueError:
-                    messagebox.showerror("❌ Erro de Parse",
-                        f"Linha {line_num + 1}: ID do alvo do branch deve ser um número.")
-                    return None
-            else:
-                instr = Instruction(instr_id, op, dest, src1, src2, latency)
-
-            instructions.append(instr)
-
-        return instructions
+        """Parse instruções do texto (parser compartilhado com a versão web, modo estrito)"""
+        latencies = {
+            Op.ADD: int(self.lat_add.get()), Op.SUB: int(self.lat_add.get()),
+            Op.LD: int(self.lat_load.get()), Op.ST: int(self.lat_store.get()),
+            Op.MUL: int(self.lat_mult.get()), Op.DIV: int(self.lat_div.get()),
+            Op.BEQ: int(self.lat_branch.get()), Op.BNE: int(self.lat_branch.get()),
+        }
+        try:
+            return parse_instructions(text, latencies, strict=True, uppercase=True)
+        except ParseError as e:
+            messagebox.showerror("❌ Erro de Parse", str(e))
+            return None
 
     def load_from_paste(self):
         """Carrega instruções da área de texto"""
@@ -821,11 +816,13 @@ class TOMASSULLLERoriGUI:
             self.next_cycle_button.config(state=tk.NORMAL)
             self.run_to_end_button.config(state=tk.NORMAL)
             self.auto_run_button.config(state=tk.NORMAL)
+            self.seek_button.config(state=tk.NORMAL)
         else:
             self.next_cycle_button.config(state=tk.DISABLED)
             self.run_to_end_button.config(state=tk.DISABLED)
             self.auto_run_button.config(state=tk.DISABLED)
             self.step_back_button.config(state=tk.DISABLED)
+            self.seek_button.config(state=tk.DISABLED)
 
         state = tk.NORMAL if not simulation_ready else tk.DISABLED
         self.fu_add.config(state=state)
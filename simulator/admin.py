@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import SimulationJob
+
+
+@admin.register(SimulationJob)
+class SimulationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'total_instructions', 'cycle', 'committed_count', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    exclude = ('result',)
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+
+# Padrões do pool de simulação (settings.SIMULATION_EXECUTOR sobrescreve)
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_PENDING = 8
+DEFAULT_TIMEOUT = 15.0
+
+
+class SimulationExecutor:
+    """Pool de processos para as simulações da view assíncrona.
+
+    max_pending limita quantas simulações podem estar rodando ou na fila ao
+    mesmo tempo; acima disso a view recusa a requisição (503) em vez de
+    acumular trabalho que o cliente provavelmente não vai esperar. O lugar só
+    é liberado quando o trabalho termina: uma simulação que passou do timeout
+    (504) continua ocupando o seu até acabar, o que o TIME_BUDGET limita.
+
+    Se um processo do pool morre, o pool fica quebrado (BrokenProcessPool) e
+    é recriado para as próximas requisições.
+    """
+
+    def __init__(self, max_workers, max_pending, timeout):
+        self.max_workers = max_workers
+        self.pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Reserva um lugar na fila; False se ela está cheia"""
+        with self.lock:
+            if self.pending >= self.max_pending:
+                return False
+            self.pending += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.pending -= 1
+
+    def submit(self, fn, *args):
+        """Envia um trabalho já reservado com try_acquire (liberado quando ele terminar)"""
+        pool = self.pool
+        try:
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                future = self.replace_pool(pool).submit(fn, *args)
+        except Exception:
+            self.release()
+            raise
+        future.add_done_callback(self.finish)
+        return future
+
+    def finish(self, future):
+        """Callback de fim do trabalho (inclusive cancelado): libera o lugar na fila"""
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self.replace_pool(self.pool)
+        self.release()
+
+    def replace_pool(self, broken):
+        """Troca um pool quebrado por um novo (uma vez só, mesmo com várias chamadas)"""
+        with self.lock:
+            if self.pool is broken:
+                self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                broken.shutdown(wait=False, cancel_futures=True)
+            return self.pool
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+_simulation_executor = None
+_simulation_executor_lock = threading.Lock()
+
+
+def get_simulation_executor():
+    """Pool configurado em settings.SIMULATION_EXECUTOR (criado no primeiro uso)"""
+    global _simulation_executor
+    with _simulation_executor_lock:
+        if _simulation_executor is None:
+            options = getattr(settings, 'SIMULATION_EXECUTOR', {})
+            _simulation_executor = SimulationExecutor(
+                options.get('MAX_WORKERS', DEFAULT_MAX_WORKERS),
+                options.get('MAX_PENDING', DEFAULT_MAX_PENDING),
+                options.get('TIMEOUT', DEFAULT_TIMEOUT),
+            )
+        return _simulation_executor
@@ -0,0 +1,119 @@
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import SimulationJob
+from .views import SimulationBudget, build_simulator, collect_metrics
+from ProgramParser import parse_program
+
+
+# Padrões da fila de jobs (settings.SIMULATION_JOBS sobrescreve; MAX_CYCLES fica em views)
+DEFAULT_PROGRESS_INTERVAL = 0.5  # Segundos entre atualizações de progresso no banco
+STALE_JOB_AFTER = timedelta(minutes=1)  # Job "executando" sem heartbeat: worker morreu
+
+# Colunas da tabela de instruções no resultado
+RESULT_COLUMNS = ('id', 'op', 'dest', 'src1', 'src2', 'issue', 'exec_start', 'exec_end',
+                  'write', 'commit', 'squashed')
+
+
+def get_job_option(name, default):
+    return getattr(settings, 'SIMULATION_JOBS', {}).get(name, default)
+
+
+def claim_next_job():
+    """Pega o job mais antigo da fila (o UPDATE condicional evita dois workers no mesmo job)"""
+    queued = SimulationJob.objects.filter(status=SimulationJob.QUEUED).values_list('id', flat=True)[:10]
+    for job_id in queued:
+        now = timezone.now()
+        claimed = SimulationJob.objects.filter(pk=job_id, status=SimulationJob.QUEUED).update(
+            status=SimulationJob.RUNNING, started_at=now, updated_at=now)
+        if claimed:
+            return SimulationJob.objects.defer('result').get(pk=job_id)
+    return None
+
+
+def requeue_stale_jobs():
+    """Devolve à fila jobs de workers que pararam no meio (sem heartbeat recente)"""
+    return SimulationJob.objects.filter(
+        status=SimulationJob.RUNNING, updated_at__lt=timezone.now() - STALE_JOB_AFTER
+    ).update(status=SimulationJob.QUEUED, started_at=None, cycle=0, committed_count=0, squashed_count=0)
+
+
+def report_progress(job, simulator):
+    """Grava o progresso; retorna False se o job foi cancelado nesse meio tempo"""
+    total = len(simulator.get_all_instructions())
+    squashed = simulator.get_total_squashed()
+    return SimulationJob.objects.filter(pk=job.pk, status=SimulationJob.RUNNING).update(
+        cycle=simulator.get_current_clock(),
+        committed_count=total - simulator.live_instruction_count - squashed,
+        squashed_count=squashed,
+        updated_at=timezone.now(),
+    ) > 0
+
+
+def build_result(simulator, instructions, truncation):
+    """Resultado do job: métricas finais + tempos de cada instrução, em JSON gzip"""
+    rows = [
+        [instr.get_id(), instr.get_op().value, instr.get_dest(), instr.get_src1(), instr.get_src2(),
+         instr.get_issue_cycle(), instr.get_start_exec_cycle(), instr.get_end_exec_cycle(),
+         instr.get_write_result_cycle(), instr.get_commit_cycle(), instr.is_squashed()]
+        for instr in instructions
+    ]
+    result = {
+        'metrics': collect_metrics(simulator, instructions, truncation),
+        'columns': RESULT_COLUMNS,
+        'instructions': rows,
+    }
+    return gzip.compress(json.dumps(result, separators=(',', ':')).encode())
+
+
+def run_job(job):
+    """Executa um job já marcado como 'running' até o fim, cancelamento ou limite de ciclos"""
+    program = parse_program(job.program)
+    instructions = program.build_instructions()
+    simulator = build_simulator(job.config, checkpoint_interval=0)  # Sem seek: memória constante
+    simulator.set_instructions(instructions, program.register_names)
+    budget = SimulationBudget(job.max_cycles, None)
+
+    progress_interval = get_job_option('PROGRESS_INTERVAL', DEFAULT_PROGRESS_INTERVAL)
+    next_report = time.monotonic() + progress_interval
+
+    while not simulator.is_simulation_finished() and budget.allows(simulator):
+        simulator.next_cycle()
+        simulator.get_current_speculative_count()  # Amostra o máximo como a API síncrona
+        if time.monotonic() >= next_report:
+            if not report_progress(job, simulator):
+                return  # Cancelado pelo usuário
+            next_report = time.monotonic() + progress_interval
+
+    if not report_progress(job, simulator):
+        return
+    SimulationJob.objects.filter(pk=job.pk, status=SimulationJob.RUNNING).update(
+        status=SimulationJob.DONE,
+        result=build_result(simulator, instructions, budget.truncation),
+        finished_at=timezone.now(),
+    )
+
+
+def worker_loop(poll_interval=1.0, exit_when_idle=False):
+    """Laço de um processo worker: pega jobs da fila e executa um por vez"""
+    requeue_stale_jobs()
+    while True:
+        close_old_connections()
+        job = claim_next_job()
+        if job is None:
+            if exit_when_idle:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            run_job(job)
+        except Exception as e:
+            SimulationJob.objects.filter(pk=job.pk).update(
+                status=SimulationJob.FAILED, error=str(e), finished_at=timezone.now())
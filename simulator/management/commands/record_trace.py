@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from simulator.views import DEFAULT_MAX_CYCLES, SIMULATOR_DEFAULTS, build_simulator
+from ProgramParser import parse_program
+from SimulationTrace import TraceRecorder
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula um programa e grava o trace binário colunar (SimulationTrace), "
+        "que o TraceReader lê para reconstruir qualquer ciclo sem re-simular."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('program', help="Arquivo do programa (mesmo formato de exemplo_especulacao.txt)")
+        parser.add_argument('-o', '--output', required=True, help="Arquivo de saída do trace")
+        parser.add_argument('--compress', action='store_true',
+                            help="Comprime as colunas com zlib (menor, mas sem leitura via mmap)")
+        parser.add_argument('--max-cycles', type=int, default=DEFAULT_MAX_CYCLES,
+                            help=f"Limite de ciclos (padrão: {DEFAULT_MAX_CYCLES})")
+        for key, default in SIMULATOR_DEFAULTS.items():
+            option_type = str if isinstance(default, str) else int
+            parser.add_argument('--' + key.replace('_', '-'), dest=key, type=option_type, default=default,
+                                help=f"Padrão: {default}")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['program']) as program_file:
+                program = parse_program(program_file.read())
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler o programa: {e}")
+        if not len(program):
+            raise CommandError("Nenhuma instrução válida encontrada no programa")
+
+        try:
+            # O trace já permite reconstruir qualquer ciclo: os checkpoints de seek ficam desligados
+            simulator = build_simulator({key: options[key] for key in SIMULATOR_DEFAULTS},
+                                        checkpoint_interval=0)
+        except ValueError as e:
+            raise CommandError(str(e))
+        simulator.set_instructions(program.build_instructions(), program.register_names)
+
+        recorder = TraceRecorder(simulator).run(options['max_cycles'])
+        recorder.save(options['output'], compress=options['compress'])
+
+        self.stderr.write(
+            f"{simulator.get_current_clock()} ciclos gravados em {options['output']} "
+            f"({len(recorder.events['ev_cycle'])} eventos)"
+        )
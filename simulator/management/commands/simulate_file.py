@@ -0,0 +1,96 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simulator.views import SIMULATOR_DEFAULTS, build_simulator
+from Instruction import Op
+from InstructionStream import DEFAULT_FETCH_WINDOW, InstructionStream, ProgramStream
+from ProgramParser import parse_program
+
+
+# Opção de latência de cada operação
+OP_LATENCY_KEYS = {
+    Op.ADD: 'latency_add', Op.SUB: 'latency_add', Op.MUL: 'latency_mul', Op.DIV: 'latency_div',
+    Op.LD: 'latency_load', Op.ST: 'latency_store', Op.BEQ: 'latency_branch', Op.BNE: 'latency_branch',
+}
+
+
+def format_prediction_stats(stats):
+    """Linhas das métricas de predição de desvio"""
+    accuracy = f"{stats['accuracy'] * 100:.1f}%" if stats['accuracy'] is not None else "-"
+    return (
+        f"Preditor: {stats['predictor']}\n"
+        f"Branches: {stats['branches']} (acerto {accuracy}, {stats['mispredictions']} erros)\n"
+        f"Penalidade de erros: {stats['mispredict_penalty_cycles']} ciclos\n"
+        f"Issues desperdiçados: {stats['wasted_issue_slots']}"
+    )
+
+
+def format_memory_stats(stats):
+    """Linhas das métricas do modelo de memória"""
+    return (
+        f"Modelo de memória: {stats['model']}\n"
+        f"Loads encaminhados: {stats['forwarded_loads']}\n"
+        f"Replays de memória: {stats['replays']} ({stats['replay_penalty_cycles']} ciclos)"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula um programa lendo as instruções do arquivo sob demanda (mmap), "
+        "sem carregá-lo inteiro na memória. Para traces dinâmicos muito grandes. "
+        "Com --loops o arquivo é um programa estático executado com laços."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('program', help="Arquivo do programa (mesmo formato de exemplo_especulacao.txt)")
+        parser.add_argument('--max-cycles', type=int, default=None, help="Limite de ciclos (padrão: sem limite)")
+        parser.add_argument('--fetch-window', type=int, default=DEFAULT_FETCH_WINDOW,
+                            help=f"Instruções lidas do arquivo por vez (padrão: {DEFAULT_FETCH_WINDOW})")
+        parser.add_argument('--loops', action='store_true',
+                            help="Executa o arquivo como programa estático: os branches (inclusive para trás) "
+                                 "desviam o fetch e cada execução cria uma instância nova (exige --branch-predictor)")
+        for key, default in SIMULATOR_DEFAULTS.items():
+            option_type = str if isinstance(default, str) else int
+            parser.add_argument('--' + key.replace('_', '-'), dest=key, type=option_type, default=default,
+                                help=f"Padrão: {default}")
+
+    def handle(self, *args, **options):
+        config = {key: options[key] for key in SIMULATOR_DEFAULTS}
+        latencies = {op: options[key] for op, key in OP_LATENCY_KEYS.items()}
+        try:
+            simulator = build_simulator(config)
+            if options['loops']:
+                with open(options['program']) as program_file:
+                    stream = ProgramStream(parse_program(program_file.read()), latencies)
+            else:
+                stream = InstructionStream(options['program'], latencies, options['fetch_window'])
+            simulator.set_instruction_stream(stream)
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler o programa: {e}")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        start = time.monotonic()
+        with stream:
+            max_cycles = options['max_cycles']
+            while not simulator.is_simulation_finished():
+                if max_cycles is not None and simulator.get_current_clock() >= max_cycles:
+                    break
+                simulator.next_cycle()
+
+            total = stream.get_fetched_count()
+            squashed = simulator.get_total_squashed()
+            self.stdout.write(
+                f"Ciclos: {simulator.get_current_clock()}\n"
+                f"IPC: {simulator.calculate_ipc():.4f}\n"
+                f"Bolhas: {simulator.get_bubble_cycles()}\n"
+                f"Instruções lidas: {total}\n"
+                f"Comitadas: {total - simulator.live_instruction_count - squashed}\n"
+                f"Descartadas: {squashed}\n"
+                f"Máximo em memória: {stream.get_max_resident()} instruções\n"
+                f"{format_prediction_stats(simulator.get_branch_prediction_stats())}\n"
+                f"{format_memory_stats(simulator.get_memory_stats())}\n"
+                f"Concluída: {'sim' if simulator.is_simulation_finished() else 'não (limite de ciclos)'}"
+            )
+        self.stderr.write(f"Tempo: {time.monotonic() - start:.1f}s")
@@ -0,0 +1,54 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from simulator.jobs import get_job_option, worker_loop
+
+
+def worker_process(poll_interval, exit_when_idle):
+    """Ponto de entrada de cada processo do pool"""
+    import django
+    from django.apps import apps
+    if not apps.ready:  # Processos criados por spawn começam sem o Django configurado
+        django.setup()
+    worker_loop(poll_interval, exit_when_idle)
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa os jobs de simulação em segundo plano (/api/jobs/) num pool "
+        "local de processos, usando o banco SQLite como fila."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=get_job_option('PROCESSES', 1),
+                            help="Número de processos worker")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Segundos entre consultas à fila quando ela está vazia")
+        parser.add_argument('--once', action='store_true',
+                            help="Processa os jobs da fila e sai quando ela esvaziar")
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes < 1:
+            raise CommandError("--processes deve ser >= 1")
+
+        if processes == 1:
+            worker_loop(options['poll_interval'], options['once'])
+            return
+
+        # Cada processo abre a própria conexão com o banco
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=worker_process, args=(options['poll_interval'], options['once']))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
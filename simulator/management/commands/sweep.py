@@ -0,0 +1,173 @@
+import csv
+import itertools
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+
+from BatchSimulator import BatchSimulator, DEFAULT_CONFIG
+from ProgramParser import parse_instructions
+
+
+# Colunas de métricas na ordem em que são gravadas (depois dos parâmetros)
+METRIC_COLUMNS = (
+    'ipc', 'total_cycles', 'bubble_cycles', 'total_squashed',
+    'committed_instructions', 'finished',
+)
+
+
+def parse_grid_values(text):
+    """Valores de um eixo da grade: '2', '1,2,4' ou intervalos '1-8' (inclusivo)"""
+    values = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            low, high = part.split('-', 1)
+            low, high = int(low), int(high)
+            if high < low:
+                raise ValueError(f"Intervalo inválido: {part}")
+            values.extend(range(low, high + 1))
+        else:
+            values.append(int(part))
+    if not values or min(values) < 1:
+        raise ValueError(f"Valores devem ser inteiros >= 1: {text}")
+    return list(dict.fromkeys(values))
+
+
+def build_grid(axes):
+    """Produto cartesiano dos eixos: uma configuração por combinação"""
+    keys = list(axes)
+    for combination in itertools.product(*(axes[key] for key in keys)):
+        yield dict(zip(keys, combination))
+
+
+def simulate_chunk(instructions, configs, max_cycles):
+    """Executado em cada processo: simula um bloco de configurações em lote"""
+    metrics = BatchSimulator(instructions, configs, max_cycles).get_metrics()
+    return [dict(config, **metric) for config, metric in zip(configs, metrics)]
+
+
+class CsvWriter:
+    """Grava as linhas em CSV à medida que os blocos terminam"""
+
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline='') if path != '-' else sys.stdout
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class ParquetWriter:
+    """Grava as linhas em Parquet, um row group por bloco (requer pyarrow)"""
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise CommandError("Saída Parquet requer o pacote pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.columns = columns
+        fields = [(column, pa.int64()) for column in columns]
+        fields[columns.index('ipc')] = ('ipc', pa.float64())
+        fields[columns.index('finished')] = ('finished', pa.bool_())
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write_rows(self, rows):
+        table = self.pa.Table.from_pylist(rows, schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Varredura de parâmetros: simula um programa para toda a grade de "
+        "RSs e latências em paralelo e grava as métricas em CSV ou Parquet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('program', help="Arquivo do programa (mesmo formato de exemplo_especulacao.txt)")
+        for key, default in DEFAULT_CONFIG.items():
+            parser.add_argument(
+                '--' + key.replace('_', '-'), dest=key, default=str(default),
+                help=f"Valores para {key}: '2', '1,2,4' ou '1-8' (padrão: {default})",
+            )
+        parser.add_argument('-o', '--output', default='-',
+                            help="Arquivo de saída (.csv ou .parquet); '-' = CSV na saída padrão")
+        parser.add_argument('--format', choices=('csv', 'parquet'), default=None,
+                            help="Formato de saída (padrão: pela extensão do arquivo)")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Número de processos (padrão: número de CPUs)")
+        parser.add_argument('--chunk-size', type=int, default=256,
+                            help="Configurações simuladas juntas por tarefa (padrão: 256)")
+        parser.add_argument('--max-cycles', type=int, default=1000,
+                            help="Limite de ciclos por simulação (padrão: 1000)")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['program']) as program_file:
+                instructions = parse_instructions(program_file.read())
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler o programa: {e}")
+        if not instructions:
+            raise CommandError("Nenhuma instrução válida encontrada no programa")
+
+        try:
+            axes = {key: parse_grid_values(options[key]) for key in DEFAULT_CONFIG}
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for name in ('workers', 'chunk_size', 'max_cycles'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} deve ser >= 1")
+
+        output = options['output']
+        output_format = options['format']
+        if output_format is None:
+            output_format = 'parquet' if output.endswith('.parquet') else 'csv'
+        if output_format == 'parquet' and output == '-':
+            raise CommandError("Saída Parquet precisa de um arquivo (-o resultado.parquet)")
+
+        columns = list(DEFAULT_CONFIG) + list(METRIC_COLUMNS)
+        writer_class = ParquetWriter if output_format == 'parquet' else CsvWriter
+        writer = writer_class(output, columns)
+
+        total = 0
+        try:
+            with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+                grid = build_grid(axes)
+                pending = set()
+                exhausted = False
+                # Mantém poucos blocos em voo para a grade não ser materializada
+                # inteira; os blocos são gravados na ordem em que terminam.
+                while pending or not exhausted:
+                    while not exhausted and len(pending) < 2 * options['workers']:
+                        chunk = list(itertools.islice(grid, options['chunk_size']))
+                        if not chunk:
+                            exhausted = True
+                            break
+                        pending.add(executor.submit(simulate_chunk, instructions, chunk, options['max_cycles']))
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        rows = future.result()
+                        writer.write_rows(rows)
+                        total += len(rows)
+        finally:
+            writer.close()
+
+        self.stderr.write(f"{total} configurações simuladas ({len(instructions)} instruções)")
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:18
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Executando'), ('done', 'Concluído'), ('failed', 'Falhou'), ('cancelled', 'Cancelado')], db_index=True, default='queued', max_length=16)),
+                ('program', models.TextField()),
+                ('config', models.JSONField(default=dict)),
+                ('max_cycles', models.PositiveBigIntegerField()),
+                ('total_instructions', models.PositiveIntegerField(default=0)),
+                ('cycle', models.PositiveBigIntegerField(default=0)),
+                ('committed_count', models.PositiveIntegerField(default=0)),
+                ('squashed_count', models.PositiveIntegerField(default=0)),
+                ('result', models.BinaryField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -1,3 +1,54 @@
+import uuid
+
 from django.db import models
 
-# Create your models here.
+
+class SimulationJob(models.Model):
+    """Simulação longa executada em segundo plano (ver simulator/jobs.py).
+
+    O worker (python manage.py simulation_worker) pega os jobs da fila,
+    atualiza o progresso periodicamente e grava o resultado comprimido.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Na fila'),
+        (RUNNING, 'Executando'),
+        (DONE, 'Concluído'),
+        (FAILED, 'Falhou'),
+        (CANCELLED, 'Cancelado'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    program = models.TextField()
+    config = models.JSONField(default=dict)
+    max_cycles = models.PositiveBigIntegerField()
+
+    # Progresso (atualizado pelo worker durante a execução)
+    total_instructions = models.PositiveIntegerField(default=0)
+    cycle = models.PositiveBigIntegerField(default=0)
+    committed_count = models.PositiveIntegerField(default=0)
+    squashed_count = models.PositiveIntegerField(default=0)
+
+    # Resultado: JSON comprimido com gzip (métricas + tempos de cada instrução)
+    result = models.BinaryField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Heartbeat do worker
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Job {self.id} ({self.status})"
+
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED, self.CANCELLED)
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def result_key(instructions, config, variant=''):
+    """Hash normalizado do programa já parseado + configuração efetiva.
+
+    Programas que diferem só em comentários ou espaços geram a mesma lista
+    de instruções e, portanto, a mesma chave.
+    """
+    program = [
+        (instr.get_op().value, instr.get_dest(), instr.get_src1(), instr.get_src2(),
+         instr.get_original_latency(), instr.get_branch_target_id())
+        for instr in instructions
+    ]
+    payload = json.dumps([program, sorted(config.items()), variant], separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Cache de respostas de simulação com contadores de acertos/falhas.
+
+    Os valores são os bytes da resposta, guardados comprimidos (zlib).
+    Subclasses implementam load/store no backend.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        data = self.load(key)
+        with self.lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return zlib.decompress(data) if data is not None else None
+
+    def set(self, key, content):
+        self.store(key, zlib.compress(content, 1))
+
+    def load(self, key):
+        raise NotImplementedError
+
+    def store(self, key, data):
+        raise NotImplementedError
+
+    def get_stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'backend': type(self).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+class DjangoResultCache(ResultCache):
+    """Usa um alias de CACHES (o limite de tamanho é o MAX_ENTRIES do alias)"""
+
+    def __init__(self, alias):
+        super().__init__()
+        self.cache = caches[alias]
+
+    def load(self, key):
+        return self.cache.get('result:' + key)
+
+    def store(self, key, data):
+        self.cache.set('result:' + key, data, timeout=None)
+
+
+class DiskResultCache(ResultCache):
+    """Um arquivo por resultado; acima de max_entries remove os menos usados"""
+
+    def __init__(self, directory, max_entries):
+        super().__init__()
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + '.json.z')
+
+    def load(self, key):
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as result_file:
+                data = result_file.read()
+        except OSError:
+            return None
+        os.utime(path)  # Marca como usado recentemente (LRU pelo mtime)
+        return data
+
+    def store(self, key, data):
+        path = self.path_for(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as result_file:
+            result_file.write(data)
+        os.replace(temp_path, path)  # Escrita atômica: leitores nunca veem arquivo parcial
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json.z'):
+                try:
+                    entries.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+                except OSError:
+                    continue
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, name in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Cache configurado em settings.SIMULATION_RESULT_CACHE (None = desligado)"""
+    global _result_cache
+    options = getattr(settings, 'SIMULATION_RESULT_CACHE', None)
+    if not options:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            backend = options.get('BACKEND', 'django')
+            if backend == 'django':
+                _result_cache = DjangoResultCache(options.get('ALIAS', 'default'))
+            elif backend == 'disk':
+                _result_cache = DiskResultCache(options['LOCATION'], options.get('MAX_ENTRIES', 256))
+            else:
+                raise ValueError(f"Backend de cache desconhecido: {backend}")
+        return _result_cache
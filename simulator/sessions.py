@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+# Padrões das sessões de simulação (settings.SIMULATION_SESSIONS sobrescreve)
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_TIMEOUT = 30 * 60  # Segundos sem acesso até a sessão expirar
+
+
+class SimulationSession:
+    """Simulador de uma sessão, os limites dela e o maior ciclo já simulado.
+
+    O lock serializa as requisições da mesma sessão, que usam o mesmo
+    simulador vivo.
+    """
+
+    def __init__(self, simulator, budget):
+        self.simulator = simulator
+        self.budget = budget  # SimulationBudget da criação (cada GET usa uma cópia renovada)
+        self.furthest = 0  # Até ele, voltar ou avançar é só seek
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+
+
+class SessionStore:
+    """LRU em memória do processo com os simuladores vivos das sessões.
+
+    Os simuladores ficam como objetos (sem serializar a cada acesso, como
+    um backend de cache faria). Acima de max_entries a sessão usada há mais
+    tempo sai; sessões sem acesso por timeout segundos expiram. Cada processo
+    tem o seu: com vários workers, as requisições de uma sessão precisam
+    chegar sempre ao processo que a criou.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, session_id, session):
+        with self.lock:
+            self.sessions[session_id] = session
+            self.sessions.move_to_end(session_id)
+            while len(self.sessions) > self.max_entries:
+                self.sessions.popitem(last=False)
+
+    def get(self, session_id):
+        """Sessão pelo ID (renova o prazo de inatividade); None se não existe ou expirou"""
+        now = time.monotonic()
+        with self.lock:
+            self.discard_expired(now)
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.last_access = now
+                self.sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def discard_expired(self, now):
+        """Remove as sessões sem acesso recente (as mais antigas ficam no início)"""
+        if not self.timeout:
+            return
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.last_access < self.timeout:
+                break
+            del self.sessions[session_id]
+
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Sessões configuradas em settings.SIMULATION_SESSIONS (criado no primeiro uso)"""
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            options = getattr(settings, 'SIMULATION_SESSIONS', {})
+            _session_store = SessionStore(
+                options.get('MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+                options.get('TIMEOUT', DEFAULT_TIMEOUT),
+            )
+        return _session_store
@@ -1,3 +1,484 @@
+import gzip
+import json
+import os
+import tempfile
+import tracemalloc
+
 from django.test import TestCase
 
-# Create your tests here.
+from BranchPredictor import create_predictor
+from Instruction import Instruction
+from InstructionStream import ProgramStream
+from ProgramParser import parse_program
+from SimulationTrace import TraceReader, TraceRecorder
+from StateJournal import StateJournal
+from TOMASSULLLERoriSimulator import TOMASSULLLERoriSimulator
+from .jobs import run_job
+from .models import SimulationJob
+from .sessions import SessionStore, SimulationSession
+from .views import capture_cycle_state
+
+
+# Dois branches tomados para frente (descartam 4-5 e 9) e dependências longas (MUL/DIV)
+BRANCH_PROGRAM = """
+ADD R1 R0 3
+ADD R2 R0 3
+MUL R3 R1 R2
+BEQ 6 R1 R2
+ADD R4 R3 1
+SUB R5 R4 R1
+ADD R6 R3 R1
+DIV R7 R6 R2
+BNE 10 R6 R3
+ADD R8 R7 1
+SUB R9 R6 R7
+"""
+
+# Store com endereço lento (DIV) seguido de um load do mesmo endereço
+LATE_STORE_PROGRAM = """
+ADD R1 R0 8
+ADD F2 R0 5
+DIV R3 R1 2
+ST F2 R3 0
+LD F4 0 4
+ADD F5 F4 1
+"""
+
+# Variações de configuração usadas nos testes de Step Back/seek
+SIMULATOR_VARIANTS = (
+    {},
+    {'predictor': 'two_bit'},
+    {'predictor': 'gshare', 'memory_model': 'speculative', 'issue_width': 2, 'commit_width': 2},
+    {'memory_model': 'conservative', 'rob_size': 4, 'cdb_count': 2},
+)
+
+
+def build_long_program(length):
+    """Programa sem laços com 'length' instruções (ADDs encadeados e loads)"""
+    lines = []
+    for i in range(length):
+        if i % 3:
+            lines.append(f"ADD R{i % 8 + 1} R{(i + 1) % 8 + 1} R{(i + 2) % 8 + 1}")
+        else:
+            lines.append(f"LD R{i % 8 + 1} R0 {i}")
+    return "\n".join(lines)
+
+
+def build_program_simulator(text, predictor=None, **options):
+    """Simulador com latências padrão e o programa já carregado"""
+    program = parse_program(text)
+    simulator = TOMASSULLLERoriSimulator(3, 2, 2, 1, 2, 2, 2, 10, 40, 1,
+                                         branch_predictor=create_predictor(predictor), **options)
+    simulator.set_instructions(program.build_instructions(), program.register_names)
+    return simulator
+
+
+def simulator_state(simulator):
+    """Estado comparável: o que a API mostra + registradores, contadores, preditor e memória"""
+    predictor = simulator.branch_predictor
+    return (
+        capture_cycle_state(simulator),
+        simulator.get_register_file().capture_state(),
+        simulator.get_branch_prediction_stats(),
+        simulator.get_memory_stats(),
+        predictor.capture_state() if predictor is not None else None,
+        simulator.get_data_memory().capture_state(),
+    )
+
+
+def linear_states(text, **options):
+    """Estado de cada ciclo de uma execução do início ao fim, sem voltar"""
+    simulator = build_program_simulator(text, **options)
+    states = [simulator_state(simulator)]
+    while not simulator.is_simulation_finished():
+        simulator.next_cycle()
+        states.append(simulator_state(simulator))
+    return states
+
+
+class SimulationJobTests(TestCase):
+    def test_large_job_runs_with_bounded_memory(self):
+        """Um job longo não guarda checkpoints: a memória não cresce com ciclos x programa"""
+        length = 20000
+        job = SimulationJob.objects.create(
+            program=build_long_program(length), config={}, max_cycles=1_000_000,
+            total_instructions=length, status=SimulationJob.RUNNING,
+        )
+
+        tracemalloc.start()
+        try:
+            run_job(job)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SimulationJob.DONE)
+        result = json.loads(gzip.decompress(job.result))
+        self.assertEqual(len(result['instructions']), length)
+        self.assertIsNone(result['metrics']['truncation'])
+        # Com checkpoints a cada 50 ciclos o pico passava de 2 GB
+        self.assertLess(peak, 64 * 1024 * 1024)
+
+
+class SessionStoreTests(TestCase):
+    def test_keeps_live_simulators_and_evicts_least_recently_used(self):
+        store = SessionStore(max_entries=2, timeout=None)
+        simulators = [object(), object(), object()]
+        store.add('a', SimulationSession(simulators[0], None))
+        store.add('b', SimulationSession(simulators[1], None))
+        self.assertIs(store.get('a').simulator, simulators[0])  # Mesmo objeto, sem cópia
+
+        store.add('c', SimulationSession(simulators[2], None))
+        self.assertIsNone(store.get('b'))
+        self.assertIsNotNone(store.get('a'))
+        self.assertIsNotNone(store.get('c'))
+
+    def test_expires_idle_sessions(self):
+        store = SessionStore(max_entries=8, timeout=60)
+        store.add('a', SimulationSession(object(), None))
+        store.get('a').last_access -= 61
+        self.assertIsNone(store.get('a'))
+
+
+class SessionApiTests(TestCase):
+    def test_session_enforces_the_limits_it_was_created_with(self):
+        response = self.client.post('/api/sessions/', json.dumps({'program': BRANCH_PROGRAM, 'max_cycles': 10}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        session = response.json()
+        self.assertEqual(session['max_cycles'], 10)
+
+        response = self.client.get(f"/api/sessions/{session['session_id']}/cycles/50/")
+        data = response.json()
+        self.assertEqual(data['cycle']['clock'], 10)
+        self.assertEqual(data['truncation']['reason'], 'max_cycles')
+        self.assertEqual(data['truncation']['max_cycles'], 10)
+
+        # Voltar dentro do limite continua valendo
+        data = self.client.get(f"/api/sessions/{session['session_id']}/cycles/4/").json()
+        self.assertEqual(data['cycle']['clock'], 4)
+        self.assertIsNone(data['truncation'])
+
+
+class MemoryModelTests(TestCase):
+    STORE_LOAD = "ADD R2 R0 4\nADD F3 R0 7\nST F3 0 R2\nLD F1 0 R2"
+
+    def test_store_and_load_use_the_same_register_offset(self):
+        for model in ('conservative', 'speculative'):
+            with self.subTest(model=model):
+                simulator = build_program_simulator(self.STORE_LOAD, memory_model=model)
+                simulator.run_to_end()
+                self.assertEqual(simulator.data_memory.read(4), 7.0)
+                self.assertEqual(simulator.data_memory.read(0), 0.0)
+                self.assertEqual(simulator.get_register_file().get_registers()['F1'].get_value(), 7.0)
+
+    def test_load_forwards_from_store_with_register_offset(self):
+        simulator = build_program_simulator(self.STORE_LOAD, memory_model='speculative')
+        simulator.run_to_end()
+        stats = simulator.get_memory_stats()
+        self.assertEqual(stats['forwarded_loads'], 1)
+        self.assertEqual(stats['replays'], 0)
+        load = simulator.get_all_instructions()[3]
+        self.assertEqual(load.get_forwarded_from(), 2)
+
+    def test_rejects_store_with_register_base_and_offset(self):
+        with self.assertRaises(ValueError):
+            build_program_simulator("ST F3 R1 R2", memory_model='conservative')
+
+    def test_speculative_load_is_replayed_after_late_store(self):
+        simulator = build_program_simulator(LATE_STORE_PROGRAM, memory_model='speculative')
+        simulator.run_to_end()
+        stats = simulator.get_memory_stats()
+        self.assertEqual(stats['replays'], 1)
+        self.assertGreater(stats['replay_penalty_cycles'], 0)
+        registers = simulator.get_register_file().get_registers()
+        self.assertEqual(registers['F4'].get_value(), 5.0)
+        self.assertEqual(registers['F5'].get_value(), 6.0)
+
+    def test_conservative_load_waits_for_store_address(self):
+        simulator = build_program_simulator(LATE_STORE_PROGRAM, memory_model='conservative')
+        simulator.run_to_end()
+        self.assertEqual(simulator.get_memory_stats()['replays'], 0)
+        store, load = simulator.get_all_instructions()[3:5]
+        self.assertGreaterEqual(load.get_start_exec_cycle(), store.get_end_exec_cycle())
+        self.assertEqual(simulator.get_register_file().get_registers()['F4'].get_value(), 5.0)
+
+    def test_original_mode_does_not_touch_memory(self):
+        simulator = build_program_simulator(LATE_STORE_PROGRAM)
+        simulator.run_to_end()
+        self.assertEqual(simulator.get_register_file().get_registers()['F4'].get_value(), 4.0)
+        self.assertEqual(simulator.get_memory_stats()['pages'], 0)
+
+    def test_squashed_store_does_not_write(self):
+        program = "ADD F1 R0 9\nBEQ 3 R0 R0\nST F1 0 4\nLD F2 0 4"
+        for model in ('conservative', 'speculative'):
+            with self.subTest(model=model):
+                simulator = build_program_simulator(program, memory_model=model)
+                simulator.run_to_end()
+                self.assertTrue(simulator.get_all_instructions()[2].is_squashed())
+                self.assertEqual(simulator.data_memory.read(4), 0.0)
+                self.assertEqual(simulator.get_register_file().get_registers()['F2'].get_value(), 0.0)
+
+
+class StepBackTests(TestCase):
+    def test_step_back_restores_every_cycle(self):
+        for options in SIMULATOR_VARIANTS:
+            for program in (BRANCH_PROGRAM, LATE_STORE_PROGRAM):
+                with self.subTest(options=options, program=program.split()[0:4]):
+                    expected = linear_states(program, **options)
+                    simulator = build_program_simulator(program, **options)
+                    simulator.run_to_end()
+                    self.assertEqual(simulator_state(simulator), expected[-1])
+
+                    for cycle in range(len(expected) - 2, -1, -1):
+                        self.assertTrue(simulator.restore_previous_state())
+                        self.assertEqual(simulator.get_current_clock(), cycle)
+                        self.assertEqual(simulator_state(simulator), expected[cycle])
+                    self.assertFalse(simulator.can_step_back())
+                    self.assertFalse(simulator.restore_previous_state())
+
+    def test_runs_forward_again_after_step_back(self):
+        expected = linear_states(BRANCH_PROGRAM, predictor='two_bit')
+        simulator = build_program_simulator(BRANCH_PROGRAM, predictor='two_bit')
+        for _ in range(25):
+            simulator.next_cycle()
+        for _ in range(10):
+            simulator.restore_previous_state()
+
+        self.assertEqual(simulator_state(simulator), expected[15])
+        simulator.run_to_end()
+        self.assertEqual(simulator_state(simulator), expected[-1])
+
+    def test_history_can_be_disabled(self):
+        simulator = build_program_simulator(BRANCH_PROGRAM, keep_history=False)
+        simulator.next_cycle()
+        self.assertFalse(simulator.can_step_back())
+        self.assertFalse(simulator.restore_previous_state())
+
+
+class SeekTests(TestCase):
+    def test_seek_matches_linear_run(self):
+        for options in SIMULATOR_VARIANTS:
+            for program in (BRANCH_PROGRAM, LATE_STORE_PROGRAM):
+                with self.subTest(options=options, program=program.split()[0:4]):
+                    expected = linear_states(program, **options)
+                    last = len(expected) - 1
+                    simulator = build_program_simulator(program, keep_history=False,
+                                                        checkpoint_interval=7, **options)
+                    for cycle in (last, 3, 40, 0, 21, 14, last - 1, 8, last):
+                        self.assertEqual(simulator.seek(cycle), cycle)
+                        self.assertEqual(simulator_state(simulator), expected[cycle])
+
+    def test_seek_past_the_end_stops_at_the_last_cycle(self):
+        expected = linear_states(BRANCH_PROGRAM)
+        simulator = build_program_simulator(BRANCH_PROGRAM)
+        self.assertEqual(simulator.seek(10_000), len(expected) - 1)
+        self.assertTrue(simulator.is_simulation_finished())
+
+    def test_step_back_without_journal_uses_checkpoints(self):
+        expected = linear_states(BRANCH_PROGRAM, predictor='two_bit')
+        simulator = build_program_simulator(BRANCH_PROGRAM, predictor='two_bit',
+                                            keep_history=False, checkpoint_interval=10)
+        simulator.run_to_end()
+        for cycle in range(len(expected) - 2, len(expected) - 15, -1):
+            self.assertTrue(simulator.restore_previous_state())
+            self.assertEqual(simulator_state(simulator), expected[cycle])
+
+    def test_checkpoints_default_to_history_setting(self):
+        self.assertEqual(build_program_simulator(BRANCH_PROGRAM).checkpoint_interval,
+                         TOMASSULLLERoriSimulator.DEFAULT_CHECKPOINT_INTERVAL)
+        simulator = build_program_simulator(BRANCH_PROGRAM, keep_history=False)
+        simulator.run_to_end()
+        self.assertEqual(simulator.checkpoints, {})
+        self.assertFalse(simulator.can_step_back())
+
+    def test_checkpoints_hold_only_uncommitted_instructions(self):
+        simulator = build_program_simulator(BRANCH_PROGRAM, checkpoint_interval=5)
+        simulator.run_to_end()
+        self.assertGreater(len(simulator.checkpoints), 5)
+        commit_field = Instruction.STATE_FIELDS.index('commit_cycle')
+        for snapshot in simulator.checkpoints.values():
+            for instr, values in snapshot[1]:
+                self.assertEqual(values[commit_field], -1)  # Comitadas ficam em committed_states
+
+
+class SimulationTraceTests(TestCase):
+    def record(self, program, path, compress, **options):
+        """Grava o trace em path e devolve capture_cycle_state de cada ciclo da execução"""
+        simulator = build_program_simulator(program, keep_history=False, **options)
+        recorder = TraceRecorder(simulator)
+        states = [capture_cycle_state(simulator)]
+        while not simulator.is_simulation_finished():
+            simulator.next_cycle()
+            recorder.record_cycle()
+            states.append(capture_cycle_state(simulator))
+        recorder.save(path, compress=compress)
+        return states
+
+    def test_reader_reconstructs_every_cycle(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'simulacao.trace')
+            for options in SIMULATOR_VARIANTS:
+                for compress in (False, True):
+                    with self.subTest(options=options, compress=compress):
+                        states = self.record(BRANCH_PROGRAM, path, compress, **options)
+                        with TraceReader(path) as reader:
+                            self.assertEqual(reader.get_cycle_count(), len(states))
+                            for cycle in (len(states) - 1, 0, 17, 5, 33):
+                                self.assertEqual(capture_cycle_state(reader.get_cycle(cycle)), states[cycle])
+
+    def test_run_stops_at_max_cycles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'simulacao.trace')
+            simulator = build_program_simulator(BRANCH_PROGRAM)
+            TraceRecorder(simulator).run(20).save(path)
+            with TraceReader(path) as reader:
+                self.assertEqual(reader.get_cycle_count(), 21)
+                self.assertEqual(reader.get_cycle(20).get_current_clock(), 20)
+
+    def test_recording_must_start_at_cycle_zero(self):
+        simulator = build_program_simulator(BRANCH_PROGRAM)
+        simulator.next_cycle()
+        with self.assertRaises(ValueError):
+            TraceRecorder(simulator)
+
+    def test_rejects_files_that_are_not_traces(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'programa.txt')
+            with open(path, 'w') as trace_file:
+                trace_file.write(BRANCH_PROGRAM)
+            with self.assertRaises(ValueError):
+                TraceReader(path)
+
+
+class BranchPredictorTests(TestCase):
+    def count_mispredictions(self, predictor, outcomes, pc=3):
+        journal = StateJournal(False)
+        mispredictions = 0
+        for taken in outcomes:
+            if predictor.predict(pc, 0) != taken:
+                mispredictions += 1
+            predictor.update(pc, taken, journal)
+        return mispredictions
+
+    def test_counters_on_a_repeating_pattern(self):
+        pattern = [True, True, True, False] * 4
+        self.assertEqual(self.count_mispredictions(create_predictor('static'), pattern), 4)
+        self.assertEqual(self.count_mispredictions(create_predictor('static_not_taken'), pattern), 12)
+        # 1 bit erra a volta e a saída; 2 bits só erra a primeira volta e as saídas
+        self.assertEqual(self.count_mispredictions(create_predictor('one_bit'), pattern), 8)
+        self.assertEqual(self.count_mispredictions(create_predictor('two_bit'), pattern), 5)
+
+    def test_gshare_learns_an_alternating_branch(self):
+        predictor = create_predictor('gshare', history_bits=2)
+        pattern = [True, False] * 40
+        self.count_mispredictions(predictor, pattern[:40])
+        self.assertEqual(self.count_mispredictions(predictor, pattern[40:]), 0)
+
+    def test_journal_undoes_training(self):
+        predictor = create_predictor('two_bit', table_size=16)
+        journal = StateJournal(True)
+        before = predictor.capture_state()
+        journal.begin_cycle()
+        predictor.update(3, True, journal)
+        self.assertNotEqual(predictor.capture_state(), before)
+        journal.undo_cycle()
+        self.assertEqual(predictor.capture_state(), before)
+
+    def test_invalid_predictor_name(self):
+        with self.assertRaises(ValueError):
+            create_predictor('perceptron')
+
+    def test_accuracy_and_penalty_in_the_simulator(self):
+        """Os dois branches de BRANCH_PROGRAM são tomados"""
+        taken = build_program_simulator(BRANCH_PROGRAM, predictor='static')
+        taken.run_to_end()
+        stats = taken.get_branch_prediction_stats()
+        self.assertEqual((stats['branches'], stats['mispredictions'], stats['accuracy']), (2, 0, 1.0))
+        self.assertEqual(stats['mispredict_penalty_cycles'], 0)
+
+        not_taken = build_program_simulator(BRANCH_PROGRAM, predictor='static_not_taken')
+        not_taken.run_to_end()
+        stats = not_taken.get_branch_prediction_stats()
+        self.assertEqual((stats['branches'], stats['mispredictions'], stats['accuracy']), (2, 2, 0.0))
+        self.assertGreater(stats['mispredict_penalty_cycles'], 0)
+        self.assertGreater(stats['wasted_issue_slots'], 0)
+        self.assertGreater(not_taken.get_current_clock(), taken.get_current_clock())
+
+    def test_mispredicted_path_is_rewound(self):
+        """Com qualquer preditor, os registradores escritos são os do modo original"""
+        legacy = build_program_simulator(BRANCH_PROGRAM)
+        legacy.run_to_end()
+        written = {instr.get_dest() for instr in legacy.get_all_instructions() if not instr.is_squashed()}
+        expected_values = {name: status.get_value()
+                           for name, status in legacy.get_register_file().get_registers().items()
+                           if name in written}
+        for predictor in ('static', 'static_not_taken', 'one_bit', 'two_bit', 'gshare', 'tournament'):
+            with self.subTest(predictor=predictor):
+                simulator = build_program_simulator(BRANCH_PROGRAM, predictor=predictor)
+                simulator.run_to_end()
+                values = {name: status.get_value()
+                          for name, status in simulator.get_register_file().get_registers().items()
+                          if name in written}
+                self.assertEqual(values, expected_values)
+                squashed = [instr.get_id() for instr in simulator.get_all_instructions() if instr.is_squashed()]
+                self.assertEqual(squashed, [4, 5, 9])
+                for instr in simulator.get_all_instructions():
+                    self.assertNotEqual(instr.get_commit_cycle() == -1, not instr.is_squashed())
+                self.assertEqual(simulator.get_current_speculative_count(), 0)
+
+
+class ProgramStreamTests(TestCase):
+    # R3 = soma de 2 * i para i = 1..n; o BNE volta para o índice 3 enquanto R1 != R2
+    LOOP_PROGRAM = """
+ADD R2 R0 {iterations}
+ADD R1 R0 0
+ADD R3 R0 0
+ADD R1 R1 1
+MUL R4 R1 2
+ADD R3 R3 R4
+BNE 3 R1 R2
+ADD R5 R3 0
+"""
+
+    def run_loop(self, iterations, predictor, **options):
+        simulator = TOMASSULLLERoriSimulator(3, 2, 2, 1, 2, 2, 2, 10, 40, 1,
+                                             branch_predictor=create_predictor(predictor), **options)
+        simulator.set_instruction_stream(ProgramStream(parse_program(
+            self.LOOP_PROGRAM.format(iterations=iterations))))
+        simulator.run_to_end()
+        return simulator
+
+    def test_loop_runs_every_iteration(self):
+        for predictor in ('static', 'static_not_taken', 'one_bit', 'two_bit', 'gshare', 'tournament'):
+            for width in (1, 2):
+                with self.subTest(predictor=predictor, width=width):
+                    simulator = self.run_loop(50, predictor, issue_width=width, commit_width=width)
+                    registers = simulator.get_register_file().get_registers()
+                    self.assertEqual(registers['R1'].get_value(), 50.0)
+                    self.assertEqual(registers['R3'].get_value(), 2550.0)
+                    self.assertEqual(registers['R5'].get_value(), 2550.0)
+                    self.assertEqual(simulator.get_branch_prediction_stats()['branches'], 50)
+                    # 3 instruções antes do laço, 4 por volta e 1 depois
+                    stream = simulator.instruction_stream
+                    committed = stream.get_fetched_count() - simulator.live_instruction_count
+                    self.assertEqual(committed - simulator.get_total_squashed(), 3 + 4 * 50 + 1)
+
+    def test_mispredictions_follow_the_predictor(self):
+        expected = {'static': 1, 'static_not_taken': 49, 'one_bit': 2, 'two_bit': 2}
+        for predictor, mispredictions in expected.items():
+            with self.subTest(predictor=predictor):
+                stats = self.run_loop(50, predictor).get_branch_prediction_stats()
+                self.assertEqual(stats['mispredictions'], mispredictions)
+
+    def test_window_does_not_grow_with_iterations(self):
+        short = self.run_loop(10, 'two_bit').instruction_stream.get_max_resident()
+        long = self.run_loop(500, 'two_bit').instruction_stream.get_max_resident()
+        self.assertEqual(long, short)
+
+    def test_loops_require_a_predictor(self):
+        simulator = TOMASSULLLERoriSimulator(3, 2, 2, 1, 2, 2, 2, 10, 40, 1)
+        with self.assertRaises(ValueError):
+            simulator.set_instruction_stream(ProgramStream(parse_program(
+                self.LOOP_PROGRAM.format(iterations=3))))
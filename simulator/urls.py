@@ -4,4 +4,13 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('api/simulate/', views.simulate, name='simulate'),
+    path('api/simulate/async/', views.simulate_async, name='simulate_async'),
+    path('api/simulate/stream/', views.simulate_stream, name='simulate_stream'),
+    path('api/simulate/cache/', views.result_cache_stats, name='result_cache_stats'),
+    path('api/sessions/', views.create_session, name='create_session'),
+    path('api/sessions/<str:session_id>/', views.session_detail, name='session_detail'),
+    path('api/sessions/<str:session_id>/cycles/<int:cycle>/', views.session_cycle, name='session_cycle'),
+    path('api/jobs/', views.create_job, name='create_job'),
+    path('api/jobs/<uuid:job_id>/', views.job_detail, name='job_detail'),
+    path('api/jobs/<uuid:job_id>/result/', views.job_result, name='job_result'),
 ]
@@ -1,15 +1,48 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.conf import settings
+from django.utils import timezone
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+import asyncio
 import json
 import sys
 import os
+import time
+import uuid
 
 # Adiciona o diretório raiz ao path para importar os módulos do simulador
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from TOMASSULLLERoriSimulator import TOMASSULLLERoriSimulator
-from Instruction import Instruction, Op
+from BranchPredictor import DEFAULT_HISTORY_BITS, DEFAULT_TABLE_SIZE, create_predictor
+from ProgramParser import parse_program
+from .executor import get_simulation_executor
+from .models import SimulationJob
+from .result_cache import get_result_cache, result_key
+from .sessions import SimulationSession, get_session_store
+
+
+# Limites padrão de uma simulação (settings.SIMULATION_LIMITS sobrescreve)
+DEFAULT_MAX_CYCLES = 20000
+DEFAULT_TIME_BUDGET = 10.0  # Segundos de relógio por requisição
+DEFAULT_MAX_FULL_CYCLES = 1000  # encoding 'full' (estado completo por ciclo); além disso use 'delta'
+DEFAULT_MAX_RESPONSE_BYTES = 32 * 1024 * 1024  # Tamanho máximo dos ciclos numa resposta de /api/simulate/
+
+DEFAULT_JOB_MAX_CYCLES = 5_000_000  # Jobs em segundo plano (settings.SIMULATION_JOBS sobrescreve)
+
+# Valores usados quando a configuração enviada não traz o campo
+SIMULATOR_DEFAULTS = {
+    'rs_add': 3, 'rs_mult': 2, 'rs_store': 2, 'rs_branch': 1,
+    'latency_add': 2, 'latency_mul': 10, 'latency_div': 40,
+    'latency_load': 2, 'latency_store': 2, 'latency_branch': 1,
+    'rob_size': None,  # Vazio = um por RS, nunca limita o issue
+    'issue_width': 1, 'commit_width': 1, 'cdb_count': 1, 'cdb_arbitration': 'fu_class',
+    # 'none' = modo original (sem predição, branches sempre tomados); ver BranchPredictor.PREDICTORS
+    'branch_predictor': 'none', 'predictor_table_size': DEFAULT_TABLE_SIZE,
+    'predictor_history_bits': DEFAULT_HISTORY_BITS,
+    # 'none' = modo original (LD retorna o endereço, ST não escreve); ver MEMORY_MODELS do simulador
+    'memory_model': 'none',
+}
 
 
 def index(request):
@@ -22,70 +55,12 @@ def simulate(request):
     """API endpoint para executar a simulação"""
     if request.method == 'POST':
         try:
-            data = json.loads(request.body)
-            program_text = data.get('program', '')
-            config = data.get('config', {})
-
-            # Parse instruções
-            instructions = parse_instructions(program_text)
-
-            if not instructions:
-                return JsonResponse({'error': 'Nenhuma instrução válida encontrada'}, status=400)
-
-            # Configurar simulador
-            num_rs_add = config.get('rs_add', 3)
-            num_rs_mult = config.get('rs_mult', 2)
-            num_rs_store = config.get('rs_store', 2)
-            num_rs_branch = config.get('rs_branch', 1)
-
-            latency_add = config.get('latency_add', 2)
-            latency_mul = config.get('latency_mul', 10)
-            latency_div = config.get('latency_div', 40)
-            latency_load = config.get('latency_load', 2)
-            latency_store = config.get('latency_store', 2)
-            latency_branch = config.get('latency_branch', 1)
-
-            # Criar simulador
-            simulator = TOMASSULLLERoriSimulator(
-                num_rs_add, num_rs_mult, num_rs_store, num_rs_branch,
-                latency_add, latency_mul, latency_div, latency_load, latency_store, latency_branch
-            )
-
-            simulator.set_instructions(instructions)
-
-            # Executar simulação ciclo a ciclo
-            cycles_data = []
-            max_cycles = 1000  # Limite de segurança
-
-            # Captura estado inicial (ciclo 0)
-            initial_state = capture_cycle_state(simulator)
-            cycles_data.append(initial_state)
-
-            while not simulator.is_simulation_finished() and simulator.get_current_clock() < max_cycles:
-                simulator.next_cycle()
-                cycle_state = capture_cycle_state(simulator)
-                cycles_data.append(cycle_state)
-
-            # Métricas finais
-            total_instructions = len(instructions)
-            committed = sum(1 for i in instructions if i.get_commit_cycle() != -1 and not i.is_squashed())
-
-            metrics = {
-                'ipc': simulator.calculate_ipc(),
-                'total_cycles': simulator.get_current_clock(),
-                'bubble_cycles': simulator.get_bubble_cycles(),
-                'total_squashed': simulator.get_total_squashed(),
-                'committed_instructions': committed,
-                'total_instructions': total_instructions,
-                'max_speculative': simulator.max_speculative_count,
-                'efficiency': (committed / total_instructions * 100) if total_instructions > 0 else 0
-            }
+            job, response = prepare_simulation(json.loads(request.body))
+            if response is not None:
+                return response
 
-            return JsonResponse({
-                'success': True,
-                'cycles': cycles_data,
-                'metrics': metrics
-            })
+            content, time_truncated = run_simulation_job(job)
+            return finish_simulation(job, content, time_truncated)
 
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
@@ -93,60 +68,579 @@ def simulate(request):
     return JsonResponse({'error': 'Método não permitido'}, status=405)
 
 
-def parse_instructions(text):
-    """Parse instruções do texto"""
-    lines = text.strip().split('\n')
-    instructions = []
-    instr_id = 0
+@csrf_exempt
+async def simulate_async(request):
+    """Versão assíncrona de /api/simulate/ (para ASGI).
+
+    A simulação roda no pool de processos (simulator.executor), sem ocupar
+    a thread do servidor. Fila cheia responde 503; passar do TIMEOUT responde
+    504. Se o cliente desconectar ou o prazo acabar, a tarefa ainda na fila
+    é cancelada; a que já está rodando termina pelo próprio limite de tempo e
+    só então libera o lugar na fila.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        job, response = prepare_simulation(json.loads(request.body))
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    if response is not None:
+        return response
+
+    executor = get_simulation_executor()
+    if not executor.try_acquire():
+        response = JsonResponse({'error': 'Servidor ocupado, tente novamente em instantes'}, status=503)
+        response['Retry-After'] = '1'
+        return response
+
+    future = None
+    try:
+        future = executor.submit(run_simulation_job, job)  # Libera o lugar ao terminar
+        content, time_truncated = await asyncio.wait_for(asyncio.wrap_future(future), executor.timeout)
+        return finish_simulation(job, content, time_truncated)
+    except asyncio.TimeoutError:
+        return JsonResponse({'error': 'Tempo limite da simulação excedido'}, status=504)
+    except asyncio.CancelledError:
+        raise  # Cliente desconectou
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    finally:
+        if future is not None:
+            future.cancel()  # Sem efeito se já está rodando ou terminou
+
+
+def prepare_simulation(data):
+    """Parse do programa, configuração efetiva e consulta ao cache de resultados.
+
+    Retorna (job, None) com o que precisa ser simulado, ou (None, resposta)
+    quando a requisição já pode ser respondida (erro ou acerto no cache).
+    """
+    program = parse_program(data.get('program', ''))
+    instructions = program.build_instructions()
+
+    if not instructions:
+        return None, JsonResponse({'error': 'Nenhuma instrução válida encontrada'}, status=400)
+
+    config = effective_config(data.get('config', {}))
+    encoding = 'delta' if data.get('encoding') == 'delta' else 'full'
+    budget = SimulationBudget.from_request(data)
+    if encoding == 'full':
+        # Cada ciclo vai completo na resposta: o limite de ciclos é bem menor
+        limits = getattr(settings, 'SIMULATION_LIMITS', {})
+        budget.max_cycles = min(budget.max_cycles, limits.get('MAX_FULL_CYCLES', DEFAULT_MAX_FULL_CYCLES))
+
+    # Mesmo programa + mesma configuração = mesma resposta
+    cache_key = None
+    result_cache = get_result_cache()
+    if result_cache is not None:
+        cache_key = result_key(instructions, config, f'json:{encoding}:{budget.max_cycles}')
+        content = result_cache.get(cache_key)
+        if content is not None:
+            return None, cached_response(HttpResponse(content, content_type='application/json'), 'HIT')
+
+    job = {
+        'instructions': instructions,
+        'register_names': program.register_names,
+        'config': config,
+        'encoding': encoding,
+        'max_cycles': budget.max_cycles,
+        'time_budget': budget.time_budget,
+        'max_bytes': budget.max_bytes,
+        'cache_key': cache_key,
+    }
+    return job, None
+
+
+def run_simulation_job(job):
+    """Simula um job de prepare_simulation e retorna (corpo JSON, cortado por tempo?).
+
+    Só usa dados simples, então pode rodar em outro processo. Cada ciclo é
+    serializado logo depois de simulado, então a captura e o JSON também
+    contam no orçamento de tempo e só o texto fica em memória.
+    """
+    instructions = job['instructions']
+    budget = SimulationBudget(job['max_cycles'], job['time_budget'], job['max_bytes'])
+
+    simulator = build_simulator(job['config'])
+    simulator.set_instructions(instructions, job['register_names'])
+
+    # Executar simulação ciclo a ciclo
+    cycles = simulate_cycles(simulator, budget)
+    items = []
+    if job['encoding'] == 'delta':
+        # Ciclo 0 completo (keyframe) e depois só o que mudou em cada ciclo
+        previous = next(cycles)
+        head = {'success': True, 'encoding': 'delta', 'keyframe': previous}
+        items_key = 'deltas'
+        for current in cycles:
+            items.append(json.dumps(encode_cycle_delta(previous, current)))
+            budget.add_output(len(items[-1]))
+            previous = current
+    else:
+        head = {'success': True}
+        items_key = 'cycles'
+        for cycle_state in cycles:
+            items.append(json.dumps(cycle_state))
+            budget.add_output(len(items[-1]))
+
+    metrics = collect_metrics(simulator, instructions, budget.truncation)
+    content = (json.dumps(head)[:-1] + f', "{items_key}": [' + ', '.join(items) + '], '
+               f'"metrics": {json.dumps(metrics)}}}')
+    return content.encode(), budget.is_time_truncated()
+
+
+def finish_simulation(job, content, time_truncated):
+    """Resposta final de um job simulado (grava no cache de resultados)"""
+    response = HttpResponse(content, content_type='application/json')
+    if job['cache_key'] is not None:
+        # Corte por tempo depende da carga do servidor: não vai para o cache
+        if not time_truncated:
+            get_result_cache().set(job['cache_key'], content)
+        cached_response(response, 'MISS')
+    return response
+
+
+@csrf_exempt
+def simulate_stream(request):
+    """API endpoint que envia cada ciclo assim que é simulado (NDJSON).
+
+    Cada linha é um objeto JSON: {"type": "cycle", "cycle": {...}} por ciclo,
+    {"type": "done", "metrics": {...}} no final ou {"type": "error", ...}.
+    Com "encoding": "delta" só o ciclo 0 vai completo; os seguintes são
+    {"type": "delta", "delta": {...}} (ver encode_cycle_delta).
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        program_text = data.get('program', '')
+        config = data.get('config', {})
+
+        program = parse_program(program_text)
+        instructions = program.build_instructions()
+
+        if not instructions:
+            return JsonResponse({'error': 'Nenhuma instrução válida encontrada'}, status=400)
+
+        config = effective_config(config)
+        use_delta = data.get('encoding') == 'delta'
+        budget = SimulationBudget.from_request(data)
+
+        result_cache = get_result_cache()
+        cache_key = None
+        if result_cache is not None:
+            cache_key = result_key(instructions, config, f"ndjson:{'delta' if use_delta else 'full'}:{budget.max_cycles}")
+            content = result_cache.get(cache_key)
+            if content is not None:
+                response = StreamingHttpResponse([content], content_type='application/x-ndjson')
+                return cached_response(response, 'HIT')
+
+        simulator = build_simulator(config)
+        simulator.set_instructions(instructions, program.register_names)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+    def stream():
+        lines = []  # Guardadas para o cache quando a simulação termina sem erro
+        try:
+            previous = None
+            for cycle_state in simulate_cycles(simulator, budget):
+                if use_delta and previous is not None:
+                    message = {'type': 'delta', 'delta': encode_cycle_delta(previous, cycle_state)}
+                else:
+                    message = {'type': 'cycle', 'cycle': cycle_state}
+                previous = cycle_state
+                line = json.dumps(message) + '\n'
+                if cache_key is not None:
+                    lines.append(line)
+                yield line
+            metrics = collect_metrics(simulator, instructions, budget.truncation)
+            line = json.dumps({'type': 'done', 'metrics': metrics}) + '\n'
+            yield line
+            if cache_key is not None and not budget.is_time_truncated():
+                lines.append(line)
+                result_cache.set(cache_key, ''.join(lines).encode())
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
 
-    for line in lines:
-        line = line.strip()
-        if not line or line.startswith('#'):
-            continue
+    response = StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Evita que proxies (nginx) segurem o stream
+    if cache_key is not None:
+        cached_response(response, 'MISS')
+    return response
 
-        if '#' in line:
-            line = line.split('#')[0].strip()
 
-        parts = line.split()
-        if len(parts) < 2:
-            continue
+def cached_response(response, status):
+    """Marca a resposta com o resultado da consulta ao cache de resultados"""
+    response['X-Simulation-Cache'] = status
+    return response
 
-        op_str = parts[0].upper()
 
-        try:
-            if op_str in ['BEQ', 'BNE']:
-                # Formato: BEQ target src1 src2
-                if len(parts) >= 4:
-                    target_id = int(parts[1])
-                    src1 = parts[2]
-                    src2 = parts[3]
-                    op = Op.BEQ if op_str == 'BEQ' else Op.BNE
-                    instr = Instruction(instr_id, op, None, src1, src2, 1)
-                    instr.set_branch_target_id(target_id)
-                    instructions.append(instr)
-                    instr_id += 1
-            else:
-                # Formato: OP dest src1 src2
-                if len(parts) >= 4:
-                    dest = parts[1]
-                    src1 = parts[2]
-                    src2 = parts[3]
-                    op = Op[op_str]
-
-                    # Define latência padrão
-                    latency_map = {
-                        'ADD': 2, 'SUB': 2, 'MUL': 10,
-                        'DIV': 40, 'LD': 2, 'ST': 2
-                    }
-                    latency = latency_map.get(op_str, 2)
-
-                    instr = Instruction(instr_id, op, dest, src1, src2, latency)
-                    instructions.append(instr)
-                    instr_id += 1
-        except (KeyError, ValueError, IndexError):
-            continue
-
-    return instructions
+def result_cache_stats(request):
+    """Contadores de acertos/falhas do cache de resultados (por processo)"""
+    result_cache = get_result_cache()
+    if result_cache is None:
+        return JsonResponse({'enabled': False})
+    return JsonResponse(dict(result_cache.get_stats(), enabled=True))
+
+
+@csrf_exempt
+def create_session(request):
+    """Cria uma sessão de simulação no servidor (os ciclos são calculados sob demanda)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        program = parse_program(data.get('program', ''))
+        instructions = program.build_instructions()
+
+        if not instructions:
+            return JsonResponse({'error': 'Nenhuma instrução válida encontrada'}, status=400)
+
+        simulator = build_simulator(data.get('config', {}),
+                                    TOMASSULLLERoriSimulator.DEFAULT_CHECKPOINT_INTERVAL)
+        simulator.set_instructions(instructions, program.register_names)
+
+        session_id = uuid.uuid4().hex
+        budget = SimulationBudget.from_request(data)
+        get_session_store().add(session_id, SimulationSession(simulator, budget))
+
+        return JsonResponse({
+            'success': True,
+            'session_id': session_id,
+            'total_instructions': len(instructions),
+            'max_cycles': budget.max_cycles,
+            'cycle': capture_cycle_state(simulator)
+        }, status=201)
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+def session_detail(request, session_id):
+    """Encerra uma sessão de simulação (DELETE)"""
+    if request.method != 'DELETE':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+
+    get_session_store().delete(session_id)
+    return JsonResponse({'success': True})
+
+
+def session_cycle(request, session_id, cycle):
+    """Estado de um ciclo da sessão: avança ou volta (seek) só até o ciclo pedido"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+
+    session = get_session_store().get(session_id)
+    if session is None:
+        return JsonResponse({'error': 'Sessão não encontrada ou expirada'}, status=404)
+
+    try:
+        with session.lock:  # O simulador é o mesmo objeto para todas as requisições da sessão
+            simulator = session.simulator
+            budget = session.budget.renewed()  # Limites pedidos na criação, prazo novo
+            target = min(cycle, budget.max_cycles)
+            simulator.seek(min(target, session.furthest))
+
+            # Ciclos novos são simulados um a um, amostrando as especulativas como
+            # simulate_cycles faz (o máximo entra nas métricas finais)
+            while (simulator.get_current_clock() < target and not simulator.is_simulation_finished()
+                   and budget.allows(simulator)):
+                simulator.next_cycle()
+                simulator.get_current_speculative_count()
+            session.furthest = max(session.furthest, simulator.get_current_clock())
+            if cycle > budget.max_cycles and not simulator.is_simulation_finished():
+                budget.allows(simulator)  # Pedido além do limite de ciclos: registra o corte
+
+            finished = simulator.is_simulation_finished()
+            response = {
+                'success': True,
+                'cycle': capture_cycle_state(simulator),
+                'finished': finished,
+                'truncation': budget.truncation,
+            }
+            if finished:
+                response['metrics'] = collect_metrics(simulator, simulator.get_all_instructions())
+        return JsonResponse(response)
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+def create_job(request):
+    """Enfileira uma simulação longa para o worker (python manage.py simulation_worker)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        program_text = data.get('program', '')
+        program = parse_program(program_text)
+
+        if not len(program):
+            return JsonResponse({'error': 'Nenhuma instrução válida encontrada'}, status=400)
+
+        max_cycles = getattr(settings, 'SIMULATION_JOBS', {}).get('MAX_CYCLES', DEFAULT_JOB_MAX_CYCLES)
+        if data.get('max_cycles'):
+            max_cycles = min(max_cycles, max(1, int(data['max_cycles'])))
+
+        job = SimulationJob.objects.create(
+            program=program_text,
+            config=effective_config(data.get('config', {})),
+            max_cycles=max_cycles,
+            total_instructions=len(program),
+        )
+        return JsonResponse(job_status(job), status=202)
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+def job_detail(request, job_id):
+    """Progresso do job (GET) ou cancelamento (DELETE)"""
+    job = SimulationJob.objects.defer('result').filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'error': 'Job não encontrado'}, status=404)
+
+    if request.method == 'DELETE':
+        SimulationJob.objects.filter(
+            pk=job.pk, status__in=(SimulationJob.QUEUED, SimulationJob.RUNNING)
+        ).update(status=SimulationJob.CANCELLED, finished_at=timezone.now())
+        job.refresh_from_db(fields=['status', 'finished_at'])
+    elif request.method != 'GET':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+
+    return JsonResponse(job_status(job))
+
+
+def job_result(request, job_id):
+    """Download do resultado do job (JSON comprimido com gzip)"""
+    job = SimulationJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'error': 'Job não encontrado'}, status=404)
+    if job.status != SimulationJob.DONE:
+        return JsonResponse({'error': 'Resultado ainda não disponível', 'status': job.status}, status=409)
+
+    response = HttpResponse(bytes(job.result), content_type='application/gzip')
+    response['Content-Disposition'] = f'attachment; filename="simulacao-{job.pk}.json.gz"'
+    return response
+
+
+def job_status(job):
+    """Estado e progresso de um job, com estimativa de tempo restante"""
+    done = job.committed_count + job.squashed_count
+    elapsed = None
+    eta = None
+    if job.started_at is not None:
+        end = job.finished_at or timezone.now()
+        elapsed = (end - job.started_at).total_seconds()
+        if job.status == SimulationJob.RUNNING and done > 0:
+            # Ritmo médio até agora (instruções comitadas ou descartadas por segundo)
+            eta = elapsed * (job.total_instructions - done) / done
+
+    status = {
+        'job_id': str(job.pk),
+        'status': job.status,
+        'cycle': job.cycle,
+        'committed_instructions': job.committed_count,
+        'squashed_instructions': job.squashed_count,
+        'total_instructions': job.total_instructions,
+        'progress': done / job.total_instructions if job.total_instructions else 0.0,
+        'elapsed_seconds': elapsed,
+        'eta_seconds': eta,
+        'error': job.error or None,
+    }
+    if job.status == SimulationJob.DONE:
+        status['result_url'] = f'/api/jobs/{job.pk}/result/'
+    return status
+
+
+def effective_config(config):
+    """Configuração completa: valores enviados pelo front end sobre os padrões"""
+    effective = dict(SIMULATOR_DEFAULTS)
+    effective.update((key, value) for key, value in config.items() if key in SIMULATOR_DEFAULTS)
+    effective['rob_size'] = effective['rob_size'] or None
+    return effective
+
+
+def build_simulator(config, checkpoint_interval=0):
+    """Cria o simulador a partir da configuração enviada pelo front end.
+
+    Os checkpoints de seek ficam desligados por padrão; só as sessões, que
+    voltam ciclos, pedem um intervalo.
+    """
+    config = effective_config(config)
+
+    return TOMASSULLLERoriSimulator(
+        add_fu_count=config['rs_add'], store_fu_count=config['rs_store'],
+        mult_fu_count=config['rs_mult'], branch_fu_count=config['rs_branch'],
+        add_sub_latency=config['latency_add'], load_latency=config['latency_load'],
+        store_latency=config['latency_store'], mult_latency=config['latency_mul'],
+        div_latency=config['latency_div'], branch_latency=config['latency_branch'],
+        keep_history=False,  # A API nunca volta ciclos: dispensa o journal de Step Back
+        checkpoint_interval=checkpoint_interval,
+        rob_size=config['rob_size'],
+        issue_width=config['issue_width'], commit_width=config['commit_width'],
+        cdb_count=config['cdb_count'], cdb_arbitration=config['cdb_arbitration'],
+        branch_predictor=create_predictor(config['branch_predictor'], config['predictor_table_size'],
+                                          config['predictor_history_bits']),
+        memory_model=config['memory_model']
+    )
+
+
+class SimulationBudget:
+    """Limites de uma execução: ciclos e tempo de relógio, o que vier primeiro.
+
+    Quando um limite interrompe a simulação, 'truncation' registra o motivo
+    ('max_cycles', 'max_bytes' ou 'time_budget') e o ciclo em que ela parou.
+    max_bytes só vale para quem informa o tamanho gerado com add_output.
+    """
+
+    def __init__(self, max_cycles, time_budget, max_bytes=None):
+        self.max_cycles = max_cycles
+        self.time_budget = time_budget
+        self.max_bytes = max_bytes
+        self.deadline = time.monotonic() + time_budget if time_budget else None
+        self.output_bytes = 0
+        self.truncation = None
+
+    @classmethod
+    def from_request(cls, data):
+        """Limites do servidor; o cliente pode pedir limites menores (max_cycles/time_budget)"""
+        limits = getattr(settings, 'SIMULATION_LIMITS', {})
+        max_cycles = limits.get('MAX_CYCLES', DEFAULT_MAX_CYCLES)
+        time_budget = limits.get('TIME_BUDGET', DEFAULT_TIME_BUDGET)
+
+        requested_cycles = data.get('max_cycles')
+        if requested_cycles:
+            max_cycles = min(max_cycles, max(1, int(requested_cycles)))
+        requested_time = data.get('time_budget')
+        if requested_time:
+            time_budget = min(time_budget, float(requested_time)) if time_budget else float(requested_time)
+        return cls(max_cycles, time_budget, limits.get('MAX_RESPONSE_BYTES', DEFAULT_MAX_RESPONSE_BYTES))
+
+    def renewed(self):
+        """Orçamento com os mesmos limites e o prazo de tempo contando a partir de agora"""
+        return SimulationBudget(self.max_cycles, self.time_budget, self.max_bytes)
+
+    def add_output(self, size):
+        """Soma o tamanho (bytes) do que já foi gerado para a resposta"""
+        self.output_bytes += size
+
+    def allows(self, simulator):
+        """True se ainda dá para simular mais um ciclo"""
+        clock = simulator.get_current_clock()
+        if clock >= self.max_cycles:
+            reason = 'max_cycles'
+        elif self.max_bytes is not None and self.output_bytes >= self.max_bytes:
+            reason = 'max_bytes'
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            reason = 'time_budget'
+        else:
+            return True
+
+        self.truncation = {
+            'reason': reason,
+            'cycle': clock,
+            'max_cycles': self.max_cycles,
+            'max_bytes': self.max_bytes,
+            'time_budget': self.time_budget,
+        }
+        return False
+
+    def is_time_truncated(self):
+        return self.truncation is not None and self.truncation['reason'] == 'time_budget'
+
+
+def simulate_cycles(simulator, budget):
+    """Gera o estado de cada ciclo (a partir do ciclo 0) enquanto simula"""
+    # Captura estado inicial (ciclo 0)
+    yield capture_cycle_state(simulator)
+
+    while not simulator.is_simulation_finished() and budget.allows(simulator):
+        simulator.next_cycle()
+        yield capture_cycle_state(simulator)
+
+
+def collect_metrics(simulator, instructions, truncation=None):
+    """Métricas finais da simulação (truncation: ver SimulationBudget)"""
+    total_instructions = len(instructions)
+    committed = sum(1 for i in instructions if i.get_commit_cycle() != -1 and not i.is_squashed())
+
+    return {
+        'ipc': simulator.calculate_ipc(),
+        'total_cycles': simulator.get_current_clock(),
+        'bubble_cycles': simulator.get_bubble_cycles(),
+        'total_squashed': simulator.get_total_squashed(),
+        'committed_instructions': committed,
+        'total_instructions': total_instructions,
+        'max_speculative': simulator.max_speculative_count,
+        'rob_size': simulator.get_reorder_buffer().get_size(),
+        'branch_prediction': simulator.get_branch_prediction_stats(),
+        'memory': simulator.get_memory_stats(),
+        'efficiency': (committed / total_instructions * 100) if total_instructions > 0 else 0,
+        'truncated': truncation is not None,
+        'truncation': truncation
+    }
+
+
+def diff_records(previous, current):
+    """Campos alterados em listas de dicts de mesmo tamanho: {índice: {campo: valor}}"""
+    changes = {}
+    for index, (old, new) in enumerate(zip(previous, current)):
+        if old != new:
+            changes[index] = {key: value for key, value in new.items() if old.get(key) != value}
+    return changes
+
+
+def encode_cycle_delta(previous, current):
+    """Diferença entre dois estados de capture_cycle_state.
+
+    Só entram as partes que mudaram:
+    - 'fields': valores escalares do ciclo (clock, ipc, contadores, cdb...)
+    - 'instructions': {índice: campos alterados}
+    - 'reservation_stations': {grupo: {slot: campos alterados}}
+    - 'registers': {nome: {'value', 'producer'}} dos registradores alterados
+    - 'register_order': nomes na ordem de exibição, quando a ordem muda
+    """
+    delta = {}
+
+    fields = {key: value for key, value in current.items()
+              if key not in ('instructions', 'reservation_stations', 'register_file')
+              and previous.get(key) != value}
+    if fields:
+        delta['fields'] = fields
+
+    instructions = diff_records(previous['instructions'], current['instructions'])
+    if instructions:
+        delta['instructions'] = instructions
+
+    stations = {}
+    for group, slots in current['reservation_stations'].items():
+        changes = diff_records(previous['reservation_stations'][group], slots)
+        if changes:
+            stations[group] = changes
+    if stations:
+        delta['reservation_stations'] = stations
+
+    old_registers = {reg['name']: reg for reg in previous['register_file']}
+    registers = {reg['name']: {'value': reg['value'], 'producer': reg['producer']}
+                 for reg in current['register_file'] if old_registers.get(reg['name']) != reg}
+    if registers:
+        delta['registers'] = registers
+
+    order = [reg['name'] for reg in current['register_file']]
+    if order != [reg['name'] for reg in previous['register_file']]:
+        delta['register_order'] = order
+
+    return delta
 
 
 def capture_cycle_state(simulator):
@@ -258,5 +752,7 @@ def capture_cycle_state(simulator):
         'squashed_count': squashed_until_now,
         'ipc': ipc_current,
         'committed_count': committed_count,
-        'bubble_cycles': simulator.get_bubble_cycles()
+        'bubble_cycles': simulator.get_bubble_cycles(),
+        'rob_count': simulator.get_reorder_buffer().get_count(),
+        'cdb': [{'producer': tag, 'value': value} for tag, value in simulator.get_cdb_buses()]
     }
@@ -81,6 +81,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,  # Workers e servidor escrevem no mesmo arquivo
+        },
     }
 }
 
@@ -133,7 +136,62 @@ SESSION_CACHE_ALIAS = 'default'
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Resultados de /api/simulate/ já calculados (ver SIMULATION_RESULT_CACHE)
+    'simulation_results': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'simulation_results',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 256,
+        },
+    },
+}
+
+# Cache de resultados da simulação, indexado por hash do programa + configuração.
+# BACKEND 'django' usa o alias ALIAS de CACHES; 'disk' grava em LOCATION e
+# mantém no máximo MAX_ENTRIES arquivos. None desliga o cache.
+SIMULATION_RESULT_CACHE = {
+    'BACKEND': 'django',
+    'ALIAS': 'simulation_results',
+}
+
+# Limites de cada simulação na API: ciclos e segundos de relógio (o que vier primeiro).
+# Quando um limite é atingido a resposta informa o corte em metrics.truncation.
+# /api/simulate/ também limita os ciclos com encoding 'full' (MAX_FULL_CYCLES) e
+# o tamanho dos ciclos na resposta (MAX_RESPONSE_BYTES).
+SIMULATION_LIMITS = {
+    'MAX_CYCLES': 20000,
+    'TIME_BUDGET': 10.0,
+    'MAX_FULL_CYCLES': 1000,
+    'MAX_RESPONSE_BYTES': 32 * 1024 * 1024,
+}
+
+# Sessões de simulação da API (/api/sessions/): LRU em memória do processo com os
+# simuladores vivos; cada sessão expira após TIMEOUT segundos sem ser acessada.
+# Só funcionam com um único processo servidor (ou com afinidade de sessão): outro
+# processo não tem o simulador e responde 404.
+SIMULATION_SESSIONS = {
+    'MAX_ENTRIES': 64,
+    'TIMEOUT': 30 * 60,
+}
+
+# Pool de processos da view assíncrona /api/simulate/async/ (servir com ASGI).
+# MAX_PENDING: simulações rodando + na fila antes de responder 503 (uma que
+# respondeu 504 ocupa o lugar até terminar, no máximo o TIME_BUDGET);
+# TIMEOUT: segundos até responder 504 (deve passar do TIME_BUDGET acima).
+SIMULATION_EXECUTOR = {
+    'MAX_WORKERS': 2,
+    'MAX_PENDING': 8,
+    'TIMEOUT': 15.0,
+}
+
+# Fila de jobs em segundo plano (/api/jobs/), executada por
+# python manage.py simulation_worker usando o próprio SQLite como fila.
+SIMULATION_JOBS = {
+    'MAX_CYCLES': 5_000_000,
+    'PROCESSES': 2,
+    'PROGRESS_INTERVAL': 0.5,  # Segundos entre atualizações de progresso
 }
 
 # Default primary key field type